@@ -217,6 +217,31 @@ metric_grid(
     currency_labels={"VGV Total", "Ticket Medio", "Maior VGV"},
 )
 
+section("Resumo por Equipe e Corretor", "Mesmos cards do painel, abertos por grupo")
+colunas_grupo = {
+    "nova_analise": "Analises",
+    "aprovacoes": "Aprovacoes",
+    "reprovado": "Reprovado",
+    "doc_pendente": "Doc pendente",
+    "vendas_total": "Vendas",
+    "vgv_total": st.column_config.NumberColumn("VGV", format="R$ %.2f"),
+    "taxa_aprov_analise": st.column_config.NumberColumn("Aprov./Analises", format="%.1f%%"),
+    "taxa_venda_analise": st.column_config.NumberColumn("Vendas/Analises", format="%.1f%%"),
+}
+aba_equipe, aba_corretor = st.tabs(["Por equipe", "Por corretor"])
+for aba, by in [(aba_equipe, ["EQUIPE"]), (aba_corretor, ["EQUIPE", "CORRETOR"])]:
+    with aba:
+        resumo_grupo = calcular_resumo_comercial(df_filtrado, df, filtro_vendas, by=by)
+        if resumo_grupo.empty:
+            st.info("Sem registros para agrupar no periodo filtrado.")
+            continue
+        st.dataframe(
+            resumo_grupo[by + list(colunas_grupo)].sort_values("nova_analise", ascending=False),
+            use_container_width=True,
+            hide_index=True,
+            column_config={"EQUIPE": "Equipe", "CORRETOR": "Corretor", **colunas_grupo},
+        )
+
 st.markdown(
     f"<p style='text-align:center; color:#64748b; margin-top:2rem;'>Painel Comercial - base atual: PipeRun - VGV total {format_currency(resumo['vgv_total'])}</p>",
     unsafe_allow_html=True,
@@ -0,0 +1,316 @@
+"""
+Gerador de dados sintéticos para os benchmarks.
+
+Produz, em tamanhos configuráveis (1 mil a 1 milhão de linhas), bases com o
+mesmo formato das fontes reais:
+
+- deals do PipeRun (formato ``pd.json_normalize`` da API);
+- atividades do PipeRun ligadas a esses deals;
+- linhas da planilha do Google Sheets (aba de análises), tudo como texto.
+
+Os nomes usam acentos, CPF formatado, VGV, equipes e etapas iguais às que
+aparecem no CRM, para que normalização e classificação façam o mesmo trabalho
+que fazem em produção. Tudo é determinístico a partir da ``seed``.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.commercial_repository import normalize_text
+
+
+# =========================================================
+# VOCABULÁRIO
+# =========================================================
+PRIMEIROS_NOMES = [
+    "JOÃO", "JOSÉ", "MARIA", "ANA", "ANTÔNIO", "FRANCISCO", "LUÍS", "MÁRCIA",
+    "CÉLIA", "GONÇALO", "PATRÍCIA", "FÁBIO", "SÉRGIO", "LÚCIA", "CAUÃ", "INÊS",
+    "RÔMULO", "VITÓRIA", "CONCEIÇÃO", "ÍCARO", "JÉSSICA", "MÔNICA", "ANDRÉ", "LETÍCIA",
+]
+
+SOBRENOMES = [
+    "SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "CONCEIÇÃO", "ARAÚJO", "GONÇALVES",
+    "MAGALHÃES", "BRANDÃO", "ASSUNÇÃO", "GUIMARÃES", "FALCÃO", "DAMIÃO", "LEÃO",
+    "BARBOSA", "CAVALCANTI", "MONTEIRO", "ROMÃO", "PEIXOTO", "ESTÊVÃO",
+]
+
+EQUIPES = ["EQUIPE ÁGUIA", "EQUIPE LEÃO", "EQUIPE FALCÃO", "EQUIPE TUBARÃO", "EQUIPE JAGUAR"]
+
+CONSTRUTORAS = ["MRV", "DIRECIONAL", "CURY", "PLANO&PLANO", "VIVAZ", "TENDA"]
+
+EMPREENDIMENTOS = [
+    "RESIDENCIAL PÔR DO SOL", "JARDIM DAS ACÁCIAS", "PARQUE SÃO JOÃO", "VILA GARÇA",
+    "RECANTO DO IPÊ", "TORRES DO ATLÂNTICO", "CONDOMÍNIO ÁGUAS CLARAS", "ESTAÇÃO PARAÍSO",
+]
+
+SITUACOES_PLANILHA = [
+    "EM ANÁLISE", "REANÁLISE", "APROVAÇÃO", "APROVADO BACEN", "REPROVAÇÃO",
+    "PENDÊNCIA", "VENDA GERADA", "VENDA INFORMADA", "DESISTIU",
+]
+PESOS_SITUACOES = [0.30, 0.10, 0.16, 0.05, 0.12, 0.10, 0.07, 0.06, 0.04]
+
+MESES_PTBR = [
+    "janeiro", "fevereiro", "março", "abril", "maio", "junho",
+    "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+]
+
+PIPELINES = ["VENDAS", "CRÉDITO", "CADÊNCIA", "RECUPERAÇÃO DE LEAD", "FINANCEIRO"]
+
+ETAPAS = [
+    "NOVO LEAD", "AGUARDANDO ATENDIMENTO", "EM ATENDIMENTO", "DIA 1", "ACOMPANHAMENTO",
+    "VISITA AGENDADA", "VISITA REALIZADA", "AGUARDANDO DOCUMENTOS", "ANÁLISE DE CRÉDITO",
+    "CONFERÊNCIA DO PASTEIRO", "DOC PENDENTE", "CONDICIONADO", "RESTRIÇÃO",
+    "APROVADO", "REPROVADO", "VENDA GANHA",
+]
+
+TIPOS_ATIVIDADE = [
+    "1ª ANÁLISE", "CONFERÊNCIA DO PASTEIRO", "RECUSA PASTEIRO", "ANÁLISE DE CRÉDITO",
+    "DOC PENDENTE", "CONDICIONADO", "RESTRIÇÃO", "REPROVADO", "APROVADO C/ PENDÊNCIA",
+    "APROVADO", "LIGAÇÃO", "WHATSAPP ENVIADO", "VISITA", "E-MAIL",
+]
+PESOS_TIPOS_ATIVIDADE = [
+    0.10, 0.05, 0.02, 0.05, 0.05, 0.03, 0.02, 0.04, 0.02, 0.06, 0.25, 0.20, 0.06, 0.05,
+]
+
+DATA_FIM_PADRAO = date(2025, 12, 31)
+DIAS_HISTORICO = 365
+
+
+# =========================================================
+# AUXILIARES
+# =========================================================
+def _rng(seed: int) -> np.random.Generator:
+    return np.random.default_rng(seed)
+
+
+def _corretores(qtde: int, rng: np.random.Generator) -> pd.DataFrame:
+    nomes = [
+        f"{PRIMEIROS_NOMES[i % len(PRIMEIROS_NOMES)]} {SOBRENOMES[(i * 7) % len(SOBRENOMES)]}"
+        + (f" {i // len(PRIMEIROS_NOMES)}" if i >= len(PRIMEIROS_NOMES) else "")
+        for i in range(qtde)
+    ]
+    return pd.DataFrame(
+        {
+            "ID": np.arange(1000, 1000 + qtde),
+            "NOME": nomes,
+            "EQUIPE": rng.choice(EQUIPES, size=qtde),
+        }
+    )
+
+
+def _nomes_clientes(qtde: int, rng: np.random.Generator) -> np.ndarray:
+    primeiro = rng.choice(PRIMEIROS_NOMES, size=qtde)
+    meio = rng.choice(SOBRENOMES, size=qtde)
+    ultimo = rng.choice(SOBRENOMES, size=qtde)
+    nomes = pd.Series(primeiro) + " " + pd.Series(meio) + " " + pd.Series(ultimo)
+    # espaços sobrando e caixa mista aparecem na planilha real
+    sujos = rng.random(qtde) < 0.05
+    nomes[sujos] = " " + nomes[sujos].str.title() + "  "
+    return nomes.to_numpy()
+
+
+def _cpfs(qtde: int, rng: np.random.Generator) -> np.ndarray:
+    numeros = rng.integers(10**10, 10**11 - 1, size=qtde, dtype=np.int64).astype(str)
+    cpf = pd.Series(numeros)
+    formatado = cpf.str[:3] + "." + cpf.str[3:6] + "." + cpf.str[6:9] + "-" + cpf.str[9:11]
+    # parte da base vem sem máscara ou vazia
+    sorteio = rng.random(qtde)
+    formatado[sorteio < 0.25] = cpf[sorteio < 0.25]
+    formatado[sorteio > 0.97] = ""
+    return formatado.to_numpy()
+
+
+def _datas(qtde: int, rng: np.random.Generator, data_fim: date) -> pd.DatetimeIndex:
+    inicio = pd.Timestamp(data_fim - timedelta(days=DIAS_HISTORICO))
+    segundos = rng.integers(0, DIAS_HISTORICO * 86400, size=qtde)
+    return inicio + pd.to_timedelta(segundos, unit="s")
+
+
+# =========================================================
+# PLANILHA (GOOGLE SHEETS)
+# =========================================================
+def gerar_planilha(
+    n_linhas: int,
+    seed: int = 42,
+    n_corretores: int = 60,
+    data_fim: date = DATA_FIM_PADRAO,
+) -> pd.DataFrame:
+    """
+    Linhas da aba de análises, no mesmo formato entregue por
+    ``carregar_dados_planilha`` (tudo texto, colunas em maiúsculas).
+    Cada cliente tem em média 4 movimentações com o mesmo corretor.
+    """
+    rng = _rng(seed)
+    corretores = _corretores(n_corretores, rng)
+
+    n_clientes = max(1, n_linhas // 4)
+    clientes = pd.DataFrame(
+        {
+            "CLIENTE": _nomes_clientes(n_clientes, rng),
+            "CPF": _cpfs(n_clientes, rng),
+            "IDX_CORRETOR": rng.integers(0, n_corretores, size=n_clientes),
+            "CONSTRUTORA": rng.choice(CONSTRUTORAS, size=n_clientes),
+            "EMPREENDIMENTO": rng.choice(EMPREENDIMENTOS, size=n_clientes),
+        }
+    )
+
+    idx_cliente = rng.integers(0, n_clientes, size=n_linhas)
+    base = clientes.iloc[idx_cliente].reset_index(drop=True)
+    cor = corretores.iloc[base["IDX_CORRETOR"].to_numpy()].reset_index(drop=True)
+
+    datas = _datas(n_linhas, rng, data_fim)
+    situacao = rng.choice(SITUACOES_PLANILHA, size=n_linhas, p=PESOS_SITUACOES)
+    venda = np.isin(situacao, ["VENDA GERADA", "VENDA INFORMADA"])
+    vgv = np.round(rng.uniform(140_000, 420_000, size=n_linhas), 2)
+
+    meses = np.array(MESES_PTBR)[datas.month.to_numpy() - 1]
+    data_base = pd.Series(meses) + " " + pd.Series(datas.year.astype(str))
+    # a planilha mistura "Novembro 2025" e "novembro 2025"
+    capitalizado = rng.random(n_linhas) < 0.5
+    data_base[capitalizado] = data_base[capitalizado].str.title()
+
+    observacoes = np.where(venda, vgv.astype(str), rng.choice(["", "AGUARDANDO DOCUMENTOS", "CLIENTE VAI PENSAR"], size=n_linhas))
+
+    df = pd.DataFrame(
+        {
+            "DATA": datas.strftime("%d/%m/%Y"),
+            "EQUIPE": cor["EQUIPE"].to_numpy(),
+            "CORRETOR": cor["NOME"].to_numpy(),
+            "CLIENTE": base["CLIENTE"].to_numpy(),
+            "CPF": base["CPF"].to_numpy(),
+            "SITUAÇÃO": situacao,
+            "DATA BASE": data_base.to_numpy(),
+            "CONSTRUTORA": base["CONSTRUTORA"].to_numpy(),
+            "EMPREENDIMENTO": base["EMPREENDIMENTO"].to_numpy(),
+            "VGV": np.where(venda, vgv.astype(str), ""),
+            "OBSERVAÇÕES": observacoes,
+        }
+    )
+    return df.astype(str)
+
+
+# =========================================================
+# PIPERUN – DEALS
+# =========================================================
+def gerar_deals(
+    n_deals: int,
+    seed: int = 42,
+    n_corretores: int = 60,
+    data_fim: date = DATA_FIM_PADRAO,
+) -> pd.DataFrame:
+    """
+    Deals no formato achatado por ``pd.json_normalize`` (colunas como
+    ``owner.name``, ``stage.name``, ``person.cpf``).
+    """
+    rng = _rng(seed)
+    corretores = _corretores(n_corretores, rng)
+
+    idx_corretor = rng.integers(0, n_corretores, size=n_deals)
+    cor = corretores.iloc[idx_corretor].reset_index(drop=True)
+    criado = _datas(n_deals, rng, data_fim)
+    atualizado = criado + pd.to_timedelta(rng.integers(0, 30 * 86400, size=n_deals), unit="s")
+
+    idx_etapa = rng.integers(0, len(ETAPAS), size=n_deals)
+    idx_pipeline = rng.choice(len(PIPELINES), size=n_deals, p=[0.45, 0.25, 0.15, 0.10, 0.05])
+    etapa = np.array(ETAPAS)[idx_etapa]
+    status = np.where(etapa == "VENDA GANHA", "won", rng.choice(["open", "open", "open", "lost"], size=n_deals))
+
+    nomes = _nomes_clientes(n_deals, rng)
+    remanejado = rng.random(n_deals) < 0.04
+    anterior = np.where(remanejado, corretores["NOME"].to_numpy()[rng.integers(0, n_corretores, size=n_deals)], "")
+
+    return pd.DataFrame(
+        {
+            "id": np.arange(500_000, 500_000 + n_deals),
+            "title": nomes,
+            "created_at": criado.strftime("%Y-%m-%d %H:%M:%S"),
+            "updated_at": atualizado.strftime("%Y-%m-%d %H:%M:%S"),
+            "owner_id": cor["ID"].to_numpy(),
+            "owner.name": cor["NOME"].to_numpy(),
+            "team.name": cor["EQUIPE"].to_numpy(),
+            "stage_id": idx_etapa + 10,
+            "stage.name": etapa,
+            "pipeline_id": idx_pipeline + 1,
+            "pipeline.name": np.array(PIPELINES)[idx_pipeline],
+            "status": status,
+            "value": np.round(rng.uniform(140_000, 420_000, size=n_deals), 2),
+            "person_id": np.arange(900_000, 900_000 + n_deals),
+            "person.name": nomes,
+            "person.cpf": _cpfs(n_deals, rng),
+            "previous_owner.name": anterior,
+        }
+    )
+
+
+# =========================================================
+# PIPERUN – ATIVIDADES
+# =========================================================
+def gerar_atividades(
+    n_atividades: int,
+    deals: pd.DataFrame,
+    seed: int = 43,
+    data_fim: date = DATA_FIM_PADRAO,
+) -> pd.DataFrame:
+    """
+    Atividades ligadas aos ``deals`` gerados acima, com tipos de crédito
+    (1ª análise, conferência do pasteiro, aprovado, ...) e de contato.
+    """
+    rng = _rng(seed)
+    if deals.empty:
+        return pd.DataFrame()
+
+    idx_deal = rng.integers(0, len(deals), size=n_atividades)
+    ref = deals.iloc[idx_deal].reset_index(drop=True)
+
+    tipo = rng.choice(TIPOS_ATIVIDADE, size=n_atividades, p=PESOS_TIPOS_ATIVIDADE)
+    feito = _datas(n_atividades, rng, data_fim)
+    excluida = rng.random(n_atividades) < 0.01
+
+    return pd.DataFrame(
+        {
+            "id": np.arange(7_000_000, 7_000_000 + n_atividades),
+            "deal_id": ref["id"].to_numpy(),
+            "owner_id": ref["owner_id"].to_numpy(),
+            "user.name": ref["owner.name"].to_numpy(),
+            "team.name": ref["team.name"].to_numpy(),
+            "activityType.name": tipo,
+            "title": tipo,
+            "description": np.where(
+                tipo == "1ª ANÁLISE",
+                "Cliente foi enviado para análise de crédito",
+                "",
+            ),
+            "deal.title": ref["title"].to_numpy(),
+            "stage.name": ref["stage.name"].to_numpy(),
+            "pipeline.name": ref["pipeline.name"].to_numpy(),
+            "done_at": feito.strftime("%Y-%m-%d %H:%M:%S"),
+            "deleted": np.where(excluida, "1", "0"),
+        }
+    )
+
+
+def gerar_referencias(deals: pd.DataFrame) -> dict[str, dict[str, str]]:
+    """
+    Mapas de referência equivalentes a ``fetch_piperun_reference_maps``
+    (ids como texto, nomes normalizados como faz ``make_lookup``).
+    """
+    if deals.empty:
+        return {"user_name": {}, "user_team": {}, "stage_name": {}, "pipeline_name": {}}
+
+    usuarios = deals[["owner_id", "owner.name", "team.name"]].drop_duplicates("owner_id")
+    etapas = deals[["stage_id", "stage.name"]].drop_duplicates("stage_id")
+    pipelines = deals[["pipeline_id", "pipeline.name"]].drop_duplicates("pipeline_id")
+
+    def mapa(df: pd.DataFrame, col_id: str, col_valor: str) -> dict[str, str]:
+        return dict(zip(df[col_id].astype(str), df[col_valor].map(normalize_text)))
+
+    return {
+        "user_name": mapa(usuarios, "owner_id", "owner.name"),
+        "user_team": mapa(usuarios, "owner_id", "team.name"),
+        "stage_name": mapa(etapas, "stage_id", "stage.name"),
+        "pipeline_name": mapa(pipelines, "pipeline_id", "pipeline.name"),
+    }
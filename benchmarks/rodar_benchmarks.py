@@ -0,0 +1,319 @@
+"""
+Benchmarks das etapas do pipeline comercial.
+
+Mede tempo e pico de memória de cada etapa (PipeRun, resumo comercial e os
+agrupamentos feitos pelas páginas em cima da planilha) usando os dados de
+``benchmarks.dados_sinteticos``, e compara com um baseline gravado.
+
+Uso (a partir da raiz do projeto):
+
+    python -m benchmarks.rodar_benchmarks --tamanhos 1000 10000 100000
+    python -m benchmarks.rodar_benchmarks --tamanhos 1000 10000 --salvar-baseline
+    python -m benchmarks.rodar_benchmarks --etapas planilha --tamanhos 1000000
+
+Sai com código 1 quando alguma etapa ficou mais lenta (ou mais pesada) que o
+baseline além da tolerância, para poder rodar antes de subir mudanças.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from benchmarks.dados_sinteticos import (
+    DATA_FIM_PADRAO,
+    gerar_atividades,
+    gerar_deals,
+    gerar_planilha,
+    gerar_referencias,
+)
+from utils.commercial_repository import carregar_piperun
+from utils.dashboard_metrics import calcular_resumo_comercial
+from utils.estado_clientes import montar_estado_clientes, ultima_linha_por_chave
+from utils.piperun_client import PiperunClient, PiperunFetchResult
+from utils.piperun_metrics import build_performance
+from utils.planilha_normalizada import normalizar_planilha as normalizar_planilha_compartilhada
+
+
+ARQ_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+TAMANHOS_PADRAO = [1_000, 10_000, 100_000]
+
+# diferenças menores que isso são ruído de medição, não regressão
+FOLGA_SEGUNDOS = 0.005
+FOLGA_MB = 1.0
+
+
+# =========================================================
+# CLIENTE PIPERUN OFFLINE
+# =========================================================
+class ClienteSintetico(PiperunClient):
+    """
+    PiperunClient que responde com os frames sintéticos em vez de chamar a
+    API, para medir só o processamento de ``carregar_piperun``.
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]):
+        super().__init__(token="sintetico", base_url="http://localhost")
+        self.frames = frames
+
+    def fetch_first_available(self, endpoints, params=None, max_pages=5, per_page=100) -> PiperunFetchResult:
+        for endpoint in endpoints:
+            if endpoint in self.frames:
+                return PiperunFetchResult(endpoint=endpoint, data=self.frames[endpoint].copy(), ok=True, status_code=200)
+        return PiperunFetchResult(endpoint=", ".join(endpoints), data=pd.DataFrame(), ok=False, error="sem dados sinteticos")
+
+
+def frames_piperun(deals: pd.DataFrame, atividades: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    usuarios = deals[["owner_id", "owner.name", "team.name"]].drop_duplicates("owner_id")
+    etapas = deals[["stage_id", "stage.name"]].drop_duplicates("stage_id")
+    pipelines = deals[["pipeline_id", "pipeline.name"]].drop_duplicates("pipeline_id")
+    return {
+        "users": usuarios.rename(columns={"owner_id": "id", "owner.name": "name"}),
+        "stages": etapas.rename(columns={"stage_id": "id", "stage.name": "name"}),
+        "pipelines": pipelines.rename(columns={"pipeline_id": "id", "pipeline.name": "name"}),
+        "activities": atividades,
+        "deals": deals,
+    }
+
+
+# =========================================================
+# ETAPAS DAS PÁGINAS (MESMA LÓGICA DAS PÁGINAS)
+# =========================================================
+def normalizar_planilha(df: pd.DataFrame) -> pd.DataFrame:
+    """Pipeline compartilhado das páginas (perfil com DESISTIU), sem o cache."""
+    return normalizar_planilha_compartilhada(df, "desistencia")
+
+
+def pivot_equipe_dia(df: pd.DataFrame) -> pd.DataFrame:
+    """Tabela EQUIPE × DIA de 01_Analises_Diarias."""
+    analises = df[df["STATUS_BASE"].isin(["EM ANÁLISE", "REANÁLISE"])]
+    return analises.groupby(["EQUIPE", "DIA"]).size().unstack(fill_value=0)
+
+
+def ultima_linha_carteira(df: pd.DataFrame) -> pd.DataFrame:
+    """Última situação por cliente de 12_Carteira_Clientes (``ultima_linha_por_chave``)."""
+    tmp = df.assign(
+        CLIENTE=df["NOME_CLIENTE_BASE"],
+        CPF=df["CPF_CLIENTE_BASE"],
+        DATA=pd.to_datetime(df["DIA"], errors="coerce"),
+    )
+    return ultima_linha_por_chave(tmp, ["CLIENTE", "CPF"], ordem="DATA")
+
+
+# =========================================================
+# REGISTRO DAS ETAPAS
+# =========================================================
+# cada etapa recebe o contexto (dados gerados + saídas das etapas anteriores)
+# e declara de quais etapas anteriores depende
+Etapa = Callable[[Dict[str, Any]], Any]
+
+
+def _etapas(data_ini: date, data_fim: date) -> Dict[str, tuple[Etapa, List[str]]]:
+    return {
+        "piperun.build_performance": (
+            lambda ctx: build_performance(ctx["deals"], ctx["atividades"], data_ini, data_fim, reference_maps=ctx["refs"]),
+            [],
+        ),
+        "piperun.carregar_piperun": (
+            lambda ctx: carregar_piperun(max_pages=1, per_page=len(ctx["deals"]), client=ClienteSintetico(ctx["frames_piperun"])),
+            [],
+        ),
+        "comercial.calcular_resumo_comercial": (
+            lambda ctx: calcular_resumo_comercial(ctx["piperun.carregar_piperun"], ctx["piperun.carregar_piperun"], "GERADA + INFORMADA"),
+            ["piperun.carregar_piperun"],
+        ),
+        "planilha.normalizacao": (lambda ctx: normalizar_planilha(ctx["planilha"]), []),
+        "planilha.status_final_por_cliente": (
+            # a tabela em si, sem o cache do processo (repetições seriam só consultas)
+            lambda ctx: montar_estado_clientes(ctx["planilha.normalizacao"])["STATUS_FINAL"],
+            ["planilha.normalizacao"],
+        ),
+        "planilha.pivot_equipe_dia": (lambda ctx: pivot_equipe_dia(ctx["planilha.normalizacao"]), ["planilha.normalizacao"]),
+        "planilha.ultima_linha_carteira": (
+            lambda ctx: ultima_linha_carteira(ctx["planilha.normalizacao"]),
+            ["planilha.normalizacao"],
+        ),
+    }
+
+
+def _linhas(resultado: Any) -> Optional[int]:
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        return int(len(resultado))
+    if isinstance(resultado, dict):
+        frames = [v for v in resultado.values() if isinstance(v, pd.DataFrame)]
+        return int(sum(len(f) for f in frames)) if frames else None
+    return None
+
+
+def medir(func: Callable[[], Any], repeticoes: int) -> tuple[Any, Dict[str, Any]]:
+    tempos = []
+    resultado = None
+    for _ in range(max(1, repeticoes)):
+        gc.collect()
+        inicio = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - inicio)
+
+    # memória medida numa rodada à parte: o tracemalloc distorce o tempo
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return resultado, {
+        "segundos": round(min(tempos), 6),
+        "segundos_mediana": round(statistics.median(tempos), 6),
+        "pico_mb": round(pico / 2**20, 3),
+        "linhas_saida": _linhas(resultado),
+    }
+
+
+def rodar(
+    tamanhos: Iterable[int],
+    repeticoes: int = 3,
+    filtro_etapas: Optional[List[str]] = None,
+    seed: int = 42,
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    data_fim = DATA_FIM_PADRAO
+    data_ini = date(data_fim.year, 1, 1)
+    etapas = _etapas(data_ini, data_fim)
+
+    resultados: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for tamanho in tamanhos:
+        print(f"\n== {tamanho:,} linhas ==".replace(",", "."), flush=True)
+        deals = gerar_deals(tamanho, seed=seed)
+        atividades = gerar_atividades(tamanho, deals, seed=seed + 1)
+        ctx: Dict[str, Any] = {
+            "deals": deals,
+            "atividades": atividades,
+            "refs": gerar_referencias(deals),
+            "frames_piperun": frames_piperun(deals, atividades),
+            "planilha": gerar_planilha(tamanho, seed=seed),
+        }
+
+        selecionadas = [nome for nome in etapas if not filtro_etapas or any(f in nome for f in filtro_etapas)]
+        necessarias = set(selecionadas)
+        for nome in selecionadas:
+            necessarias.update(etapas[nome][1])
+
+        resultados[str(tamanho)] = {}
+        for nome, (etapa, _) in etapas.items():
+            if nome not in necessarias:
+                continue
+            # dependências não selecionadas rodam uma vez, sem medir
+            if nome not in selecionadas:
+                ctx[nome] = etapa(ctx)
+                continue
+
+            resultado, medida = medir(lambda: etapa(ctx), repeticoes)
+            ctx[nome] = resultado
+            resultados[str(tamanho)][nome] = medida
+            print(
+                f"  {nome:<40} {medida['segundos']:>9.4f}s  pico {medida['pico_mb']:>9.1f} MB",
+                flush=True,
+            )
+
+    return resultados
+
+
+# =========================================================
+# BASELINE
+# =========================================================
+def salvar_baseline(resultados: Dict[str, Any], caminho: Path = ARQ_BASELINE) -> None:
+    payload = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "maquina": platform.platform(),
+        "tamanhos": resultados,
+    }
+    caminho.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def carregar_baseline(caminho: Path = ARQ_BASELINE) -> Dict[str, Any]:
+    if not caminho.exists():
+        return {}
+    try:
+        return json.loads(caminho.read_text(encoding="utf-8")).get("tamanhos", {})
+    except Exception:
+        return {}
+
+
+def comparar(resultados: Dict[str, Any], baseline: Dict[str, Any], tolerancia: float) -> List[str]:
+    regressoes = []
+    for tamanho, etapas in resultados.items():
+        for nome, atual in etapas.items():
+            ref = baseline.get(tamanho, {}).get(nome)
+            if not ref:
+                continue
+
+            limite_tempo = ref["segundos"] * (1 + tolerancia)
+            if atual["segundos"] > limite_tempo and atual["segundos"] - ref["segundos"] > FOLGA_SEGUNDOS:
+                regressoes.append(
+                    f"{tamanho} | {nome}: {atual['segundos']:.4f}s (baseline {ref['segundos']:.4f}s)"
+                )
+
+            limite_mem = ref["pico_mb"] * (1 + tolerancia)
+            if atual["pico_mb"] > limite_mem and atual["pico_mb"] - ref["pico_mb"] > FOLGA_MB:
+                regressoes.append(
+                    f"{tamanho} | {nome}: pico {atual['pico_mb']:.1f} MB (baseline {ref['pico_mb']:.1f} MB)"
+                )
+    return regressoes
+
+
+# =========================================================
+# CLI
+# =========================================================
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline comercial.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO, help="Quantidade de linhas por base (1000 a 1000000).")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--etapas", nargs="*", default=None, help="Filtra etapas pelo nome (ex.: planilha piperun.build).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Folga relativa antes de acusar regressão (0.25 = 25%%).")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava os resultados como novo baseline.")
+    parser.add_argument("--saida", type=Path, default=None, help="Grava os resultados desta rodada em JSON.")
+    args = parser.parse_args(argv)
+
+    resultados = rodar(args.tamanhos, repeticoes=args.repeticoes, filtro_etapas=args.etapas, seed=args.seed)
+
+    if args.saida:
+        args.saida.write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if args.salvar_baseline:
+        salvar_baseline(resultados)
+        print(f"\nBaseline gravado em {ARQ_BASELINE}")
+        return 0
+
+    baseline = carregar_baseline()
+    if not baseline:
+        print("\nSem baseline para comparar (rode com --salvar-baseline).")
+        return 0
+
+    regressoes = comparar(resultados, baseline, args.tolerancia)
+    if regressoes:
+        print("\nREGRESSÕES:")
+        for linha in regressoes:
+            print(f"  - {linha}")
+        return 1
+
+    print("\nSem regressões em relação ao baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
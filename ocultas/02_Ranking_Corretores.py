@@ -2,7 +2,10 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import altair as alt
-from datetime import timedelta, datetime
+from datetime import timedelta
+
+from utils.estado_clientes import status_final_map
+from utils.planilha_normalizada import planilha_normalizada
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -25,180 +28,12 @@ st.set_page_config(
 
 st.title("🏆 Ranking por Corretor – MR Imóveis")
 
-# ---------------------------------------------------------
-# CONFIG: LINK DA PLANILHA
-# ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
-# ---------------------------------------------------------
-# FUNÇÕES AUXILIARES
-# ---------------------------------------------------------
-def limpar_para_data(serie: pd.Series) -> pd.Series:
-    dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
-    return dt.dt.date
-
-
-def mes_ano_ptbr_para_date(valor: str):
-    """
-    Converte textos tipo 'novembro 2025' em date(2025, 11, 1).
-    Se não conseguir, retorna NaT.
-    """
-    if pd.isna(valor):
-        return pd.NaT
-    s = str(valor).strip().lower()
-    if not s:
-        return pd.NaT
-
-    meses = {
-        "janeiro": 1,
-        "fevereiro": 2,
-        "março": 3,
-        "marco": 3,
-        "abril": 4,
-        "maio": 5,
-        "junho": 6,
-        "julho": 7,
-        "agosto": 8,
-        "setembro": 9,
-        "outubro": 10,
-        "novembro": 11,
-        "dezembro": 12,
-    }
-
-    partes = s.split()
-    try:
-        mes_txt = partes[0]
-        ano = int(partes[-1])
-        mes_num = meses.get(mes_txt)
-        if mes_num is None:
-            return pd.NaT
-        return datetime(ano, mes_num, 1).date()
-    except Exception:
-        return pd.NaT
-
 # ---------------------------------------------------------
 # CARREGAR DADOS
 # ---------------------------------------------------------
 def carregar_dados() -> pd.DataFrame:
-    df = pd.read_csv(CSV_URL)
-
-    # Padroniza nomes de colunas
-    df.columns = [c.strip().upper() for c in df.columns]
-
-    # DATA (DIA)
-    if "DATA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DATA"])
-    elif "DIA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DIA"])
-    else:
-        df["DIA"] = pd.NaT
-
-    # DATA BASE (MÊS COMERCIAL) - TEXTO IGUAL À PLANILHA + REFERÊNCIA DE DATA
-    possiveis_cols_base = [
-        "DATA BASE",
-        "DATA_BASE",
-        "DT BASE",
-        "DATA REF",
-        "DATA REFERÊNCIA",
-        "DATA REFERENCIA",
-    ]
-    col_data_base = next((c for c in possiveis_cols_base if c in df.columns), None)
-
-    if col_data_base:
-        base_raw = df[col_data_base].astype(str).str.strip()
-        # Label igual à planilha, só organizando capitalização
-        df["DATA_BASE_LABEL"] = base_raw.str.lower().str.title()
-        # Converte "novembro 2025" -> 2025-11-01 para ordenar
-        df["DATA_BASE"] = base_raw.apply(mes_ano_ptbr_para_date)
-
-        # Se não conseguir converter nenhum, cai para DIA
-        if df["DATA_BASE"].dropna().empty:
-            df["DATA_BASE"] = df["DIA"]
-            df["DATA_BASE_LABEL"] = df["DIA"].apply(
-                lambda d: d.strftime("%m/%Y") if pd.notnull(d) else ""
-            )
-    else:
-        # Sem coluna de data base: usa DIA como base
-        df["DATA_BASE"] = df["DIA"]
-        df["DATA_BASE_LABEL"] = df["DIA"].apply(
-            lambda d: d.strftime("%m/%Y") if pd.notnull(d) else ""
-        )
-
-    # EQUIPE / CORRETOR
-    for col in ["EQUIPE", "CORRETOR"]:
-        if col in df.columns:
-            df[col] = (
-                df[col]
-                .fillna("NÃO INFORMADO")
-                .astype(str)
-                .str.upper()
-                .str.strip()
-            )
-        else:
-            df[col] = "NÃO INFORMADO"
-
-    # STATUS_BASE
-    possiveis_cols_situacao = [
-        "SITUAÇÃO",
-        "SITUAÇÃO ATUAL",
-        "STATUS",
-        "SITUACAO",
-        "SITUACAO ATUAL",
-    ]
-    col_situacao = next((c for c in possiveis_cols_situacao if c in df.columns), None)
-
-    df["STATUS_BASE"] = ""
-    if col_situacao is not None:
-        s = df[col_situacao].fillna("").astype(str).str.upper()
-        df.loc[s.str.contains("EM ANÁLISE"), "STATUS_BASE"] = "EM ANÁLISE"
-        df.loc[s.str.contains("REANÁLISE"), "STATUS_BASE"] = "REANÁLISE"
-        df.loc[s.str.contains("APROV"), "STATUS_BASE"] = "APROVADO"
-        df.loc[s.str.contains("REPROV"), "STATUS_BASE"] = "REPROVADO"
-        df.loc[s.str.contains("VENDA GERADA"), "STATUS_BASE"] = "VENDA GERADA"
-        df.loc[s.str.contains("VENDA INFORMADA"), "STATUS_BASE"] = "VENDA INFORMADA"
-        # 👇 NOVO – mapeia qualquer coisa com DESIST (DESISTIU, DESISTÊNCIA etc.)
-        df.loc[s.str.contains("DESIST"), "STATUS_BASE"] = "DESISTIU"
-
-    # VGV (OBSERVAÇÕES)
-    if "OBSERVAÇÕES" in df.columns:
-        df["VGV"] = pd.to_numeric(df["OBSERVAÇÕES"], errors="coerce").fillna(0)
-    else:
-        df["VGV"] = 0.0
-
-    # Nome / CPF base para chave de cliente
-    possiveis_nome = ["NOME", "CLIENTE", "NOME CLIENTE", "NOME DO CLIENTE"]
-    possiveis_cpf = ["CPF", "CPF CLIENTE", "CPF DO CLIENTE"]
-
-    col_nome = next((c for c in possiveis_nome if c in df.columns), None)
-    col_cpf = next((c for c in possiveis_cpf if c in df.columns), None)
-
-    if col_nome is None:
-        df["NOME_CLIENTE_BASE"] = "NÃO INFORMADO"
-    else:
-        df["NOME_CLIENTE_BASE"] = (
-            df[col_nome].fillna("NÃO INFORMADO").astype(str).str.upper().str.strip()
-        )
-
-    if col_cpf is None:
-        df["CPF_CLIENTE_BASE"] = ""
-    else:
-        df["CPF_CLIENTE_BASE"] = (
-            df[col_cpf]
-            .fillna("")
-            .astype(str)
-            .str.replace(r"\D", "", regex=True)
-        )
-
-    # 👇 NOVO – CHAVE_CLIENTE global (nome + CPF)
-    df["CHAVE_CLIENTE"] = (
-        df["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-        + " | "
-        + df["CPF_CLIENTE_BASE"].fillna("")
-    )
-
-    return df
+    # pipeline compartilhado (DATA BASE, STATUS_BASE com DESISTIU, CHAVE_CLIENTE)
+    return planilha_normalizada("desistencia")
 
 # ---------------------------------------------------------
 # CARREGAR BASE
@@ -220,11 +55,7 @@ if dias_validos.empty and bases_validas.empty:
 # ---------------------------------------------------------
 # NOVO – STATUS FINAL DO CLIENTE (HISTÓRICO COMPLETO)
 # ---------------------------------------------------------
-df_ordenado_global = df.sort_values("DIA")
-status_final_por_cliente = (
-    df_ordenado_global.groupby("CHAVE_CLIENTE")["STATUS_BASE"].last().fillna("")
-)
-status_final_por_cliente.name = "STATUS_FINAL_CLIENTE"
+status_final_por_cliente = status_final_map(df, escopo="ranking")
 
 # ---------------------------------------------------------
 # SIDEBAR – FILTROS (PERÍODO + EQUIPE + TIPO DE VENDA)
@@ -2,6 +2,11 @@ import streamlit as st
 import pandas as pd
 from datetime import timedelta, date
 import numpy as np
+
+from utils.estado_clientes import ultima_linha_por_chave
+from utils.planilha_normalizada import planilha_normalizada
+from utils.presenca_corretores import eventos_presenca, inativos
+
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -37,96 +42,11 @@ st.markdown(
 )
 
 # ---------------------------------------------------------
-# PLANILHA
+# PLANILHA (PIPELINE COMPARTILHADO + DT_BASE)
 # ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
-
-def limpar_para_data(serie: pd.Series) -> pd.Series:
-    dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
-    return dt.dt.date
-
-
-@st.cache_data(ttl=60)
 def carregar_dados() -> pd.DataFrame:
-    df = pd.read_csv(CSV_URL)
-    df.columns = [c.strip().upper() for c in df.columns]
-
-    # DATA / DIA
-    if "DATA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DATA"])
-    elif "DIA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DIA"])
-    else:
-        df["DIA"] = pd.NaT
-
+    df = planilha_normalizada("pendencia")
     df["DT_BASE"] = pd.to_datetime(df["DIA"], errors="coerce")
-
-    # EQUIPE / CORRETOR
-    for col in ["EQUIPE", "CORRETOR"]:
-        if col in df.columns:
-            df[col] = (
-                df[col]
-                .fillna("NÃO INFORMADO")
-                .astype(str)
-                .str.upper()
-                .str.strip()
-            )
-        else:
-            df[col] = "NÃO INFORMADO"
-
-    # STATUS_BASE
-    possiveis_cols_situacao = [
-        "SITUAÇÃO",
-        "SITUAÇÃO ATUAL",
-        "STATUS",
-        "SITUACAO",
-        "SITUACAO ATUAL",
-    ]
-    col_sit = next((c for c in possiveis_cols_situacao if c in df.columns), None)
-
-    df["STATUS_BASE"] = ""
-    if col_sit:
-        status = df[col_sit].fillna("").astype(str).str.upper()
-        df.loc[status.str.contains("EM ANÁLISE"), "STATUS_BASE"] = "EM ANÁLISE"
-        df.loc[status.str.contains("REANÁLISE"), "STATUS_BASE"] = "REANÁLISE"
-        df.loc[status.str.contains("APROV"), "STATUS_BASE"] = "APROVADO"
-        df.loc[status.str.contains("REPROV"), "STATUS_BASE"] = "REPROVADO"
-        df.loc[status.str.contains("VENDA GERADA"), "STATUS_BASE"] = "VENDA GERADA"
-        df.loc[status.str.contains("VENDA INFORMADA"), "STATUS_BASE"] = "VENDA INFORMADA"
-        # mapeia qualquer coisa com PEND como pendência (com ou sem acento)
-        df.loc[status.str.contains("PEND", na=False), "STATUS_BASE"] = "PENDÊNCIA"
-
-    # NOME / CPF BASE
-    possiveis_nome = ["NOME", "CLIENTE", "NOME CLIENTE", "NOME DO CLIENTE"]
-    possiveis_cpf = ["CPF", "CPF CLIENTE", "CPF DO CLIENTE"]
-
-    col_nome = next((c for c in possiveis_nome if c in df.columns), None)
-    col_cpf = next((c for c in possiveis_cpf if c in df.columns), None)
-
-    if col_nome is None:
-        df["NOME_CLIENTE_BASE"] = "NÃO INFORMADO"
-    else:
-        df["NOME_CLIENTE_BASE"] = (
-            df[col_nome]
-            .fillna("NÃO INFORMADO")
-            .astype(str)
-            .str.upper()
-            .str.strip()
-        )
-
-    if col_cpf is None:
-        df["CPF_CLIENTE_BASE"] = ""
-    else:
-        df["CPF_CLIENTE_BASE"] = (
-            df[col_cpf]
-            .fillna("")
-            .astype(str)
-            .str.replace(r"\D", "", regex=True)
-        )
-
     return df
 
 
@@ -178,36 +98,20 @@ else:
             f"Não há análises nos últimos 30 dias (referência: {data_ref.date().strftime('%d/%m/%Y')})."
         )
     else:
-        ultima_analise = (
-            df_analise_30.dropna(subset=["DT_BASE"])
-            .groupby("CORRETOR", as_index=False)["DT_BASE"]
-            .max()
+        df_alert = inativos(
+            eventos_presenca([(df_analise_30, "CORRETOR", "DT_BASE")]),
+            dias_minimos=3,
+            referencia=data_ref,
         )
 
-        registros = []
-        for cor in sorted(df["CORRETOR"].unique()):
-            linha = ultima_analise[ultima_analise["CORRETOR"] == cor]
-            if linha.empty:
-                continue  # não fez análise na janela, não entra no alerta
-
-            ultima_data = linha["DT_BASE"].iloc[0]
-            dias_sem = (data_ref - ultima_data).days
-
-            if dias_sem >= 3:
-                registros.append(
-                    {
-                        "CORRETOR": cor,
-                        "ÚLTIMA ANÁLISE": ultima_data.date().strftime("%d/%m/%Y"),
-                        "DIAS SEM ANÁLISE": dias_sem,
-                    }
-                )
-
-        if not registros:
+        if df_alert.empty:
             st.success("✅ Nenhum corretor está há 3 dias ou mais sem análises na janela dos últimos 30 dias.")
         else:
-            df_alert = pd.DataFrame(registros).sort_values(
-                "DIAS SEM ANÁLISE", ascending=False
-            )
+            df_alert = pd.DataFrame({
+                "CORRETOR": df_alert["CORRETOR"],
+                "ÚLTIMA ANÁLISE": df_alert["ULTIMO_MOVIMENTO"].dt.strftime("%d/%m/%Y"),
+                "DIAS SEM ANÁLISE": df_alert["DIAS_SEM_MOV"].astype(int),
+            })
             st.dataframe(df_alert, use_container_width=True)
 
 # ---------------------------------------------------------
@@ -216,17 +120,9 @@ else:
 st.markdown("---")
 st.markdown("## ⏳ Clientes em pendência há mais de 2 dias")
 
-df["CHAVE_CLIENTE"] = (
-    df["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-    + " | "
-    + df["CPF_CLIENTE_BASE"].fillna("")
-)
-
-df_last = (
-    df.dropna(subset=["DT_BASE"])
-    .sort_values("DT_BASE")
-    .groupby("CHAVE_CLIENTE", as_index=False)
-    .tail(1)
+# CHAVE_CLIENTE já vem do pipeline; última ação de cada cliente por DT_BASE
+df_last = ultima_linha_por_chave(
+    df.dropna(subset=["DT_BASE"]), "CHAVE_CLIENTE", ordem="DT_BASE"
 )
 
 if df_last.empty:
@@ -2,7 +2,16 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, date
-from fpdf import FPDF
+
+from utils.estado_clientes import status_final_map
+from utils.exportar_pdf import botao_download_pdf
+from utils.planilha_normalizada import planilha_normalizada
+from utils.presenca_corretores import (
+    contar_faltas,
+    eventos_presenca,
+    presenca_percentual,
+    ultimo_movimento,
+)
 
 
 if "logado" not in st.session_state or not st.session_state.logado:
@@ -38,157 +47,18 @@ st.caption(
 # ---------------------------------------------------------
 # FUNÇÕES AUXILIARES
 # ---------------------------------------------------------
-def limpar_data(serie: pd.Series) -> pd.Series:
-    dt = pd.to_datetime(serie, errors="coerce", dayfirst=True)
-    return dt.dt.date
-
-
 def format_currency(valor: float) -> str:
     if pd.isna(valor):
         valor = 0
     return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-def limpar_texto_pdf(texto):
-    if pd.isna(texto):
-        return ""
-    return (
-        str(texto)
-        .encode("latin-1", errors="ignore")
-        .decode("latin-1")
-    )
-
-
-def gerar_pdf(df_pdf):
-    pdf = FPDF(orientation="P", unit="mm", format="A4")
-    pdf.set_auto_page_break(auto=True, margin=10)
-
-    linhas_por_pagina = 33
-    col_nome = 70
-    col_tel = 40
-    col_obs = 80
-
-    for i in range(0, len(df_pdf), linhas_por_pagina):
-        pdf.add_page()
-        pdf.set_font("Arial", "B", 10)
-
-        pdf.cell(col_nome, 8, "NOME", border=1)
-        pdf.cell(col_tel, 8, "TELEFONE", border=1)
-        pdf.cell(col_obs, 8, "INFORMAÇÕES", border=1)
-        pdf.ln()
-
-        pdf.set_font("Arial", size=9)
-
-        bloco = df_pdf.iloc[i:i + linhas_por_pagina]
-
-        for _, row in bloco.iterrows():
-            nome = limpar_texto_pdf(row["NOME"])
-            telefone = limpar_texto_pdf(row["TELEFONE"])
-
-            pdf.cell(col_nome, 8, nome[:40], border=1)
-            pdf.cell(col_tel, 8, telefone[:20], border=1)
-            pdf.cell(col_obs, 8, "", border=1)
-            pdf.ln()
-
-    return bytes(pdf.output(dest="S"))
 
 
 # ---------------------------------------------------------
 # BASE PLANILHA (MESMA LÓGICA DO APP PRINCIPAL)
 # ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
-
-@st.cache_data(ttl=300)
 def carregar_planilha():
-    df = pd.read_csv(CSV_URL)
-    df.columns = [c.upper().strip() for c in df.columns]
-
-    # DIA
-    if "DATA" in df.columns:
-        df["DIA"] = limpar_data(df["DATA"])
-    elif "DIA" in df.columns:
-        df["DIA"] = limpar_data(df["DIA"])
-    else:
-        df["DIA"] = pd.NaT
-
-    # CORRETOR / EQUIPE
-    for col in ["EQUIPE", "CORRETOR"]:
-        if col in df.columns:
-            df[col] = (
-                df[col]
-                .fillna("SEM CORRETOR")
-                .astype(str)
-                .str.upper()
-                .str.strip()
-            )
-
-    if "CORRETOR" not in df.columns:
-        df["CORRETOR"] = "SEM CORRETOR"
-
-    # STATUS / SITUAÇÃO
-    possiveis_cols_situacao = [
-        "SITUAÇÃO",
-        "SITUAÇÃO ATUAL",
-        "STATUS",
-        "SITUACAO",
-        "SITUACAO ATUAL",
-    ]
-    col_situacao = next((c for c in possiveis_cols_situacao if c in df.columns), None)
-
-    df["STATUS_BASE"] = ""
-    if col_situacao:
-        s = df[col_situacao].fillna("").astype(str).str.upper()
-
-        df.loc[s.str.contains("EM ANÁLISE"), "STATUS_BASE"] = "EM ANÁLISE"
-        df.loc[s.str.contains("REANÁLISE"), "STATUS_BASE"] = "REANÁLISE"
-        df.loc[s.str.contains("APROV"), "STATUS_BASE"] = "APROVADO"
-        df.loc[s.str.contains("REPROV"), "STATUS_BASE"] = "REPROVADO"
-        df.loc[s.str.contains("VENDA GERADA"), "STATUS_BASE"] = "VENDA GERADA"
-        df.loc[s.str.contains("VENDA INFORMADA"), "STATUS_BASE"] = "VENDA INFORMADA"
-        df.loc[s.str.contains("DESIST"), "STATUS_BASE"] = "DESISTIU"
-
-    # NOME CLIENTE
-    possiveis_nome = ["CLIENTE", "NOME CLIENTE", "NOME DO CLIENTE"]
-    col_nome = next((c for c in possiveis_nome if c in df.columns), None)
-    if col_nome:
-        df["NOME_CLIENTE_BASE"] = (
-            df[col_nome]
-            .fillna("NÃO INFORMADO")
-            .astype(str)
-            .str.upper()
-            .str.strip()
-        )
-    else:
-        df["NOME_CLIENTE_BASE"] = "NÃO INFORMADO"
-
-    # CPF CLIENTE
-    possiveis_cpf = ["CPF", "CPF CLIENTE", "CPF DO CLIENTE"]
-    col_cpf = next((c for c in possiveis_cpf if c in df.columns), None)
-    if col_cpf:
-        df["CPF_CLIENTE_BASE"] = (
-            df[col_cpf]
-            .fillna("")
-            .astype(str)
-            .str.replace(r"\D", "", regex=True)
-        )
-    else:
-        df["CPF_CLIENTE_BASE"] = ""
-
-    # 🔑 CHAVE_CLIENTE global
-    df["CHAVE_CLIENTE"] = (
-        df["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO").astype(str).str.upper().str.strip()
-        + " | "
-        + df["CPF_CLIENTE_BASE"].fillna("").astype(str).str.strip()
-    )
-
-    # VGV
-    if "OBSERVAÇÕES" in df.columns:
-        df["VGV"] = pd.to_numeric(df["OBSERVAÇÕES"], errors="coerce").fillna(0)
-    else:
-        df["VGV"] = 0.0
-
-    return df
+    # pipeline compartilhado; corretor/equipe vazios ficam como "SEM CORRETOR"
+    return planilha_normalizada("desistencia", padrao_corretor="SEM CORRETOR")
 
 
 df_planilha = carregar_planilha()
@@ -196,19 +66,8 @@ if df_planilha.empty:
     st.error("Erro ao carregar a planilha de análises/vendas.")
     st.stop()
 
-# Normaliza STATUS_BASE pra garantir DESISTIU maiúsculo
-df_planilha["STATUS_BASE"] = df_planilha["STATUS_BASE"].fillna("").astype(str).str.upper()
-df_planilha.loc[
-    df_planilha["STATUS_BASE"].str.contains("DESIST", na=False), "STATUS_BASE"
-] = "DESISTIU"
-
 # 🔥 STATUS FINAL GLOBAL POR CLIENTE (regra do DESISTIU)
-df_ordenado_global = df_planilha.sort_values("DIA")
-status_final_por_cliente = (
-    df_ordenado_global.groupby("CHAVE_CLIENTE")["STATUS_BASE"].last().fillna("")
-)
-status_final_por_cliente = status_final_por_cliente.astype(str).str.upper()
-status_final_por_cliente.name = "STATUS_FINAL_CLIENTE"
+status_final_por_cliente = status_final_map(df_planilha, escopo="corretores")
 
 # ---------------------------------------------------------
 # BASE CRM – df_leads DO SESSION_STATE
@@ -571,132 +430,39 @@ st.subheader("4️⃣ Movimento e dias sem ação por corretor")
 
 hoje = date.today()
 
-# ---- Último movimento na planilha (sem groupby.max) ----
-tmp_plan = (
-    df_planilha[df_planilha["CORRETOR"].isin(corretores_ativos)]
-    .dropna(subset=["DIA"])
-    .copy()
-)
-tmp_plan = tmp_plan.sort_values(["CORRETOR", "DIA"])
-df_ult_plan = tmp_plan.drop_duplicates(subset=["CORRETOR"], keep="last")[
-    ["CORRETOR", "DIA"]
-].rename(columns={"DIA": "ULT_MOV_PLAN"})
-
-# ---- Último movimento no CRM (sem groupby.max) ----
-df_leads_val = df_leads[df_leads["CORRETOR_CRM"].isin(corretores_ativos)].copy()
-if not df_leads_val.empty and df_leads_val["ULT_ATIVIDADE_CRM"].notna().any():
-    tmp_crm = df_leads_val.dropna(subset=["ULT_ATIVIDADE_CRM"]).copy()
-    tmp_crm["DATA_ULT"] = tmp_crm["ULT_ATIVIDADE_CRM"].dt.date
-    tmp_crm = tmp_crm.sort_values(["CORRETOR_CRM", "DATA_ULT"])
-    df_ult_crm = tmp_crm.drop_duplicates(
-        subset=["CORRETOR_CRM"], keep="last"
-    )[
-        ["CORRETOR_CRM", "DATA_ULT"]
-    ].rename(
-        columns={
-            "CORRETOR_CRM": "CORRETOR",
-            "DATA_ULT": "ULT_MOV_CRM",
-        }
-    )
-else:
-    df_ult_crm = pd.DataFrame(columns=["CORRETOR", "ULT_MOV_CRM"])
-
-# junta últimos movimentos
-df_ult_mov = pd.merge(
-    pd.DataFrame({"CORRETOR": corretores_ativos}),
-    df_ult_plan,
-    on="CORRETOR",
-    how="left",
-)
-
-df_ult_mov = pd.merge(
-    df_ult_mov,
-    df_ult_crm,
-    on="CORRETOR",
-    how="left",
-)
-
-
-def pick_max(row):
-    datas = []
-    if pd.notna(row.get("ULT_MOV_PLAN")):
-        datas.append(row.get("ULT_MOV_PLAN"))
-    if pd.notna(row.get("ULT_MOV_CRM")):
-        datas.append(row.get("ULT_MOV_CRM"))
-    if not datas:
-        return pd.NaT
-    return max(datas)
+# movimento = qualquer dia com ação na planilha ou no CRM (pares esparsos
+# corretor × dia; sem grade corretor × dia do período)
+df_leads_val = df_leads[df_leads["CORRETOR_CRM"].isin(corretores_ativos)]
 
-
-df_ult_mov["ULTIMO_MOVIMENTO"] = df_ult_mov.apply(pick_max, axis=1)
-df_ult_mov["DIAS_SEM_MOV"] = df_ult_mov["ULTIMO_MOVIMENTO"].apply(
-    lambda d: (hoje - d).days if pd.notna(d) else None
-)
-
-# ---- Presença / dias sem ação por dia ----
-df_pres_plan = (
-    df_plan_periodo[["CORRETOR", "DIA"]].dropna().drop_duplicates().copy()
-)
-df_pres_plan["PRESENTE"] = True
-
-dfs_crm_pres = []
-for col in ["DATA_CAPTURA_DT", "DATA_COM_CORRETOR_DT", "DATA_ULT_INTERACAO_DT"]:
-    if col in df_leads_val.columns:
-        tmp = df_leads_val[
-            (df_leads_val[col].notna())
-            & (df_leads_val[col].dt.date >= data_ini)
-            & (df_leads_val[col].dt.date <= data_fim)
-        ][["CORRETOR_CRM", col]].copy()
-        if not tmp.empty:
-            tmp["DIA"] = tmp[col].dt.date
-            tmp = tmp.rename(columns={"CORRETOR_CRM": "CORRETOR"})
-            dfs_crm_pres.append(tmp[["CORRETOR", "DIA"]])
-
-if dfs_crm_pres:
-    df_pres_crm = pd.concat(dfs_crm_pres, ignore_index=True).drop_duplicates()
-    df_pres_crm["PRESENTE"] = True
-else:
-    df_pres_crm = pd.DataFrame(columns=["CORRETOR", "DIA", "PRESENTE"])
-
-df_presenca = pd.concat(
+eventos_mov = eventos_presenca(
     [
-        df_pres_plan[["CORRETOR", "DIA", "PRESENTE"]],
-        df_pres_crm[["CORRETOR", "DIA", "PRESENTE"]],
+        (df_planilha, "CORRETOR", "DIA"),
+        (df_leads_val, "CORRETOR_CRM", "ULT_ATIVIDADE_CRM"),
     ],
-    ignore_index=True,
-)
-
-df_presenca = df_presenca.drop_duplicates(subset=["CORRETOR", "DIA"])
-
-dias_range = pd.date_range(start=data_ini, end=data_fim, freq="D").date
-grid_index = pd.MultiIndex.from_product(
-    [corretores_ativos, dias_range], names=["CORRETOR", "DIA"]
+    corretores=corretores_ativos,
 )
-df_grid = pd.DataFrame(index=grid_index).reset_index()
-
-df_grid = df_grid.merge(
-    df_presenca, on=["CORRETOR", "DIA"], how="left"
-)
-df_grid["PRESENTE"] = df_grid["PRESENTE"].fillna(False)
-df_grid["FALTA"] = ~df_grid["PRESENTE"]
-
-df_faltas = (
-    df_grid.groupby("CORRETOR", dropna=False)["FALTA"]
-    .sum()
-    .reset_index()
-    .rename(columns={"FALTA": "FALTAS"})
+df_ult_mov = ultimo_movimento(eventos_mov, referencia=hoje, corretores=corretores_ativos)
+
+# ---- Presença / dias sem ação no período ----
+eventos_periodo = eventos_presenca(
+    [(df_plan_periodo, "CORRETOR", "DIA")]
+    + [
+        (df_leads_val, "CORRETOR_CRM", col)
+        for col in ["DATA_CAPTURA_DT", "DATA_COM_CORRETOR_DT", "DATA_ULT_INTERACAO_DT"]
+    ],
+    corretores=corretores_ativos,
 )
-df_faltas["TOTAL_DIAS"] = len(dias_range)
+df_faltas = contar_faltas(eventos_periodo, data_ini, data_fim, corretores=corretores_ativos)
 
 df_movimento = pd.merge(
     df_ult_mov[["CORRETOR", "ULTIMO_MOVIMENTO", "DIAS_SEM_MOV"]],
-    df_faltas,
+    df_faltas[["CORRETOR", "FALTAS", "TOTAL_DIAS"]],
     on="CORRETOR",
     how="left",
 ).fillna({"FALTAS": 0, "TOTAL_DIAS": 0})
 
-df_movimento["ULTIMO_MOVIMENTO_STR"] = df_movimento["ULTIMO_MOVIMENTO"].apply(
-    lambda d: d.strftime("%d/%m/%Y") if pd.notna(d) else "-"
+df_movimento["ULTIMO_MOVIMENTO_STR"] = (
+    df_movimento["ULTIMO_MOVIMENTO"].dt.strftime("%d/%m/%Y").fillna("-")
 )
 
 st.dataframe(
@@ -744,15 +510,9 @@ df_exibe["Taxa vendas/aprovações (%)"] = df_exibe["TAXA_VENDA_APROV"].round(1)
 
 df_exibe["Dias sem ação"] = df_exibe["FALTAS"].fillna(0).astype(int)
 
-df_exibe["Presença (%)"] = np.where(
-    df_exibe["TOTAL_DIAS"] > 0,
-    (df_exibe["TOTAL_DIAS"] - df_exibe["FALTAS"]) / df_exibe["TOTAL_DIAS"] * 100,
-    np.nan,
-).round(1)
+df_exibe["Presença (%)"] = presenca_percentual(df_exibe)
 
-df_exibe["Último movimento"] = df_exibe["ULTIMO_MOVIMENTO"].apply(
-    lambda d: d.strftime("%d/%m/%Y") if pd.notna(d) else "-"
-)
+df_exibe["Último movimento"] = df_exibe["ULTIMO_MOVIMENTO"].dt.strftime("%d/%m/%Y").fillna("-")
 df_exibe["Dias sem movimento"] = df_exibe["DIAS_SEM_MOV"].apply(
     lambda x: int(x) if pd.notna(x) else "-"
 )
@@ -834,13 +594,11 @@ if corretor_sel:
                 "INFORMAÇÕES": ""
             })
 
-            pdf_bytes = gerar_pdf(df_pdf)
-
-            st.download_button(
-                label="📄 Gerar PDF de Leads",
-                data=pdf_bytes,
+            botao_download_pdf(
+                df_pdf,
                 file_name=f"leads_{corretor_sel.replace(' ', '_')}.pdf",
-                mime="application/pdf",
+                label="⬇️ Baixar PDF de Leads",
+                label_gerar="📄 Gerar PDF de Leads",
             )
 
  
@@ -873,13 +631,12 @@ if corretor_sel:
             })
 
             titulo_pdf = f"LEADS - {corretor_sel} ({data_ini.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')})"
-            pdf_buffer = gerar_pdf_leads_tabela(df_pdf, titulo_pdf)
-
-            st.download_button(
-                "Gerar PDF de Leads",
-                data=pdf_buffer,
+            botao_download_pdf(
+                df_pdf,
                 file_name=f"leads_{corretor_sel.replace(' ', '_')}_{data_ini.strftime('%d%m%Y')}_{data_fim.strftime('%d%m%Y')}.pdf",
-                mime="application/pdf",
+                label="⬇️ Baixar PDF de Leads do período",
+                label_gerar="Gerar PDF de Leads",
+                titulo=titulo_pdf,
             )
 
     c5, c6, c7 = st.columns(3)
@@ -1,7 +1,15 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+from datetime import date, timedelta
+
+from utils.metricas_leads import (
+    SLA_MINUTOS,
+    leads_do_periodo,
+    metricas_por,
+    metricas_por_dia,
+    resumo_atendimento,
+)
+
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -27,180 +35,107 @@ st.title("📞 Controle de Atendimento de Leads")
 st.caption("Visão simples do atendimento: leads atendidos, não atendidos, tempo e leads novos.")
 
 # ---------------------------------------------------------
-# CARREGANDO DF DE LEADS
-# ---------------------------------------------------------
-if "df_leads" not in st.session_state or st.session_state["df_leads"] is None:
-    st.error("Nenhum dado carregado. Volte para a tela inicial.")
-    st.stop()
-
-df_raw = st.session_state["df_leads"].copy()
-
-# ---------------------------------------------------------
-# FUNÇÃO DE BUSCA INTELIGENTE DE COLUNAS
-# ---------------------------------------------------------
-def get_col(possiveis_nomes):
-    cols_lower = {c.lower(): c for c in df_raw.columns}
-    for nome in possiveis_nomes:
-        nome_lower = nome.lower()
-        for base, real in cols_lower.items():
-            if nome_lower in base:
-                return real
-    return None
-
-# ---------------------------------------------------------
-# NORMALIZAÇÃO DAS COLUNAS
-# ---------------------------------------------------------
-df = df_raw.copy()
-
-# Nome lead
-col_nome_lead = get_col(["nome_pessoa", "nome", "lead"])
-df["NOME_LEAD"] = df[col_nome_lead].astype(str) if col_nome_lead else ""
-
-# Telefone
-col_tel = get_col(["telefone", "telefone_pessoa", "whatsapp"])
-df["TELEFONE_LEAD"] = df[col_tel].astype(str) if col_tel else ""
-
-# Corretor ---------- CORREÇÃO AQUI 🔥
-col_corretor = get_col([
-    "nome_corretor",     # nome exato da API
-    "corretor",
-    "responsavel",
-    "responsável",
-    "consultor",
-    "usuario",
-    "usuário"
-])
-
-if col_corretor:
-    df["CORRETOR_EXIBICAO"] = df[col_corretor].fillna("").astype(str)
-else:
-    df["CORRETOR_EXIBICAO"] = ""
-
-df["Corretor responsável"] = df["CORRETOR_EXIBICAO"]
-
-# Situação
-col_situacao = get_col(["nome_situacao", "situacao", "situação"])
-
-# Etapa
-col_etapa = get_col(["status", "etapa", "fase"])
-
-# Datas
-col_data_captura = get_col(["data_captura"])
-df["DATA_CAPTURA_DT"] = pd.to_datetime(df[col_data_captura], errors="coerce") if col_data_captura else pd.NaT
-
-col_data_primeiro = get_col(["data_com_corretor", "data_qualificando"])
-df["DATA_COM_CORRETOR_DT"] = pd.to_datetime(df[col_data_primeiro], errors="coerce") if col_data_primeiro else pd.NaT
-
-col_data_ultima = get_col(["data_ultima_interacao"])
-df["DATA_ULT_INTERACAO_DT"] = pd.to_datetime(df[col_data_ultima], errors="coerce") if col_data_ultima else pd.NaT
-
-# Perdido
-df["PERDIDO"] = False
-if col_situacao:
-    df["PERDIDO"] = df[col_situacao].astype(str).str.upper().str.contains("PERD")
-
-# Atendido
-df["ATENDIDO"] = df["DATA_COM_CORRETOR_DT"].notna()
-
-# Tempo atendimento
-df["TEMPO_ATEND_MIN"] = (
-    (df["DATA_COM_CORRETOR_DT"] - df["DATA_CAPTURA_DT"]).dt.total_seconds() / 60
-)
-
-# Tempo interações
-df["TEMPO_INTERACOES_MIN"] = (
-    (df["DATA_ULT_INTERACAO_DT"] - df["DATA_COM_CORRETOR_DT"]).dt.total_seconds() / 60
-)
-
-def fmt_dt(dt):
-    return "" if pd.isna(dt) else dt.strftime("%d/%m/%Y %H:%M")
-
-def fmt_min(x):
-    if pd.isna(x): return "-"
-    x = int(x)
-    return f"{x//60}h {x%60}min" if x >= 60 else f"{x} min"
-
-# ---------------------------------------------------------
-# FILTROS
+# FILTROS / LEADS DO PERÍODO (TABELA LOCAL DO CRM)
 # ---------------------------------------------------------
 st.sidebar.header("Filtros")
 
-data_min = df["DATA_CAPTURA_DT"].min()
-data_max = df["DATA_CAPTURA_DT"].max()
-
-data_ini = st.sidebar.date_input("Data inicial", value=data_max.date() - timedelta(days=7))
-data_fim = st.sidebar.date_input("Data final", value=data_max.date())
+hoje = date.today()
+data_ini = st.sidebar.date_input("Data inicial", value=hoje - timedelta(days=7))
+data_fim = st.sidebar.date_input("Data final", value=hoje)
 
-mask = (df["DATA_CAPTURA_DT"].dt.date >= data_ini) & (df["DATA_CAPTURA_DT"].dt.date <= data_fim)
-df_periodo = df[mask].copy()
+df_periodo = leads_do_periodo(data_ini, data_fim)
 
 # filtro corretor
-corretores = sorted(df_periodo["Corretor responsável"].unique().tolist())
+corretores = sorted(df_periodo["CORRETOR"].unique().tolist())
 sel = st.sidebar.selectbox("Corretor", ["Todos"] + corretores)
 
 if sel != "Todos":
-    df_periodo = df_periodo[df_periodo["Corretor responsável"] == sel]
+    df_periodo = df_periodo[df_periodo["CORRETOR"] == sel]
 
 if df_periodo.empty:
     st.warning("Nenhum lead encontrado no período.")
     st.stop()
 
-# ---------------------------------------------------------
-# KPIs
-# ---------------------------------------------------------
-leads = len(df_periodo)
-atendidos = df_periodo["ATENDIDO"].sum()
-nao_atendidos = leads - atendidos
-perdidos = df_periodo["PERDIDO"].sum()
+# formatação só na exibição (column_config), sem montar texto por linha
+FMT_DATA = "DD/MM/YYYY HH:mm"
+COLUNAS_TABELA = {
+    "NOME_LEAD": st.column_config.TextColumn("Lead"),
+    "TELEFONE_LEAD": st.column_config.TextColumn("Telefone"),
+    "CORRETOR": st.column_config.TextColumn("Corretor responsável"),
+    "DATA_CAPTURA_DT": st.column_config.DatetimeColumn("Captura", format=FMT_DATA),
+    "DATA_COM_CORRETOR_DT": st.column_config.DatetimeColumn("1º contato", format=FMT_DATA),
+    "DATA_ULT_INTERACAO_DT": st.column_config.DatetimeColumn("Última interação", format=FMT_DATA),
+    "TEMPO_ATEND_MIN": st.column_config.NumberColumn("Tempo atendimento", format="%.0f min"),
+    "DIA": st.column_config.DateColumn("Dia", format="DD/MM/YYYY"),
+    "LEADS": st.column_config.NumberColumn("Leads"),
+    "ATENDIDOS": st.column_config.NumberColumn("Atendidos"),
+    "PCT_SLA": st.column_config.NumberColumn(f"% até {SLA_MINUTOS} min", format="%.1f%%"),
+    "ATEND_MEDIA": st.column_config.NumberColumn("Atendimento (média)", format="%.0f min"),
+    "ATEND_P50": st.column_config.NumberColumn("Atendimento (mediana)", format="%.0f min"),
+    "ATEND_P90": st.column_config.NumberColumn("Atendimento (p90)", format="%.0f min"),
+    "INTERACOES_MEDIA": st.column_config.NumberColumn("Interações (média)", format="%.0f min"),
+    "INTERACOES_P50": st.column_config.NumberColumn("Interações (mediana)", format="%.0f min"),
+    "INTERACOES_P90": st.column_config.NumberColumn("Interações (p90)", format="%.0f min"),
+}
+
+
+def tabela(df, colunas):
+    st.dataframe(
+        df[colunas],
+        use_container_width=True,
+        hide_index=True,
+        column_config={c: COLUNAS_TABELA[c] for c in colunas if c in COLUNAS_TABELA},
+    )
 
-tempo_med = df_periodo.loc[df_periodo["ATENDIDO"], "TEMPO_ATEND_MIN"].mean()
 
-# leads novos
-df_novos = df_periodo[(~df_periodo["ATENDIDO"]) & (~df_periodo["PERDIDO"])]
-qtd_novos = len(df_novos)
+def fmt_min(x):
+    if pd.isna(x): return "-"
+    x = int(x)
+    return f"{x//60}h {x%60}min" if x >= 60 else f"{x} min"
 
-# % até 15 minutos
-pct_15 = (df_periodo["TEMPO_ATEND_MIN"] <= 15).sum() / atendidos * 100 if atendidos else 0
+# ---------------------------------------------------------
+# KPIs
+# ---------------------------------------------------------
+resumo = resumo_atendimento(df_periodo)
 
-# cards
 c1, c2, c3, c4, c5, c6, c7 = st.columns(7)
-c1.metric("Leads no período", leads)
-c2.metric("Atendidos", atendidos)
-c3.metric("Não atendidos", nao_atendidos)
-c4.metric("Perdidos", perdidos)
-c5.metric("Tempo médio atendimento", fmt_min(tempo_med) if not pd.isna(tempo_med) else "-")
-c6.metric("Leads novos", qtd_novos)
-c7.metric("% até 15 min", f"{pct_15:.1f}%")
+c1.metric("Leads no período", resumo["LEADS"])
+c2.metric("Atendidos", resumo["ATENDIDOS"])
+c3.metric("Não atendidos", resumo["NAO_ATENDIDOS"])
+c4.metric("Perdidos", resumo["PERDIDOS"])
+c5.metric(
+    "Tempo médio atendimento",
+    fmt_min(resumo["ATEND_MEDIA"]),
+    help=f"Mediana: {fmt_min(resumo['ATEND_P50'])} · p90: {fmt_min(resumo['ATEND_P90'])}",
+)
+c6.metric("Leads novos", resumo["NOVOS"])
+c7.metric(f"% até {SLA_MINUTOS} min", f"{resumo['PCT_SLA']:.1f}%")
 
 # ---------------------------------------------------------
 # LEADS NOVOS
 # ---------------------------------------------------------
+df_novos = df_periodo[(~df_periodo["ATENDIDO"]) & (~df_periodo["PERDIDO"])]
+
 st.markdown("### 📥 Leads novos (não atendidos + não perdidos)")
-if qtd_novos == 0:
+if df_novos.empty:
     st.info("Nenhum lead novo encontrado.")
 else:
-    df_temp = df_novos.copy()
-    df_temp["Captura"] = df_temp["DATA_CAPTURA_DT"].apply(fmt_dt)
-    st.dataframe(df_temp[["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável", "Captura"]])
+    tabela(df_novos, ["NOME_LEAD", "TELEFONE_LEAD", "CORRETOR", "DATA_CAPTURA_DT"])
 
 # ---------------------------------------------------------
-# RESUMO POR CORRETOR
+# RESUMO POR CORRETOR / POR DIA
 # ---------------------------------------------------------
 st.markdown("## 👥 Resumo geral por corretor")
+tabela(
+    metricas_por(df_periodo, "CORRETOR"),
+    ["CORRETOR", "LEADS", "ATENDIDOS", "PCT_SLA", "ATEND_MEDIA", "ATEND_P50", "ATEND_P90",
+     "INTERACOES_MEDIA", "INTERACOES_P50", "INTERACOES_P90"],
+)
 
-agr = df_periodo.groupby("Corretor responsável").agg(
-    LEADS=("NOME_LEAD", "count"),
-    ATENDIDOS=("ATENDIDO", "sum"),
-    TM_ATEND_MIN=("TEMPO_ATEND_MIN", "mean"),
-    TM_INTERACOES_MIN=("TEMPO_INTERACOES_MIN", "mean")
-).reset_index()
-
-agr["Tempo atendimento"] = agr["TM_ATEND_MIN"].apply(fmt_min)
-agr["Tempo interações"] = agr["TM_INTERACOES_MIN"].apply(fmt_min)
-
-st.dataframe(
-    agr[["Corretor responsável", "LEADS", "ATENDIDOS", "Tempo atendimento", "Tempo interações"]],
-    use_container_width=True
+st.markdown("## 📅 Atendimento por dia de captura")
+tabela(
+    metricas_por_dia(df_periodo),
+    ["DIA", "LEADS", "ATENDIDOS", "PCT_SLA", "ATEND_MEDIA", "ATEND_P50", "ATEND_P90"],
 )
 
 # ---------------------------------------------------------
@@ -212,26 +147,19 @@ aba1, aba2, aba3 = st.tabs(["Atendidos", "Não atendidos", "Apenas 1 contato"])
 
 # --- Atendidos
 with aba1:
-    df_at = df_periodo[df_periodo["ATENDIDO"] & (~df_periodo["PERDIDO"])].copy()
+    df_at = df_periodo[df_periodo["ATENDIDO"] & (~df_periodo["PERDIDO"])]
     if df_at.empty:
         st.info("Nenhum lead atendido.")
     else:
-        df_at["Captura"] = df_at["DATA_CAPTURA_DT"].apply(fmt_dt)
-        df_at["1º contato"] = df_at["DATA_COM_CORRETOR_DT"].apply(fmt_dt)
-        df_at["Última interação"] = df_at["DATA_ULT_INTERACAO_DT"].apply(fmt_dt)
-        df_at["Tempo atendimento"] = df_at["TEMPO_ATEND_MIN"].apply(fmt_min)
-
-        cols = ["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável", "Captura", "1º contato", "Última interação", "Tempo atendimento"]
-        st.dataframe(df_at[cols], use_container_width=True)
+        tabela(df_at, ["NOME_LEAD", "TELEFONE_LEAD", "CORRETOR", "DATA_CAPTURA_DT",
+                       "DATA_COM_CORRETOR_DT", "DATA_ULT_INTERACAO_DT", "TEMPO_ATEND_MIN"])
 
 # --- Não atendidos
 with aba2:
-    df_na = df_periodo[(~df_periodo["ATENDIDO"]) & (~df_periodo["PERDIDO"])].copy()
-    if df_na.empty:
+    if df_novos.empty:
         st.info("Nenhum lead não atendido.")
     else:
-        df_na["Captura"] = df_na["DATA_CAPTURA_DT"].apply(fmt_dt)
-        st.dataframe(df_na[["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável", "Captura"]], use_container_width=True)
+        tabela(df_novos, ["NOME_LEAD", "TELEFONE_LEAD", "CORRETOR", "DATA_CAPTURA_DT"])
 
 # --- Apenas 1 contato
 with aba3:
@@ -239,11 +167,9 @@ with aba3:
         (df_periodo["ATENDIDO"]) &
         (df_periodo["DATA_ULT_INTERACAO_DT"].isna()) &
         (~df_periodo["PERDIDO"])
-    ].copy()
+    ]
 
     if df_1.empty:
         st.info("Nenhum lead com apenas 1 contato.")
     else:
-        df_1["Captura"] = df_1["DATA_CAPTURA_DT"].apply(fmt_dt)
-        df_1["1º contato"] = df_1["DATA_COM_CORRETOR_DT"].apply(fmt_dt)
-        st.dataframe(df_1[["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável", "Captura", "1º contato"]], use_container_width=True)
+        tabela(df_1, ["NOME_LEAD", "TELEFONE_LEAD", "CORRETOR", "DATA_CAPTURA_DT", "DATA_COM_CORRETOR_DT"])
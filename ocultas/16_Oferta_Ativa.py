@@ -2,8 +2,6 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import requests
-from fpdf import FPDF
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -14,7 +12,8 @@ if st.session_state.get("perfil") == "corretor":
     st.warning("🔒 Você não tem permissão para acessar esta página.")
     st.stop()
 
-from utils.supremo_config import TOKEN_SUPREMO
+from utils.exportar_pdf import botao_download_pdf
+from utils.supremo_client import carregar_leads
 
 # ---------------------------------------------------------
 # CONFIGURAÇÃO DA PÁGINA
@@ -31,35 +30,13 @@ st.caption("Base limpa de leads do CRM, pronta para contato ativo.")
 # ---------------------------------------------------------
 # FUNÇÃO – BUSCAR LEADS NO SUPREMO CRM
 # ---------------------------------------------------------
-@st.cache_data(ttl=1800)
 def carregar_leads_oferta(limit=3000, max_pages=200):
-    url = "https://api.supremocrm.com.br/v1/leads"
-    headers = {"Authorization": f"Bearer {TOKEN_SUPREMO}"}
-
-    dados = []
-    pagina = 1
-
-    while pagina <= max_pages and len(dados) < limit:
-        resp = requests.get(
-            url,
-            headers=headers,
-            params={"pagina": pagina},
-            timeout=30,
-        )
-        if resp.status_code != 200:
-            break
-
-        js = resp.json()
-        if not js.get("data"):
-            break
-
-        dados.extend(js["data"])
-        pagina += 1
-
-    if not dados:
+    dados = carregar_leads(limit=limit, ttl=60, revalidar_s=6 * 3600, max_pages=max_pages)
+
+    if dados.empty:
         return pd.DataFrame()
 
-    df = pd.DataFrame(dados).drop_duplicates(subset=["id"])
+    df = dados.drop_duplicates(subset=["id"])
 
     # Normalização
     df["NOME"] = df.get("nome_pessoa", "").fillna("").astype(str).str.upper().str.strip()
@@ -159,60 +136,11 @@ st.dataframe(tabela, use_container_width=True)
 # ---------------------------------------------------------
 # PDF
 # ---------------------------------------------------------
-def limpar_texto_pdf(texto):
-    if pd.isna(texto):
-        return ""
-    return (
-        str(texto)
-        .encode("latin-1", errors="ignore")
-        .decode("latin-1")
-    )
-
-def gerar_pdf(df_pdf):
-    pdf = FPDF(orientation="P", unit="mm", format="A4")
-    pdf.set_auto_page_break(auto=True, margin=10)
-
-    # 🔧 AJUSTE AQUI
-    linhas_por_pagina = 33  # máximo 33 linhas por página
-
-    col_nome = 70
-    col_tel = 40
-    col_obs = 80
-
-    for i in range(0, len(df_pdf), linhas_por_pagina):
-        pdf.add_page()
-        pdf.set_font("Arial", "B", 10)
-
-        pdf.cell(col_nome, 8, "NOME", border=1)
-        pdf.cell(col_tel, 8, "TELEFONE", border=1)
-        pdf.cell(col_obs, 8, "INFORMAÇÕES", border=1)
-        pdf.ln()
-
-        pdf.set_font("Arial", size=9)
-
-        bloco = df_pdf.iloc[i:i + linhas_por_pagina]
-
-        for _, row in bloco.iterrows():
-            nome = limpar_texto_pdf(row["NOME"])
-            telefone = limpar_texto_pdf(row["TELEFONE"])
-
-            pdf.cell(col_nome, 8, nome[:40], border=1)
-            pdf.cell(col_tel, 8, telefone[:20], border=1)
-            pdf.cell(col_obs, 8, "", border=1)
-            pdf.ln()
-
-    return bytes(pdf.output(dest="S"))
-
-
-
-
 st.divider()
 
-if st.button("📄 Gerar PDF para Oferta Ativa"):
-    pdf_bytes = gerar_pdf(df[["NOME", "TELEFONE"]])
-    st.download_button(
-        "⬇️ Baixar PDF",
-        data=pdf_bytes,
-        file_name="oferta_ativa_leads.pdf",
-        mime="application/pdf",
-    )
+botao_download_pdf(
+    df[["NOME", "TELEFONE"]],
+    file_name="oferta_ativa_leads.pdf",
+    label="📄 Baixar PDF para Oferta Ativa",
+    label_gerar="🧾 Gerar PDF para Oferta Ativa",
+)
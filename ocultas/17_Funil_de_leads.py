@@ -4,9 +4,10 @@
 
 import streamlit as st
 import pandas as pd
-import requests
-from datetime import date
-from utils.supremo_config import TOKEN_SUPREMO
+from utils.commercial_repository import normalize_text
+from utils.data_loader import GID_ANALISES, baixar_csv
+from utils.planilha_normalizada import COLS_CPF, mes_ano_ptbr_para_datetime
+from utils.supremo_client import indice_origem_clientes
 
 # =========================================================
 # BLOQUEIO DE LOGIN (IGUAL PÁGINA 03)
@@ -41,45 +42,21 @@ st.title("📊 FUNIL DE LEADS – Conversão por Origem")
 # =========================================================
 # PLANILHA
 # =========================================================
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID}"
+GID = GID_ANALISES
 
 # =========================================================
 # UTILIDADES
 # =========================================================
-MESES = {
-    "JANEIRO": 1, "FEVEREIRO": 2, "MARÇO": 3, "MARCO": 3,
-    "ABRIL": 4, "MAIO": 5, "JUNHO": 6, "JULHO": 7,
-    "AGOSTO": 8, "SETEMBRO": 9, "OUTUBRO": 10,
-    "NOVEMBRO": 11, "DEZEMBRO": 12,
-}
-
 def parse_data(col):
     return pd.to_datetime(col, dayfirst=True, errors="coerce")
 
-def parse_data_base(label):
-    if pd.isna(label):
-        return pd.NaT
-    p = str(label).upper().split()
-    if len(p) < 2:
-        return pd.NaT
-    mes = MESES.get(p[0])
-    try:
-        ano = int(p[-1])
-    except:
-        return pd.NaT
-    if not mes:
-        return pd.NaT
-    return date(ano, mes, 1)
-
 # =========================================================
 # CARGA PLANILHA
 # =========================================================
 @st.cache_data(ttl=300)
 def carregar_planilha():
-    df = pd.read_csv(CSV_URL, dtype=str)
-    df.columns = df.columns.str.upper().str.strip()
+    # download condicional: sem edição na planilha, não relê o CSV
+    df = baixar_csv(GID, dtype=str).copy()
 
     for col in ["CLIENTE", "CORRETOR", "EQUIPE", "SITUAÇÃO", "DATA", "ORIGEM"]:
         if col not in df.columns:
@@ -89,7 +66,7 @@ def carregar_planilha():
     df = df.dropna(subset=["DATA"])
 
     df["DATA_BASE_LABEL"] = df.get("DATA BASE", "").astype(str).str.strip()
-    df["DATA_BASE_DATE"] = df["DATA_BASE_LABEL"].apply(parse_data_base)
+    df["DATA_BASE_DATE"] = mes_ano_ptbr_para_datetime(df["DATA_BASE_LABEL"]).dt.date
 
     for col in ["CLIENTE", "CORRETOR", "EQUIPE", "ORIGEM"]:
         df[col] = (
@@ -100,6 +77,14 @@ def carregar_planilha():
             .str.strip()
         )
 
+    # chaves de cruzamento com o CRM: nome sem acento/espaços extras e CPF
+    nomes = df["CLIENTE"].unique()
+    df["NOME_KEY"] = df["CLIENTE"].map(dict(zip(nomes, map(normalize_text, nomes))))
+    col_cpf = next((c for c in COLS_CPF if c in df.columns), None)
+    df["CPF_KEY"] = (
+        df[col_cpf].fillna("").astype(str).str.replace(r"\D", "", regex=True) if col_cpf else ""
+    )
+
     df["STATUS_RAW"] = df["SITUAÇÃO"].astype(str).str.upper().str.strip()
     df["STATUS_BASE"] = ""
 
@@ -120,53 +105,17 @@ def carregar_planilha():
 
     return df[df["STATUS_BASE"] != ""]
 
-# =========================================================
-# CARGA CRM – ORIGEM (LIMITADO / SEGURO)
-# =========================================================
-@st.cache_data(ttl=1800)
-def carregar_crm():
-    url = "https://api.supremocrm.com.br/v1/leads"
-    headers = {"Authorization": f"Bearer {TOKEN_SUPREMO}"}
-
-    dados, pagina = [], 1
-    LIMITE = 300
-
-    try:
-        while len(dados) < LIMITE:
-            r = requests.get(
-                url,
-                headers=headers,
-                params={"pagina": pagina},
-                timeout=30
-            )
-            if r.status_code != 200:
-                break
-
-            js = r.json()
-            if not js.get("data"):
-                break
-
-            dados.extend(js["data"])
-            pagina += 1
-
-    except requests.exceptions.RequestException:
-        return pd.DataFrame(columns=["CLIENTE", "ORIGEM_CRM"])
-
-    dados = dados[:LIMITE]
-
-    df = pd.DataFrame(dados)
-    df["CLIENTE"] = df.get("nome_pessoa", "").astype(str).str.upper().str.strip()
-    df["ORIGEM_CRM"] = df.get("nome_origem", "").fillna("").astype(str).str.upper().str.strip()
-
-    return df[["CLIENTE", "ORIGEM_CRM"]]
-
 # =========================================================
 # DATASET FINAL
 # =========================================================
+# Origem pelo histórico inteiro do CRM (índice local, atualizado de forma
+# incremental): primeiro pelo CPF, depois pelo nome normalizado.
 df_hist = carregar_planilha()
-df_crm = carregar_crm()
+indice_crm = indice_origem_clientes()
 
-df_hist = df_hist.merge(df_crm, on="CLIENTE", how="left")
+origem_crm = df_hist["CPF_KEY"].where(df_hist["CPF_KEY"].str.len() == 11).map(indice_crm["cpf"])
+origem_crm = origem_crm.fillna(df_hist["NOME_KEY"].map(indice_crm["nome"]))
+df_hist["ORIGEM_CRM"] = origem_crm
 
 df_hist["ORIGEM"] = df_hist["ORIGEM"].where(
     df_hist["ORIGEM"] != "",
@@ -194,7 +143,12 @@ if modo == "DIA":
         (df_f["DATA"].dt.date <= fim)
     ]
 else:
-    bases = sorted(df_f["DATA_BASE_LABEL"].dropna().unique(), key=parse_data_base)
+    bases = (
+        df_f.sort_values("DATA_BASE_DATE", na_position="last")["DATA_BASE_LABEL"]
+        .dropna()
+        .unique()
+        .tolist()
+    )
     sel = st.sidebar.multiselect("Data Base", bases, default=bases)
     if sel:
         df_f = df_f[df_f["DATA_BASE_LABEL"].isin(sel)]
@@ -9,13 +9,12 @@
 
 import streamlit as st
 import pandas as pd
-import requests
 import unicodedata
 from datetime import datetime, timedelta
 
 from streamlit_autorefresh import st_autorefresh
-from utils.supremo_config import TOKEN_SUPREMO
-from app_dashboard import carregar_dados_planilha
+from utils.data_loader import carregar_dados_planilha, versao_dados
+from utils.supremo_client import carregar_leads
 
 # =========================================================
 # TRAVA DE LOGIN
@@ -46,11 +45,9 @@ st_autorefresh(interval=30 * 1000, key="auto_refresh_pre_cadastro_18")
 # =========================================================
 # CONFIGURAÇÕES
 # =========================================================
-API_URL = "https://api.supremocrm.com.br/v1/leads"
-HEADERS = {"Authorization": f"Bearer {TOKEN_SUPREMO}"}
-
 SITUACAO_ALVO = "ANALISE PENDENTE"
 DIAS_JANELA_CRM = 7
+REVALIDAR_CRM_S = 120  # situação dos leads da janela relida a cada 2 min
 LIMITE_REANALISE = 60
 
 # =========================================================
@@ -66,66 +63,55 @@ def normalizar(txt):
 # =========================================================
 # CARGA CRM (ÚLTIMOS 7 DIAS)
 # =========================================================
-@st.cache_data(ttl=30)
 def carregar_leads_crm():
-    dados = []
-    pagina = 1
     data_limite = datetime.now() - timedelta(days=DIAS_JANELA_CRM)
+    df = carregar_leads(since=data_limite, ttl=30, revalidar_s=REVALIDAR_CRM_S)
+    if df.empty:
+        return df
 
-    while True:
-        r = requests.get(
-            API_URL,
-            headers=HEADERS,
-            params={"pagina": pagina},
-            timeout=20
-        )
-
-        if r.status_code != 200:
-            break
-
-        js = r.json()
-        if not js.get("data"):
-            break
+    data_captura = pd.to_datetime(df["data_captura"], errors="coerce")
+    return df[data_captura.notna()].reset_index(drop=True)
 
-        for lead in js["data"]:
-            data_captura = pd.to_datetime(lead.get("data_captura"), errors="coerce")
-            if pd.isna(data_captura):
-                continue
+# =========================================================
+# ÍNDICE (CLIENTE, CORRETOR) -> ÚLTIMA ANÁLISE
+# =========================================================
+# Montado uma vez por versão da planilha; a cada recarga (30 s) a
+# classificação vira um merge dos leads com esse índice, em vez de varrer a
+# planilha inteira para cada lead.
+def normalizar_coluna(serie):
+    unicos = pd.unique(serie)
+    return serie.map(dict(zip(unicos, map(normalizar, unicos))))
 
-            if data_captura < data_limite:
-                return pd.DataFrame(dados)
 
-            dados.append(lead)
+@st.cache_data(max_entries=4, show_spinner=False)
+def indice_ultima_analise(versao, _df_plan):
+    plan = pd.DataFrame({
+        "CLIENTE_KEY": normalizar_coluna(_df_plan["CLIENTE"]),
+        "CORRETOR_KEY": normalizar_coluna(_df_plan["CORRETOR"]),
+    })
 
-        pagina += 1
+    # DATA DA ANÁLISE (COLUNA A – BR)
+    data = _df_plan["DATA"].astype(str).str.strip()
+    dt1 = pd.to_datetime(data, errors="coerce", dayfirst=True)
+    dt2 = pd.to_datetime(data, errors="coerce")
+    plan["ULTIMA_ANALISE"] = dt1.fillna(dt2)
 
-    return pd.DataFrame(dados)
+    return (
+        plan.dropna(subset=["ULTIMA_ANALISE"])
+        .groupby(["CLIENTE_KEY", "CORRETOR_KEY"], as_index=False)["ULTIMA_ANALISE"]
+        .max()
+    )
 
 # =========================================================
 # LOAD DADOS
 # =========================================================
 df_leads = carregar_leads_crm()
-df_plan = carregar_dados_planilha()
+df_plan = carregar_dados_planilha(colunas=["DATA", "CLIENTE", "CORRETOR"])
 
 if df_leads.empty:
     st.success("🎉 Nenhuma análise pendente no momento.")
     st.stop()
 
-# =========================================================
-# NORMALIZA CHAVES
-# =========================================================
-df_leads["CLIENTE_KEY"] = df_leads["nome_pessoa"].apply(normalizar)
-df_leads["CORRETOR_KEY"] = df_leads["nome_corretor"].apply(normalizar)
-
-df_plan["CLIENTE_KEY"] = df_plan["CLIENTE"].apply(normalizar)
-df_plan["CORRETOR_KEY"] = df_plan["CORRETOR"].apply(normalizar)
-
-# DATA DA ANÁLISE (COLUNA A – BR)
-df_plan["DATA"] = df_plan["DATA"].astype(str).str.strip()
-dt1 = pd.to_datetime(df_plan["DATA"], errors="coerce", dayfirst=True)
-dt2 = pd.to_datetime(df_plan["DATA"], errors="coerce")
-df_plan["DATA"] = dt1.fillna(dt2)
-
 # =========================================================
 # FILTRO – ANÁLISE PENDENTE
 # =========================================================
@@ -136,23 +122,15 @@ df = df_leads[
 # =========================================================
 # CLASSIFICAÇÃO NOVA x REANÁLISE
 # =========================================================
-def classificar_analise(row):
-    registros = df_plan[
-        (df_plan["CLIENTE_KEY"] == row["CLIENTE_KEY"]) &
-        (df_plan["CORRETOR_KEY"] == row["CORRETOR_KEY"])
-    ]
-
-    if registros.empty:
-        return "NOVA"
+df["CLIENTE_KEY"] = normalizar_coluna(df["nome_pessoa"])
+df["CORRETOR_KEY"] = normalizar_coluna(df["nome_corretor"])
 
-    ultima_data = registros["DATA"].max()
-    if pd.isna(ultima_data):
-        return "NOVA"
+indice = indice_ultima_analise(versao_dados(df_plan), df_plan)
+df = df.merge(indice, on=["CLIENTE_KEY", "CORRETOR_KEY"], how="left")
 
-    dias = (pd.Timestamp.now().normalize() - ultima_data.normalize()).days
-    return "REANÁLISE" if dias <= LIMITE_REANALISE else "NOVA"
-
-df["TIPO_ANALISE"] = df.apply(classificar_analise, axis=1)
+dias = (pd.Timestamp.now().normalize() - df["ULTIMA_ANALISE"].dt.normalize()).dt.days
+df["TIPO_ANALISE"] = "NOVA"
+df.loc[dias <= LIMITE_REANALISE, "TIPO_ANALISE"] = "REANÁLISE"
 
 # =========================================================
 # ORDENAÇÃO FIFO
@@ -169,44 +147,73 @@ st.divider()
 # =========================================================
 # CARDS COM GLOW
 # =========================================================
-cols = st.columns(3)
-
-for i, row in df.iterrows():
-    with cols[i % 3]:
+# A grade sai em lotes, uma chamada de markdown por coluna, e "Mostrar
+# mais" acrescenta o próximo lote.
+CARDS_POR_LOTE = 30
 
-        is_nova = row["TIPO_ANALISE"] == "NOVA"
-        glow = "0 0 22px rgba(34,197,94,0.45)" if is_nova else "0 0 22px rgba(245,158,11,0.45)"
-        border = "#22c55e" if is_nova else "#f59e0b"
-        badge = "🆕 NOVA ANÁLISE" if is_nova else "🔁 REANÁLISE"
 
-        obs = row.get("anotacoes") or "Sem observações"
-        obs = obs[:200] + "..." if len(obs) > 200 else obs
+def html_card(nome, is_nova, email, telefone, corretor, data_cap, obs, situacao):
+    border = "#22c55e" if is_nova else "#f59e0b"
+    badge = "🆕 NOVA ANÁLISE" if is_nova else "🔁 REANÁLISE"
 
-        data_cap = "-"
-        if pd.notna(row.get("DATA_CAPTURA")):
-            data_cap = row["DATA_CAPTURA"].strftime("%d/%m/%Y")
+    obs = obs or "Sem observações"
+    obs = obs[:200] + "..." if len(obs) > 200 else obs
 
-        st.markdown(
-            f"""
+    return f"""
             <div style="
                 border: 2px solid {border};
                 border-radius: 14px;
                 padding: 16px;
                 margin-bottom: 18px;
             ">
-                <h4>{row['nome_pessoa']}</h4>
+                <h4>{nome}</h4>
                 <strong>{badge}</strong><br><br>
 
-                📧 {row.get('email_pessoa','-')}<br>
-                📞 {row.get('telefone_pessoa','-')}<br>
-                👤 {row.get('nome_corretor','-')}<br>
+                📧 {email}<br>
+                📞 {telefone}<br>
+                👤 {corretor}<br>
                 🕒 {data_cap}<br><br>
 
                 📝 {obs}<br><br>
 
-                📌 Situação: {row.get('nome_situacao','-')}
+                📌 Situação: {situacao}
             </div>
-            """,
-            unsafe_allow_html=True
-        )
+            """
+
+
+def campo(row, nome):
+    valor = row.get(nome, "-")
+    return "-" if valor is None or (isinstance(valor, float) and pd.isna(valor)) else valor
+
 
+if "cards_pre_cadastro" not in st.session_state:
+    st.session_state["cards_pre_cadastro"] = CARDS_POR_LOTE
+
+visiveis = df.head(st.session_state["cards_pre_cadastro"])
+colunas_html = [[], [], []]
+
+for pos, row in enumerate(visiveis.to_dict("records")):
+    data_cap = "-"
+    if pd.notna(row.get("DATA_CAPTURA")):
+        data_cap = row["DATA_CAPTURA"].strftime("%d/%m/%Y")
+
+    colunas_html[pos % 3].append(html_card(
+        row["nome_pessoa"],
+        row["TIPO_ANALISE"] == "NOVA",
+        campo(row, "email_pessoa"),
+        campo(row, "telefone_pessoa"),
+        campo(row, "nome_corretor"),
+        data_cap,
+        row.get("anotacoes") if isinstance(row.get("anotacoes"), str) else "",
+        campo(row, "nome_situacao"),
+    ))
+
+cols = st.columns(3)
+for col, cards in zip(cols, colunas_html):
+    with col:
+        st.markdown("".join(cards), unsafe_allow_html=True)
+
+if len(df) > len(visiveis):
+    if st.button(f"Mostrar mais ({len(df) - len(visiveis)} restantes)"):
+        st.session_state["cards_pre_cadastro"] += CARDS_POR_LOTE
+        st.rerun()
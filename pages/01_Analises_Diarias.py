@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
 from datetime import date, datetime, timedelta
-from streamlit_autorefresh import st_autorefresh
 import altair as alt
 
+from utils.cubo_diario import cubo_diario
+from utils.feed_versoes import acompanhar_fontes
+
 # ---------------------------------------------------------
 # CONFIGURAÇÃO DA PÁGINA
 # ---------------------------------------------------------
@@ -13,8 +15,8 @@ st.set_page_config(
     layout="wide",
 )
 
-# AUTO-REFRESH DISCRETO (30 SEGUNDOS)
-st_autorefresh(interval=30 * 1000, key="analises_refresh")
+# AUTO-REFRESH DISCRETO: SÓ QUANDO A PLANILHA MUDAR (CHECAGEM A CADA 30 S)
+acompanhar_fontes(["analises"], intervalo_s=30, key="analises_refresh")
 
 # ---------------------------------------------------------
 # ESTILO / CSS
@@ -132,71 +134,12 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# ---------------------------------------------------------
-# CONSTANTES – PLANILHA
-# ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
-
 # ---------------------------------------------------------
 # FUNÇÕES AUXILIARES
 # ---------------------------------------------------------
-def limpar_para_data(serie: pd.Series) -> pd.Series:
-    dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
-    return dt.dt.date
-
-
-def carregar_dados() -> pd.DataFrame:
-    """Carrega a base em tempo real – sem cache."""
-    df = pd.read_csv(CSV_URL)
-    df.columns = [c.strip().upper() for c in df.columns]
-
-    # DATA
-    if "DATA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DATA"])
-    elif "DIA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DIA"])
-    else:
-        df["DIA"] = pd.NaT
-
-    # EQUIPE / CORRETOR
-    for col in ["EQUIPE", "CORRETOR"]:
-        if col in df.columns:
-            df[col] = (
-                df[col]
-                .fillna("NÃO INFORMADO")
-                .astype(str)
-                .str.upper()
-                .str.strip()
-            )
-        else:
-            df[col] = "NÃO INFORMADO"
-
-    # STATUS
-    possiveis_cols_situacao = [
-        "SITUAÇÃO",
-        "SITUAÇÃO ATUAL",
-        "STATUS",
-        "SITUACAO",
-        "SITUACAO ATUAL",
-    ]
-    col_sit = next((c for c in possiveis_cols_situacao if c in df.columns), None)
-
-    df["STATUS_BASE"] = ""
-    if col_sit:
-        status_original = df[col_sit].fillna("").astype(str)
-        s = status_original.str.upper()
-
-        # EM ANÁLISE
-        df.loc[s.str.contains("EM ANÁLISE"), "STATUS_BASE"] = "EM ANÁLISE"
-        # REANÁLISE (só pra registro / não entra nas contas)
-        df.loc[s.str.contains("REANÁLISE"), "STATUS_BASE"] = "REANÁLISE"
-        # APROVADO apenas quando tiver APROVAÇÃO
-        df.loc[s.str.contains(r"\bAPROVAÇÃO\b"), "STATUS_BASE"] = "APROVADO"
-
-    return df
+def carregar_cubo():
+    """Cubo diário da base normalizada (APROVADO só com APROVAÇÃO)."""
+    return cubo_diario("analises")
 
 
 def formatar_data_br(d: date) -> str:
@@ -223,9 +166,9 @@ def criar_coluna_rank(n: int) -> list:
 # ---------------------------------------------------------
 # CARREGAR BASE
 # ---------------------------------------------------------
-df = carregar_dados()
+cubo = carregar_cubo()
 
-if df.empty:
+if cubo.vazio:
     st.error("Não foi possível carregar dados da planilha.")
     st.stop()
 
@@ -234,9 +177,9 @@ if df.empty:
 # ---------------------------------------------------------
 st.sidebar.title("Filtro do dia 📅")
 
-dias_validos = df["DIA"].dropna()
-data_min = dias_validos.min()
-data_max = dias_validos.max()
+dias_validos = cubo.contagens["DIA"].dropna()
+data_min = dias_validos.min().date()
+data_max = dias_validos.max().date()
 
 dia_default = data_max
 
@@ -262,10 +205,11 @@ META_DIA = st.sidebar.number_input(
 # ---------------------------------------------------------
 # FILTRAR BASE PARA O DIA
 # ---------------------------------------------------------
-df_dia = df[df["DIA"] == dia_selecionado].copy()
-df_em_analise = df_dia[df_dia["STATUS_BASE"] == "EM ANÁLISE"]
+cubo_dia = cubo.fatiar(dia_ini=dia_selecionado, dia_fim=dia_selecionado)
+analises_por_equipe = cubo_dia.contagem_por("EQUIPE", "EM ANÁLISE")
+analises_por_corretor = cubo_dia.contagem_por("CORRETOR", "EM ANÁLISE")
 
-total_analises = len(df_em_analise)
+total_analises = int(analises_por_equipe.sum())
 meta_batida = total_analises >= META_DIA
 faltam_meta = max(META_DIA - total_analises, 0)
 
@@ -384,8 +328,8 @@ if meta_batida:
 # ---------------------------------------------------------
 # MÉTRICAS PRINCIPAIS
 # ---------------------------------------------------------
-equipes_ativas = df_em_analise["EQUIPE"].nunique()
-corretores_ativos = df_em_analise["CORRETOR"].nunique()
+equipes_ativas = len(analises_por_equipe)
+corretores_ativos = len(analises_por_corretor)
 
 st.markdown(
     f"""
@@ -430,9 +374,7 @@ with col_eq:
         unsafe_allow_html=True,
     )
 
-    df_equipes = (
-        df_em_analise.groupby("EQUIPE").size().reset_index(name="ANÁLISES")
-    )
+    df_equipes = analises_por_equipe.reset_index(name="ANÁLISES")
     df_equipes = (
         df_equipes.sort_values("ANÁLISES", ascending=False)
         .reset_index(drop=True)
@@ -455,9 +397,7 @@ with col_cor:
         unsafe_allow_html=True,
     )
 
-    df_corretor = (
-        df_em_analise.groupby("CORRETOR").size().reset_index(name="ANÁLISES")
-    )
+    df_corretor = analises_por_corretor.reset_index(name="ANÁLISES")
     df_corretor = (
         df_corretor.sort_values("ANÁLISES", ascending=False)
         .reset_index(drop=True)
@@ -515,28 +455,28 @@ st.markdown(
     f"Período considerado: **{data_ini.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}**."
 )
 
-# filtra o período escolhido
-df_periodo = df[(df["DIA"] >= data_ini) & (df["DIA"] <= data_fim)].copy()
+# recorte do período escolhido
+cubo_periodo = cubo.fatiar(dia_ini=data_ini, dia_fim=data_fim)
 
 # ---------------------------------------------------------
 # MATRIZ E HEATMAP
 # ---------------------------------------------------------
-if tipo_visao.startswith("Análises"):
-    df_base = df_periodo[df_periodo["STATUS_BASE"] == "EM ANÁLISE"].copy()
-else:
-    df_base = df_periodo[df_periodo["STATUS_BASE"] == "APROVADO"].copy()
+status_visao = "EM ANÁLISE" if tipo_visao.startswith("Análises") else "APROVADO"
+
+# contagens Equipe x Dia (já agregadas no cubo)
+por_equipe_dia = cubo_periodo.contagem_por(["EQUIPE", "DIA"], status_visao)
 
-if df_base.empty:
+if por_equipe_dia.empty:
     st.info("Não há registros para este tipo de visão no período selecionado.")
 else:
-    df_base = df_base.dropna(subset=["DIA"]).copy()
-    df_base["DIA"] = pd.to_datetime(df_base["DIA"]).dt.date
+    df_heat = por_equipe_dia.reset_index(name="QTDE")
+    df_heat["DIA"] = df_heat["DIA"].dt.date
 
     # Pivot: Equipe x Dia
     tabela = (
-        df_base.groupby(["EQUIPE", "DIA"])
-        .size()
-        .unstack(fill_value=0)
+        df_heat.pivot(index="EQUIPE", columns="DIA", values="QTDE")
+        .fillna(0)
+        .astype(int)
         .sort_index()
     )
 
@@ -566,12 +506,6 @@ else:
     st.dataframe(tabela_final, use_container_width=True)
 
     # Heatmap
-    df_heat = (
-        df_base.groupby(["EQUIPE", "DIA"])
-        .size()
-        .reset_index(name="QTDE")
-    )
-
     if not df_heat.empty:
         df_heat["DIA_STR"] = pd.to_datetime(df_heat["DIA"]).dt.strftime("%d/%m")
 
@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from datetime import datetime
-from streamlit_autorefresh import st_autorefresh
+
+from utils.data_loader import GID_ANALISES, GID_PRODUCAO, baixar_csv, versao_dados
+from utils.feed_versoes import acompanhar_fontes
+from utils.planilha_normalizada import mes_ano_ptbr_para_datetime
 
 # =========================================================
 # CONFIG
@@ -13,7 +15,7 @@ st.set_page_config(
     layout="wide"
 )
 
-st_autorefresh(interval=30 * 1000, key="auto_refresh_producao")
+acompanhar_fontes(["producao", "processos"], intervalo_s=30, key="auto_refresh_producao")
 
 # =========================================================
 # CSS
@@ -44,13 +46,7 @@ div[data-testid="stMetricValue"] {
 # =========================================================
 # GOOGLE SHEETS
 # =========================================================
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-
-GID_PRODUCAO = "1161609337"
-GID_PROCESSOS = "1574157905"
-
-CSV_PRODUCAO = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_PRODUCAO}"
-CSV_PROCESSOS = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_PROCESSOS}"
+GID_PROCESSOS = GID_ANALISES
 
 # =========================================================
 # FUNÇÕES AUXILIARES
@@ -62,47 +58,6 @@ def normalizar_texto(texto):
         .strip()
     )
 
-def mes_ano_ptbr_para_date(valor):
-
-    if pd.isna(valor):
-        return pd.NaT
-
-    s = str(valor).strip().lower()
-
-    if not s:
-        return pd.NaT
-
-    meses = {
-        "janeiro": 1,
-        "fevereiro": 2,
-        "março": 3,
-        "marco": 3,
-        "abril": 4,
-        "maio": 5,
-        "junho": 6,
-        "julho": 7,
-        "agosto": 8,
-        "setembro": 9,
-        "outubro": 10,
-        "novembro": 11,
-        "dezembro": 12,
-    }
-
-    try:
-        partes = s.split()
-        mes_txt = partes[0]
-        ano = int(partes[-1])
-
-        mes_num = meses.get(mes_txt)
-
-        if mes_num is None:
-            return pd.NaT
-
-        return datetime(ano, mes_num, 1).date()
-
-    except:
-        return pd.NaT
-
 def tratar_data_base(df):
 
     possiveis_cols_base = [
@@ -135,7 +90,7 @@ def tratar_data_base(df):
         )
 
         df["DATA_BASE"] = (
-            base_raw.apply(mes_ano_ptbr_para_date)
+            mes_ano_ptbr_para_datetime(base_raw).dt.date
         )
 
     else:
@@ -148,12 +103,17 @@ def tratar_data_base(df):
 # =========================================================
 # CARREGAR PRODUÇÃO
 # =========================================================
-@st.cache_data(ttl=30)
+# o download só relê a aba quando o conteúdo muda; o preparo fica guardado
+# por versão, então recargas sem edição na planilha não refazem nada
 def carregar_base():
+    bruto = baixar_csv(GID_PRODUCAO, ttl=30)
+    return preparar_base(versao_dados(bruto), bruto)
+
 
-    df = pd.read_csv(CSV_PRODUCAO)
+@st.cache_data(max_entries=4, show_spinner=False)
+def preparar_base(versao, _bruto):
 
-    df.columns = [c.strip().upper() for c in df.columns]
+    df = _bruto.copy()
 
     if "DATA" not in df.columns:
         df["DATA"] = pd.NaT
@@ -193,12 +153,15 @@ def carregar_base():
 # =========================================================
 # CARREGAR PROCESSOS
 # =========================================================
-@st.cache_data(ttl=30)
 def carregar_processos():
+    bruto = baixar_csv(GID_PROCESSOS, ttl=30)
+    return preparar_processos(versao_dados(bruto), bruto)
+
 
-    dfp = pd.read_csv(CSV_PROCESSOS)
+@st.cache_data(max_entries=4, show_spinner=False)
+def preparar_processos(versao, _bruto):
 
-    dfp.columns = [c.strip().upper() for c in dfp.columns]
+    dfp = _bruto.copy()
 
     if "DATA" in dfp.columns:
         dfp["DATA"] = pd.to_datetime(dfp["DATA"], dayfirst=True, errors="coerce")
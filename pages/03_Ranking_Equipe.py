@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from datetime import timedelta, datetime
+from datetime import timedelta
+
+from utils.planilha_normalizada import planilha_normalizada
 
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
@@ -20,116 +22,9 @@ except Exception:
 
 st.title("🏆 Ranking de Análises por Corretor")
 
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
-
-def limpar_para_data(serie: pd.Series) -> pd.Series:
-    dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
-    return dt.dt.date
-
-
-def mes_ano_ptbr_para_date(valor: str):
-    if pd.isna(valor):
-        return pd.NaT
-
-    s = str(valor).strip().lower()
-    if not s:
-        return pd.NaT
-
-    meses = {
-        "janeiro": 1,
-        "fevereiro": 2,
-        "março": 3,
-        "marco": 3,
-        "abril": 4,
-        "maio": 5,
-        "junho": 6,
-        "julho": 7,
-        "agosto": 8,
-        "setembro": 9,
-        "outubro": 10,
-        "novembro": 11,
-        "dezembro": 12,
-    }
-
-    try:
-        partes = s.split()
-        mes_txt = partes[0]
-        ano = int(partes[-1])
-        mes_num = meses.get(mes_txt)
-        if mes_num is None:
-            return pd.NaT
-        return datetime(ano, mes_num, 1).date()
-    except Exception:
-        return pd.NaT
-
 
 def carregar_dados() -> pd.DataFrame:
-    df = pd.read_csv(CSV_URL)
-    df.columns = [c.strip().upper() for c in df.columns]
-
-    if "DATA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DATA"])
-    elif "DIA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DIA"])
-    else:
-        df["DIA"] = pd.NaT
-
-    possiveis_cols_base = [
-        "DATA BASE",
-        "DATA_BASE",
-        "DT BASE",
-        "DATA REF",
-        "DATA REFERÊNCIA",
-        "DATA REFERENCIA",
-    ]
-    col_data_base = next((c for c in possiveis_cols_base if c in df.columns), None)
-
-    if col_data_base:
-        base_raw = df[col_data_base].astype(str).str.strip()
-        df["DATA_BASE_LABEL"] = base_raw.str.lower().str.title()
-        df["DATA_BASE"] = base_raw.apply(mes_ano_ptbr_para_date)
-
-        if df["DATA_BASE"].dropna().empty:
-            df["DATA_BASE"] = df["DIA"]
-            df["DATA_BASE_LABEL"] = df["DIA"].apply(
-                lambda d: d.strftime("%m/%Y") if pd.notnull(d) else ""
-            )
-    else:
-        df["DATA_BASE"] = df["DIA"]
-        df["DATA_BASE_LABEL"] = df["DIA"].apply(
-            lambda d: d.strftime("%m/%Y") if pd.notnull(d) else ""
-        )
-
-    if "CORRETOR" in df.columns:
-        df["CORRETOR"] = (
-            df["CORRETOR"]
-            .fillna("NÃO INFORMADO")
-            .astype(str)
-            .str.upper()
-            .str.strip()
-        )
-    else:
-        df["CORRETOR"] = "NÃO INFORMADO"
-
-    possiveis_cols_situacao = [
-        "SITUAÇÃO",
-        "SITUAÇÃO ATUAL",
-        "STATUS",
-        "SITUACAO",
-        "SITUACAO ATUAL",
-    ]
-    col_situacao = next((c for c in possiveis_cols_situacao if c in df.columns), None)
-
-    df["STATUS_BASE"] = ""
-    if col_situacao is not None:
-        s = df[col_situacao].fillna("").astype(str).str.upper()
-        df.loc[s.str.contains("EM ANÁLISE"), "STATUS_BASE"] = "EM ANÁLISE"
-        df.loc[s.str.contains("REANÁLISE"), "STATUS_BASE"] = "REANÁLISE"
-
-    return df
+    return planilha_normalizada("ranking_equipe")
 
 
 df = carregar_dados()
@@ -6,8 +6,8 @@ from datetime import date
 import math
 
 from utils.bootstrap import iniciar_app
-from app_dashboard import carregar_dados_planilha
-from streamlit_autorefresh import st_autorefresh
+from utils.cubo_diario import cubo_diario
+from utils.feed_versoes import acompanhar_fontes
 
 
 # ---------------------------------------------------------
@@ -19,7 +19,7 @@ st.set_page_config(
     layout="wide",
 )
 
-st_autorefresh(interval=600 * 1000, key="auto_refresh_meta")
+acompanhar_fontes(["analises"], intervalo_s=600, key="auto_refresh_meta")
 
 
 # ---------------------------------------------------------
@@ -40,116 +40,72 @@ def format_int(v):
         return "0"
 
 
-def obter_vendas_unicas(df, status_final_map):
-    if df.empty:
-        return df.iloc[0:0].copy()
-
-    df_v = df[df["STATUS_BASE"] == "VENDA GERADA"].copy()
-    if df_v.empty:
-        return df_v
-
-    df_v["STATUS_FINAL"] = df_v["CHAVE_CLIENTE"].map(status_final_map)
-    df_v = df_v[df_v["STATUS_FINAL"] != "DESISTIU"]
-
-    df_v = df_v.sort_values("DIA").groupby("CHAVE_CLIENTE").tail(1)
-    return df_v
-
-
-# HISTÓRICO / VOLUME (para conversões e meta histórica)
-def contar_analises_volume(df):
-    return int(df["STATUS_BASE"].isin(["EM ANÁLISE", "REANÁLISE"]).sum())
-
-
+# HISTÓRICO / VOLUME (para conversões e meta histórica): análise + reanálise
+STATUS_ANALISE_VOLUME = ("EM ANÁLISE", "REANÁLISE")
 # REALIZADO (para o mês comercial): APENAS "EM ANÁLISE"
-def contar_analises_realizado(df):
-    return int((df["STATUS_BASE"] == "EM ANÁLISE").sum())
+STATUS_ANALISE_REALIZADO = ("EM ANÁLISE",)
+STATUS_APROVACAO = ("APROVADO",)
 
+# tipo de meta -> coluna do resumo por DATA_BASE (cubo.resumo_bases)
+COLUNA_RESUMO = {
+    "Número de Análises": "ANALISES",
+    "Número de Aprovações": "APROVACOES",
+    "Número de Vendas": "VENDAS",
+}
+N_BASES_TENDENCIA = 12
 
-def contar_aprovacoes(df):
-    return int((df["STATUS_BASE"] == "APROVADO").sum())
 
+def status_do_tipo(tipo, modo="volume"):
+    if tipo == "Número de Análises":
+        return STATUS_ANALISE_REALIZADO if modo == "realizado" else STATUS_ANALISE_VOLUME
+    return STATUS_APROVACAO
 
-def total_por_tipo(df, tipo, status_final_map, modo="volume"):
+
+def total_por_tipo(cubo, tipo, modo="volume"):
     """
     modo:
       - "volume": análises = EM ANÁLISE + REANÁLISE
       - "realizado": análises = APENAS EM ANÁLISE
     """
-    if df.empty:
+    if cubo.vazio:
         return 0
 
-    if tipo == "Número de Análises":
-        return contar_analises_realizado(df) if modo == "realizado" else contar_analises_volume(df)
+    if tipo == "Número de Vendas":
+        return int(len(cubo.vendas_unicas()))
 
-    if tipo == "Número de Aprovações":
-        return contar_aprovacoes(df)
+    return cubo.total(status_do_tipo(tipo, modo))
 
-    return int(len(obter_vendas_unicas(df, status_final_map)))
 
-
-def serie_diaria_real(df, tipo, status_final_map, modo="realizado"):
+def serie_diaria_real(cubo, tipo, modo="realizado"):
     """
     Série diária do REAL (para gráfico).
     Para Análises no modo 'realizado' conta APENAS 'EM ANÁLISE'.
     """
-    if df.empty:
+    if cubo.vazio:
         return pd.Series(dtype=int)
 
-    if tipo == "Número de Análises":
-        if modo == "realizado":
-            s = df[df["STATUS_BASE"] == "EM ANÁLISE"].groupby("DIA").size()
-        else:
-            s = df[df["STATUS_BASE"].isin(["EM ANÁLISE", "REANÁLISE"])].groupby("DIA").size()
-
-    elif tipo == "Número de Aprovações":
-        s = df[df["STATUS_BASE"] == "APROVADO"].groupby("DIA").size()
-
-    else:
-        df_v = obter_vendas_unicas(df, status_final_map)
-        s = df_v.groupby("DIA").size()
+    if tipo == "Número de Vendas":
+        return cubo.serie_vendas()
 
-    return s.sort_index()
+    return cubo.serie_diaria(status_do_tipo(tipo, modo))
 
 
-def bases_anteriores(df_scope, base_ref, n=3):
+def bases_anteriores(resumo, base_ref, n=3):
     """
-    Retorna as N DATA_BASE_LABEL imediatamente anteriores à base_ref (DATA_BASE datetime).
+    Linhas do resumo por DATA_BASE (já em ordem) das N bases imediatamente
+    anteriores à base_ref (DATA_BASE datetime).
     """
-    if df_scope.empty or "DATA_BASE" not in df_scope.columns:
-        return []
-
-    uniq = (
-        df_scope[["DATA_BASE", "DATA_BASE_LABEL"]]
-        .dropna()
-        .drop_duplicates()
-        .sort_values("DATA_BASE")
-        .reset_index(drop=True)
-    )
-
-    prev = uniq[uniq["DATA_BASE"] < base_ref]
-    labels = prev["DATA_BASE_LABEL"].tolist()
-
-    return labels[-n:] if labels else []
+    return resumo[resumo["DATA_BASE"] < base_ref].tail(n)
 
 
 # ---------------------------------------------------------
-# BASE
+# BASE (CUBO DIÁRIO: CONTAGENS POR DIA/BASE/EQUIPE/CORRETOR/STATUS)
 # ---------------------------------------------------------
-df = carregar_dados_planilha(_refresh_key=st.session_state.get("refresh_planilha"))
-df.columns = [c.upper().strip() for c in df.columns]
-df["DIA"] = pd.to_datetime(df["DIA"], errors="coerce")
-df["DATA_BASE"] = pd.to_datetime(df["DATA_BASE"], errors="coerce")
-
-for c in ["EQUIPE", "CORRETOR"]:
-    df[c] = df[c].fillna("NÃO INFORMADO").astype(str).str.upper().str.strip()
-
-if "CHAVE_CLIENTE" not in df.columns:
-    nome = df.get("NOME_CLIENTE_BASE", "NÃO INFORMADO").astype(str)
-    cpf = df.get("CPF_CLIENTE_BASE", "").astype(str)
-    df["CHAVE_CLIENTE"] = nome + " | " + cpf
-
-df_final = df.sort_values("DIA").groupby("CHAVE_CLIENTE").tail(1)
-status_final_por_cliente = df_final.set_index("CHAVE_CLIENTE")["STATUS_BASE"].to_dict()
+cubo = cubo_diario(
+    "desistencia",
+    escopo_vendas="funil",
+    _refresh_key=st.session_state.get("refresh_planilha"),
+)
 
 
 # ---------------------------------------------------------
@@ -157,18 +113,22 @@ status_final_por_cliente = df_final.set_index("CHAVE_CLIENTE")["STATUS_BASE"].to
 # ---------------------------------------------------------
 st.sidebar.title("Filtros 🔎")
 
-df_scope = df.copy()
+escopo = {}
 
 if perfil == "corretor":
-    df_scope = df_scope[df_scope["CORRETOR"] == nome_usuario]
+    escopo = {"corretor": nome_usuario}
 else:
     visao = st.sidebar.radio("Visão", ["Imobiliária", "Equipe", "Corretor"])
     if visao == "Equipe":
-        eq = st.sidebar.selectbox("Equipe", sorted(df_scope["EQUIPE"].unique()))
-        df_scope = df_scope[df_scope["EQUIPE"] == eq]
+        eq = st.sidebar.selectbox("Equipe", sorted(cubo.contagens["EQUIPE"].unique()))
+        escopo = {"equipe": eq}
     elif visao == "Corretor":
-        cr = st.sidebar.selectbox("Corretor", sorted(df_scope["CORRETOR"].unique()))
-        df_scope = df_scope[df_scope["CORRETOR"] == cr]
+        cr = st.sidebar.selectbox("Corretor", sorted(cubo.contagens["CORRETOR"].unique()))
+        escopo = {"corretor": cr}
+
+cubo_scope = cubo.fatiar(**escopo)
+# totais por DATA_BASE do escopo (calculados uma vez por versão dos dados)
+resumo_scope = cubo.resumo_bases(**escopo)
 
 
 # ---------------------------------------------------------
@@ -185,20 +145,17 @@ tipo_meta = st.selectbox(
 # ---------------------------------------------------------
 # SELETOR DA DATA_BASE (REFERÊNCIA PARA PEGAR AS 3 ANTERIORES)
 # ---------------------------------------------------------
-uniq_bases = (
-    df_scope[["DATA_BASE", "DATA_BASE_LABEL"]]
-    .dropna()
-    .drop_duplicates()
-    .sort_values("DATA_BASE")
-)
+uniq_bases = resumo_scope[["DATA_BASE", "DATA_BASE_LABEL"]]
 
 lista_labels = uniq_bases["DATA_BASE_LABEL"].tolist()
 base_label_sel = st.selectbox("Mês de Referência (DATA_BASE)", lista_labels)
 
 base_ref = uniq_bases[uniq_bases["DATA_BASE_LABEL"] == base_label_sel]["DATA_BASE"].iloc[0]
-labels_prev3 = bases_anteriores(df_scope, base_ref, n=3)
+resumo_prev3 = bases_anteriores(resumo_scope, base_ref, n=3)
+labels_prev3 = resumo_prev3["DATA_BASE_LABEL"].tolist()
 
-df_prev3 = df_scope[df_scope["DATA_BASE_LABEL"].isin(labels_prev3)].copy()
+# venda única nas 3 bases juntas (cliente que comprou em duas conta uma vez)
+cubo_prev3 = cubo_scope.fatiar(bases=labels_prev3)
 
 
 # ---------------------------------------------------------
@@ -207,9 +164,9 @@ df_prev3 = df_scope[df_scope["DATA_BASE_LABEL"].isin(labels_prev3)].copy()
 # CASO NÃO EXISTA HISTÓRICO, USA CONVERSÃO PADRÃO
 # REGRA PADRÃO: 7 ANÁLISES, 3 APROVAÇÕES PARA 1 VENDA
 # ---------------------------------------------------------
-vendas_prev3 = len(obter_vendas_unicas(df_prev3, status_final_por_cliente))
-anal_prev3 = contar_analises_volume(df_prev3)   # volume: análise + reanálise
-aprov_prev3 = contar_aprovacoes(df_prev3)
+vendas_prev3 = len(cubo_prev3.vendas_unicas())
+anal_prev3 = int(resumo_prev3["ANALISES"].sum())   # volume: análise + reanálise
+aprov_prev3 = int(resumo_prev3["APROVACOES"].sum())
 
 CONVERSAO_PADRAO_ANALISES_POR_VENDA = 7
 CONVERSAO_PADRAO_APROVACOES_POR_VENDA = 3
@@ -241,11 +198,8 @@ st.caption(origem_conversao)
 # ---------------------------------------------------------
 # META HISTÓRICA (MÉDIA DAS 3 BASES ANTERIORES)
 # ---------------------------------------------------------
-valores_meta = []
-for lab in labels_prev3:
-    df_b = df_scope[df_scope["DATA_BASE_LABEL"] == lab]
-    # meta histórica usa "volume" (análise + reanálise)
-    valores_meta.append(total_por_tipo(df_b, tipo_meta, status_final_por_cliente, modo="volume"))
+# meta histórica usa "volume" (análise + reanálise)
+valores_meta = resumo_prev3[COLUNA_RESUMO[tipo_meta]].tolist()
 
 meta_historica = int(math.ceil(np.mean(valores_meta))) if valores_meta else 0
 
@@ -285,24 +239,21 @@ if dt_fim < dt_inicio:
     st.error("Fim do mês comercial não pode ser menor que o início.")
     st.stop()
 
-df_periodo = df_scope[
-    (df_scope["DIA"].dt.date >= dt_inicio) &
-    (df_scope["DIA"].dt.date <= dt_fim)
-].copy()
+cubo_periodo = cubo_scope.fatiar(dia_ini=dt_inicio, dia_fim=dt_fim)
 
-if df_periodo.empty:
+if cubo_periodo.vazio:
     st.info("Sem registros no período selecionado.")
     st.stop()
 
 # REAL só até o último dia existente na planilha dentro do período
-ultimo_dia_planilha = df_periodo["DIA"].max().date()
-df_real = df_periodo[df_periodo["DIA"].dt.date <= ultimo_dia_planilha].copy()
+ultimo_dia_planilha = cubo_periodo.contagens["DIA"].max().date()
+cubo_real = cubo_periodo.fatiar(dia_fim=ultimo_dia_planilha)
 
 
 # ---------------------------------------------------------
 # REAL x META (REALIZADO: análises = APENAS EM ANÁLISE)
 # ---------------------------------------------------------
-real_total = total_por_tipo(df_real, tipo_meta, status_final_por_cliente, modo="realizado")
+real_total = total_por_tipo(cubo_real, tipo_meta, modo="realizado")
 faltam = max(meta_valor - real_total, 0)
 pct = (real_total / meta_valor) if meta_valor > 0 else 0
 
@@ -321,7 +272,7 @@ from datetime import timedelta
 dias_totais = (dt_fim - dt_inicio).days + 1
 
 # Último dia real considerado
-ultimo_dia_real = df_real["DIA"].max().date()
+ultimo_dia_real = cubo_real.contagens["DIA"].max().date()
 
 # Dias já ocorridos dentro do mês comercial
 dias_decorridos = (ultimo_dia_real - dt_inicio).days + 1
@@ -368,11 +319,9 @@ st.markdown("### 📊 Resultado acumulado — últimas 3 DATA_BASE")
 if not labels_prev3:
     st.info("Não há 3 DATA_BASE anteriores suficientes para exibir o acumulado.")
 else:
-    df_3bases = df_scope[df_scope["DATA_BASE_LABEL"].isin(labels_prev3)].copy()
-
-    anal_3b = contar_analises_realizado(df_3bases)
-    aprov_3b = contar_aprovacoes(df_3bases)
-    vendas_3b = len(obter_vendas_unicas(df_3bases, status_final_por_cliente))
+    anal_3b = int(resumo_prev3["ANALISES_REALIZADO"].sum())
+    aprov_3b = int(resumo_prev3["APROVACOES"].sum())
+    vendas_3b = len(cubo_prev3.vendas_unicas())
 
     c1, c2, c3 = st.columns(3)
 
@@ -383,6 +332,34 @@ else:
     st.caption("Bases consideradas: " + " | ".join(labels_prev3))
 
 
+# ---------------------------------------------------------
+# 📈 TENDÊNCIA – ÚLTIMAS 12 DATA_BASE (ATÉ A REFERÊNCIA)
+# ---------------------------------------------------------
+st.markdown(f"### 📈 Tendência — últimas {N_BASES_TENDENCIA} DATA_BASE")
+
+df_tendencia = resumo_scope[resumo_scope["DATA_BASE"] <= base_ref].tail(N_BASES_TENDENCIA)
+coluna_tendencia = COLUNA_RESUMO[tipo_meta]
+
+chart_tendencia = (
+    alt.Chart(df_tendencia)
+    .mark_line(point=True)
+    .encode(
+        x=alt.X("DATA_BASE_LABEL:N", sort=df_tendencia["DATA_BASE_LABEL"].tolist(), title="DATA_BASE"),
+        y=alt.Y(f"{coluna_tendencia}:Q", title=tipo_meta),
+        tooltip=[
+            alt.Tooltip("DATA_BASE_LABEL:N", title="Base"),
+            alt.Tooltip("ANALISES:Q", title="Análises"),
+            alt.Tooltip("APROVACOES:Q", title="Aprovações"),
+            alt.Tooltip("VENDAS:Q", title="Vendas"),
+            alt.Tooltip("VGV:Q", title="VGV", format=",.2f"),
+        ],
+    )
+    .properties(height=300)
+)
+
+st.altair_chart(chart_tendencia, use_container_width=True)
+
+
 # ---------------------------------------------------------
 # 🍩 DONUT
 # ---------------------------------------------------------
@@ -408,7 +385,7 @@ st.altair_chart(donut, use_container_width=True)
 # ---------------------------------------------------------
 st.subheader("📈 Acompanhamento — Meta x Real (acumulado)")
 
-cont_real = serie_diaria_real(df_real, tipo_meta, status_final_por_cliente, modo="realizado")
+cont_real = serie_diaria_real(cubo_real, tipo_meta, modo="realizado")
 real_acum = cont_real.cumsum().reset_index()
 real_acum.columns = ["DIA", "Valor"]
 real_acum["Série"] = "Real"
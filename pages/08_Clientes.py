@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
 from utils.bootstrap import iniciar_app
-from app_dashboard import carregar_dados_planilha
-from streamlit_autorefresh import st_autorefresh
+from utils.data_loader import carregar_dados_planilha, versao_dados
+from utils.busca_clientes import indice_clientes
+from utils.estado_clientes import ultima_linha_por_chave
+from utils.feed_versoes import acompanhar_fontes
 
 # =========================================================
 # INICIALIZAÇÃO
@@ -15,8 +17,8 @@ st.set_page_config(
     layout="wide"
 )
 
-# Auto refresh
-st_autorefresh(interval=30 * 1000, key="auto_refresh_clientes")
+# Auto refresh (só quando a planilha mudar)
+acompanhar_fontes(["analises"], intervalo_s=30, key="auto_refresh_clientes")
 
 # =========================================================
 # CONTEXTO DO USUÁRIO
@@ -139,35 +141,47 @@ def renderizar_texto_centralizado(titulo, texto):
     )
 
 
-def obter_status_atual(grupo):
-    # Remove registros sem data válida
-    grupo = grupo[grupo["DIA"].notna()].copy()
+STATUS_VENDA = ["VENDA GERADA", "VENDA INFORMADA"]
 
-    if grupo.empty:
-        return None
 
-    # Ordena pela data REAL da planilha
-    grupo = grupo.sort_values("DIA", ascending=True)
+def obter_status_atual(df: pd.DataFrame, chaves=("CHAVE", "CORRETOR")) -> pd.DataFrame:
+    """
+    Linha de "situação atual" de cada cliente (uma por chave), de uma vez:
+    - ignora registros sem data válida;
+    - se houve desistência, considera apenas a partir da última desistência;
+    - se houve venda nesse trecho, devolve a última venda;
+    - senão, a última movimentação.
+    """
+    chaves = list(chaves)
 
-    # Se houve desistência, considera apenas após a última desistência
-    desist = grupo["SITUACAO_ORIGINAL"].str.contains("DESIST", na=False)
-    if desist.any():
-        grupo = grupo.loc[grupo[desist].index[-1]:]
+    # Ordena pela data REAL da planilha
+    base = df[df["DIA"].notna()].sort_values("DIA", kind="stable")
+    if base.empty:
+        return base
 
-    # Se houve venda, retorna a última venda
-    vendas = grupo[grupo["STATUS_BASE"].isin(["VENDA GERADA", "VENDA INFORMADA"])]
-    if not vendas.empty:
-        return vendas.iloc[-1]
+    # trecho a partir da última desistência de cada cliente
+    desist = base["SITUACAO_ORIGINAL"].str.contains("DESIST", na=False).astype(int)
+    n_desist = desist.groupby([base[c] for c in chaves]).cumsum()
+    ultimo_trecho = n_desist == n_desist.groupby([base[c] for c in chaves]).transform("max")
+    base = base[ultimo_trecho]
 
-    # Caso contrário, última movimentação real
-    return grupo.iloc[-1]
+    # venda vem por último na ordenação -> é a escolhida quando existir
+    base = base.assign(_VENDA=base["STATUS_BASE"].isin(STATUS_VENDA))
+    return ultima_linha_por_chave(base, chaves, ordem="_VENDA").drop(columns="_VENDA")
 
 
 # =========================================================
 # CARREGAR BASE
 # =========================================================
-@st.cache_data(ttl=60)
+# preparo guardado por versão da planilha: a recarga disparada pelo feed
+# já encontra a versão nova (com ttl, voltaria o frame antigo)
 def carregar_base():
+    versao = versao_dados(carregar_dados_planilha(colunas=[]))
+    return preparar_base(versao)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def preparar_base(versao):
     df = carregar_dados_planilha()
     df.columns = df.columns.str.upper().str.strip()
 
@@ -222,23 +236,16 @@ if not cpf_busca and not nome_busca:
     st.info("Informe CPF ou nome para buscar.")
     st.stop()
 
-mask = pd.Series(False, index=df.index)
-
-if cpf_busca:
-    cpf = cpf_busca.replace(".", "").replace("-", "").strip()
-    mask = df["CPF_CLIENTE_BASE"] == cpf
-
-if nome_busca:
-    nome = nome_busca.upper().strip()
-    mask = mask | df["NOME_CLIENTE_BASE"].str.contains(nome, na=False)
-
-resultado = df[mask].copy()
+# índice (CPF + nome sem acento, por prefixo/trigrama) montado uma vez
+# por versão dos dados; a TRAVA DE POSSE do corretor vai na própria consulta
+indice = indice_clientes(df)
+posicoes = indice.buscar(
+    cpf=cpf_busca,
+    nome=nome_busca,
+    corretor=nome_corretor_logado if perfil == "corretor" else None,
+)
 
-# =========================================================
-# TRAVA DE POSSE
-# =========================================================
-if perfil == "corretor":
-    resultado = resultado[resultado["CORRETOR"] == nome_corretor_logado]
+resultado = df.iloc[posicoes].copy()
 
 if resultado.empty:
     st.warning("⚠️ Cliente não encontrado ou não pertence à sua carteira.")
@@ -247,11 +254,11 @@ if resultado.empty:
 # =========================================================
 # EXIBIÇÃO
 # =========================================================
-for (chave, corretor), grupo in resultado.groupby(["CHAVE", "CORRETOR"]):
+atuais = obter_status_atual(resultado)
+grupos = dict(tuple(resultado.groupby(["CHAVE", "CORRETOR"])))
 
-    ultima = obter_status_atual(grupo)
-    if ultima is None:
-        continue
+for _, ultima in atuais.iterrows():
+    grupo = grupos[(ultima["CHAVE"], ultima["CORRETOR"])]
 
     st.markdown("---")
     st.markdown(f"### 👤 {ultima['NOME_CLIENTE_BASE']}")
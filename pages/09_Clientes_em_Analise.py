@@ -1,6 +1,10 @@
 import streamlit as st
 import pandas as pd
 from datetime import date, timedelta
+
+from utils.cards_clientes import detalhes_por_cliente, paginar
+from utils.planilha_normalizada import planilha_normalizada
+
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -43,164 +47,10 @@ with col_tit:
 
 
 # ---------------------------------------------------------
-# FUNÇÃO AUXILIAR PARA LIMPAR DATA
-# ---------------------------------------------------------
-def limpar_para_data(serie):
-    dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
-    return dt.dt.date
-
-
-# ---------------------------------------------------------
-# CONFIG: LINK DA PLANILHA (MESMO DA PÁGINA CLIENTES MR)
-# ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
-
-# ---------------------------------------------------------
-# CARREGAR E PREPARAR DADOS (MESMA LÓGICA DA CLIENTES MR)
+# CARREGAR E PREPARAR DADOS (PIPELINE COMPARTILHADO)
 # ---------------------------------------------------------
-@st.cache_data(ttl=60)
 def carregar_dados():
-    df = pd.read_csv(CSV_URL)
-
-    # Padroniza nomes de colunas
-    df.columns = [c.strip().upper() for c in df.columns]
-
-    # DATA / DIA
-    if "DATA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DATA"])
-    elif "DIA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DIA"])
-    else:
-        df["DIA"] = pd.NaT
-
-    # EQUIPE / CORRETOR
-    for col in ["EQUIPE", "CORRETOR"]:
-        if col in df.columns:
-            df[col] = (
-                df[col]
-                .fillna("NÃO INFORMADO")
-                .astype(str)
-                .str.upper()
-                .str.strip()
-            )
-        else:
-            df[col] = "NÃO INFORMADO"
-
-    # CONSTRUTORA / EMPREENDIMENTO
-    possiveis_construtora = ["CONSTRUTORA", "INCORPORADORA"]
-    possiveis_empreend = ["EMPREENDIMENTO", "PRODUTO", "IMÓVEL", "IMOVEL"]
-
-    col_construtora = None
-    for c in possiveis_construtora:
-        if c in df.columns:
-            col_construtora = c
-            break
-
-    col_empreend = None
-    for c in possiveis_empreend:
-        if c in df.columns:
-            col_empreend = c
-            break
-
-    if col_construtora is None:
-        df["CONSTRUTORA_BASE"] = "NÃO INFORMADO"
-    else:
-        df["CONSTRUTORA_BASE"] = (
-            df[col_construtora]
-            .fillna("NÃO INFORMADO")
-            .astype(str)
-            .str.upper()
-            .str.strip()
-        )
-
-    if col_empreend is None:
-        df["EMPREENDIMENTO_BASE"] = "NÃO INFORMADO"
-    else:
-        df["EMPREENDIMENTO_BASE"] = (
-            df[col_empreend]
-            .fillna("NÃO INFORMADO")
-            .astype(str)
-            .str.upper()
-            .str.strip()
-        )
-
-    # STATUS BASE + SITUAÇÃO ORIGINAL
-    possiveis_cols_situacao = [
-        "SITUAÇÃO",
-        "SITUAÇÃO ATUAL",
-        "STATUS",
-        "SITUACAO",
-        "SITUACAO ATUAL",
-    ]
-    col_situacao = None
-    for c in possiveis_cols_situacao:
-        if c in df.columns:
-            col_situacao = c
-            break
-
-    df["STATUS_BASE"] = ""
-    if col_situacao:
-        status = df[col_situacao].fillna("").astype(str).str.upper()
-        df.loc[status.str.contains("EM ANÁLISE"), "STATUS_BASE"] = "EM ANÁLISE"
-        df.loc[status.str.contains("REANÁLISE"), "STATUS_BASE"] = "REANÁLISE"
-        df.loc[status.str.contains("APROV"), "STATUS_BASE"] = "APROVADO"
-        df.loc[status.str.contains("REPROV"), "STATUS_BASE"] = "REPROVADO"
-        df.loc[status.str.contains("VENDA GERADA"), "STATUS_BASE"] = "VENDA GERADA"
-        df.loc[status.str.contains("VENDA INFORMADA"), "STATUS_BASE"] = "VENDA INFORMADA"
-
-        df["SITUACAO_ORIGINAL"] = (
-            df[col_situacao].fillna("").astype(str).str.upper().str.strip()
-        )
-    else:
-        df["SITUACAO_ORIGINAL"] = "NÃO INFORMADO"
-
-    # OBSERVAÇÕES / VGV
-    if "OBSERVAÇÕES" in df.columns:
-        df["OBSERVACOES_RAW"] = (
-            df["OBSERVAÇÕES"].fillna("").astype(str).str.strip()
-        )
-        df["VGV"] = pd.to_numeric(df["OBSERVAÇÕES"], errors="coerce").fillna(0.0)
-    else:
-        df["OBSERVACOES_RAW"] = ""
-        df["VGV"] = 0.0
-
-    # NOME / CPF
-    possiveis_nome = ["NOME", "CLIENTE", "NOME CLIENTE", "NOME DO CLIENTE"]
-    possiveis_cpf = ["CPF", "CPF CLIENTE", "CPF DO CLIENTE"]
-
-    col_nome = None
-    for c in possiveis_nome:
-        if c in df.columns:
-            col_nome = c
-            break
-
-    col_cpf = None
-    for c in possiveis_cpf:
-        if c in df.columns:
-            col_cpf = c
-            break
-
-    if col_nome is None:
-        df["NOME_CLIENTE_BASE"] = "NÃO INFORMADO"
-    else:
-        df["NOME_CLIENTE_BASE"] = (
-            df[col_nome].fillna("NÃO INFORMADO").astype(str).str.upper().str.strip()
-        )
-
-    if col_cpf is None:
-        df["CPF_CLIENTE_BASE"] = ""
-    else:
-        df["CPF_CLIENTE_BASE"] = (
-            df[col_cpf]
-            .fillna("")
-            .astype(str)
-            .str.replace(r"\D", "", regex=True)
-        )
-
-    return df
+    return planilha_normalizada("padrao")
 
 
 df = carregar_dados()
@@ -416,44 +266,23 @@ if termo_busca.strip():
         else:
             st.markdown("### 💳 Detalhes por cliente (cards)")
 
-            # Função para checar se uma observação é numérica
-            def observacao_e_numero(txt: str) -> bool:
-                if not txt:
-                    return False
-                t = (
-                    txt.upper()
-                    .replace("R$", "")
-                    .replace(".", "")
-                    .replace(",", "")
-                    .replace(" ", "")
-                )
-                return t.isdigit()
+            # Dados de todos os clientes da busca, calculados de uma vez
+            detalhes = detalhes_por_cliente(df_resultado)
 
-            # Cards (mesmo layout da página Clientes MR)
-            for _, row in resumo.sort_values(
-                ["VENDAS", "VGV"], ascending=False
-            ).iterrows():
+            # Cards (mesmo layout da página Clientes MR), paginados
+            resumo_ordenado = resumo.sort_values(["VENDAS", "VGV"], ascending=False)
+            for _, row in paginar(resumo_ordenado, key="pagina_cards_analise").iterrows():
                 chave = row["CHAVE_CLIENTE"]
-                df_cli = df_resultado[df_resultado["CHAVE_CLIENTE"] == chave].copy()
-
-                # Ordena por data para pegar última movimentação
-                df_cli = df_cli.sort_values("DIA")
-                ultima_linha = df_cli.iloc[-1]
-
-                ult_constr = ultima_linha.get("CONSTRUTORA_BASE", "NÃO INFORMADO")
-                ult_empr = ultima_linha.get("EMPREENDIMENTO_BASE", "NÃO INFORMADO")
-                ult_corretor = ultima_linha.get("CORRETOR", "NÃO INFORMADO")
-
-                obs_validas = [
-                    obs
-                    for obs in df_cli["OBSERVACOES_RAW"].fillna("")
-                    if obs and not observacao_e_numero(obs)
-                ]
-                ultima_obs = obs_validas[-1] if obs_validas else ""
-
-                analises_em = (df_cli["STATUS_BASE"] == "EM ANÁLISE").sum()
-                reanalises = (df_cli["STATUS_BASE"] == "REANÁLISE").sum()
-                analises_total = analises_em + reanalises
+                det = detalhes.loc[chave]
+                ult_constr = det["ULT_CONSTRUTORA"]
+                ult_empr = det["ULT_EMPREENDIMENTO"]
+                ult_corretor = det["ULT_CORRETOR"]
+
+                ultima_obs = det["ULT_OBS"]
+
+                analises_em = det["ANALISES_EM"]
+                reanalises = det["REANALISES"]
+                analises_total = det["ANALISES_TOTAL"]
 
                 st.markdown("---")
                 st.markdown(f"##### 👤 {row['NOME']}")
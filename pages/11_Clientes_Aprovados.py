@@ -2,6 +2,9 @@ import streamlit as st
 import pandas as pd
 from datetime import date, timedelta
 
+from utils.cards_clientes import detalhes_por_cliente, paginar
+from utils.planilha_normalizada import planilha_normalizada
+
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -43,167 +46,11 @@ with col_tit:
     )
 
 # ---------------------------------------------------------
-# FUNÇÃO AUXILIAR PARA LIMPAR DATA
-# ---------------------------------------------------------
-def limpar_para_data(serie):
-    dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
-    return dt.dt.date
-
-# ---------------------------------------------------------
-# CONFIG: LINK DA PLANILHA (MESMO DA PÁGINA CLIENTES EM ANÁLISE)
-# ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
+# CARREGAR E PREPARAR DADOS (PIPELINE COMPARTILHADO)
+# (SITUACAO_ORIGINAL do jeito que está na planilha)
 # ---------------------------------------------------------
-# CARREGAR E PREPARAR DADOS
-# ---------------------------------------------------------
-@st.cache_data(ttl=60)
 def carregar_dados():
-    df = pd.read_csv(CSV_URL)
-
-    df.columns = [c.strip().upper() for c in df.columns]
-
-    # DATA / DIA
-    if "DATA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DATA"])
-    elif "DIA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DIA"])
-    else:
-        df["DIA"] = pd.NaT
-
-    # EQUIPE / CORRETOR
-    for col in ["EQUIPE", "CORRETOR"]:
-        if col in df.columns:
-            df[col] = (
-                df[col]
-                .fillna("NÃO INFORMADO")
-                .astype(str)
-                .str.upper()
-                .str.strip()
-            )
-        else:
-            df[col] = "NÃO INFORMADO"
-
-    # CONSTRUTORA / EMPREENDIMENTO
-    possiveis_construtora = ["CONSTRUTORA", "INCORPORADORA"]
-    possiveis_empreend = ["EMPREENDIMENTO", "PRODUTO", "IMÓVEL", "IMOVEL"]
-
-    col_construtora = next(
-        (c for c in possiveis_construtora if c in df.columns), None
-    )
-    col_empreend = next((c for c in possiveis_empreend if c in df.columns), None)
-
-    if col_construtora is None:
-        df["CONSTRUTORA_BASE"] = "NÃO INFORMADO"
-    else:
-        df["CONSTRUTORA_BASE"] = (
-            df[col_construtora]
-            .fillna("NÃO INFORMADO")
-            .astype(str)
-            .str.upper()
-            .str.strip()
-        )
-
-    if col_empreend is None:
-        df["EMPREENDIMENTO_BASE"] = "NÃO INFORMADO"
-    else:
-        df["EMPREENDIMENTO_BASE"] = (
-            df[col_empreend]
-            .fillna("NÃO INFORMADO")
-            .astype(str)
-            .str.upper()
-            .str.strip()
-        )
-
-    # STATUS BASE + SITUAÇÃO ORIGINAL (EXATAMENTE COMO NA PLANILHA)
-    possiveis_cols_situacao = [
-        "SITUAÇÃO",
-        "SITUAÇÃO ATUAL",
-        "STATUS",
-        "SITUACAO",
-        "SITUACAO ATUAL",
-    ]
-    col_situacao = next(
-        (c for c in possiveis_cols_situacao if c in df.columns), None
-    )
-
-    df["STATUS_BASE"] = ""
-    if col_situacao:
-        # guarda o texto original (do jeito da planilha)
-        status_original = df[col_situacao].fillna("").astype(str).str.strip()
-        status_upper = status_original.str.upper()
-
-        df.loc[status_upper.str.contains("EM ANÁLISE"), "STATUS_BASE"] = "EM ANÁLISE"
-        df.loc[status_upper.str.contains("REANÁLISE"), "STATUS_BASE"] = "REANÁLISE"
-
-        # APROVADOS
-        # considera:
-        # - APROVAÇÃO
-        # - APROVADO BACEN
-        # - APROVADO COM RESTRIÇÃO
-        df.loc[
-            status_upper.str.contains(r"\bAPROVAÇÃO\b", regex=True)
-            | status_upper.str.contains("APROVADO BACEN", regex=False)
-            | status_upper.str.contains("APROVADO COM RESTRIÇÃO", regex=False),
-            "STATUS_BASE"
-        ] = "APROVADO"
-
-        df.loc[status_upper.str.contains("REPROV"), "STATUS_BASE"] = "REPROVADO"
-        df.loc[status_upper.str.contains("VENDA GERADA"), "STATUS_BASE"] = "VENDA GERADA"
-        df.loc[status_upper.str.contains("VENDA INFORMADA"), "STATUS_BASE"] = "VENDA INFORMADA"
-
-        # aqui vai exatamente o que está na planilha
-        df["SITUACAO_ORIGINAL"] = status_original
-    else:
-        df["SITUACAO_ORIGINAL"] = "NÃO INFORMADO"
-
-    # OBS / VGV
-    if "OBSERVAÇÕES" in df.columns:
-        df["OBSERVACOES_RAW"] = (
-            df["OBSERVAÇÕES"].fillna("").astype(str).str.strip()
-        )
-        df["VGV"] = pd.to_numeric(df["OBSERVAÇÕES"], errors="coerce").fillna(0.0)
-    else:
-        df["OBSERVACOES_RAW"] = ""
-        df["VGV"] = 0.0
-
-    # NOME / CPF
-    possiveis_nome = ["NOME", "CLIENTE", "NOME CLIENTE", "NOME DO CLIENTE"]
-    possiveis_cpf = ["CPF", "CPF CLIENTE", "CPF DO CLIENTE"]
-
-    col_nome = next((c for c in possiveis_nome if c in df.columns), None)
-    col_cpf = next((c for c in possiveis_cpf if c in df.columns), None)
-
-    if col_nome is None:
-        df["NOME_CLIENTE_BASE"] = "NÃO INFORMADO"
-    else:
-        df["NOME_CLIENTE_BASE"] = (
-            df[col_nome]
-            .fillna("NÃO INFORMADO")
-            .astype(str)
-            .str.upper()
-            .str.strip()
-        )
-
-    if col_cpf is None:
-        df["CPF_CLIENTE_BASE"] = ""
-    else:
-        df["CPF_CLIENTE_BASE"] = (
-            df[col_cpf]
-            .fillna("")
-            .astype(str)
-            .str.replace(r"\D", "", regex=True)
-        )
-
-    df["CHAVE_CLIENTE"] = (
-        df["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-        + " | "
-        + df["CPF_CLIENTE_BASE"].fillna("")
-    )
-
-    return df
+    return planilha_normalizada("aprovados", situacao_original="strip")
 
 
 df = carregar_dados()
@@ -485,46 +332,23 @@ if termo_busca.strip():
             # DETALHAMENTO POR CLIENTE
             st.markdown("### 📂 Detalhamento por cliente")
 
-            def observacao_e_numero(txt: str) -> bool:
-                if not txt:
-                    return False
-                t = (
-                    txt.upper()
-                    .replace("R$", "")
-                    .replace(".", "")
-                    .replace(",", "")
-                    .replace(" ", "")
-                )
-                return t.isdigit()
-
-            for _, row in resumo.sort_values(
-                ["VENDAS", "VGV"], ascending=False
-            ).iterrows():
+            # Dados de todos os clientes da busca, calculados de uma vez
+            detalhes = detalhes_por_cliente(df_resultado_ordenado)
+
+            resumo_ordenado = resumo.sort_values(["VENDAS", "VGV"], ascending=False)
+            for _, row in paginar(resumo_ordenado, key="pagina_cards_aprovados").iterrows():
                 chave = row["CHAVE_CLIENTE"]
-                df_cli = df_resultado_ordenado[
-                    df_resultado_ordenado["CHAVE_CLIENTE"] == chave
-                ].copy()
-
-                df_cli = df_cli.sort_values("DIA")
-                ultima_linha = df_cli.iloc[-1]
-
-                ult_constr = ultima_linha.get("CONSTRUTORA_BASE", "NÃO INFORMADO")
-                ult_empr = ultima_linha.get("EMPREENDIMENTO_BASE", "NÃO INFORMADO")
-                ult_corretor = ultima_linha.get("CORRETOR", "NÃO INFORMADO")
-                ult_status_original = ultima_linha.get(
-                    "SITUACAO_ORIGINAL", row["ULT_STATUS"]
-                )
-
-                obs_validas = [
-                    obs
-                    for obs in df_cli["OBSERVACOES_RAW"].fillna("")
-                    if obs and not observacao_e_numero(obs)
-                ]
-                ultima_obs = obs_validas[-1] if obs_validas else ""
-
-                analises_em = (df_cli["STATUS_BASE"] == "EM ANÁLISE").sum()
-                reanalises = (df_cli["STATUS_BASE"] == "REANÁLISE").sum()
-                analises_total = analises_em + reanalises
+                det = detalhes.loc[chave]
+                ult_constr = det["ULT_CONSTRUTORA"]
+                ult_empr = det["ULT_EMPREENDIMENTO"]
+                ult_corretor = det["ULT_CORRETOR"]
+                ult_status_original = det["ULT_SITUACAO"] or row["ULT_STATUS"]
+
+                ultima_obs = det["ULT_OBS"]
+
+                analises_em = det["ANALISES_EM"]
+                reanalises = det["REANALISES"]
+                analises_total = det["ANALISES_TOTAL"]
 
                 st.markdown("---")
                 st.markdown(f"##### 👤 {row['NOME']}")
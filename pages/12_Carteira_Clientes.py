@@ -3,7 +3,6 @@ from pathlib import Path
 from datetime import timedelta
 
 import streamlit as st
-from streamlit_autorefresh import st_autorefresh
 import pandas as pd
 
 # =========================================================
@@ -14,7 +13,9 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
 from utils.bootstrap import iniciar_app
-from utils.data_loader import carregar_dados_planilha
+from utils.data_loader import carregar_dados_planilha, versao_dados
+from utils.estado_clientes import ultima_linha_por_chave
+from utils.feed_versoes import acompanhar_fontes
 
 # =========================================================
 # CONFIG
@@ -24,8 +25,8 @@ st.set_page_config(
     page_icon="📂",
     layout="wide"
 )
-# Auto refresh
-st_autorefresh(interval=30 * 1000, key="auto_refresh_carteira")
+# Auto refresh (só quando a planilha mudar)
+acompanhar_fontes(["analises"], intervalo_s=30, key="auto_refresh_carteira")
 
 iniciar_app()
 
@@ -58,8 +59,15 @@ with col_title:
 # =========================================================
 # LOAD DATA (BLINDADO PARA DATA)
 # =========================================================
-@st.cache_data(ttl=60)
+# preparo guardado por versão da planilha: a recarga disparada pelo feed
+# já encontra a versão nova (com ttl, voltaria o frame antigo)
 def carregar():
+    versao = versao_dados(carregar_dados_planilha(colunas=[]))
+    return preparar(versao)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def preparar(versao):
     df = carregar_dados_planilha()
     df.columns = df.columns.str.upper().str.strip()
 
@@ -215,15 +223,7 @@ df_visivel = df_visivel[
 # =========================================================
 # ÚLTIMA SITUAÇÃO POR CLIENTE
 # =========================================================
-def ultima_linha(grupo: pd.DataFrame) -> pd.Series:
-    return grupo.sort_values("DATA").iloc[-1]
-
-
-df_resumo = (
-    df_visivel.groupby(["CLIENTE", "CPF"], as_index=False)
-    .apply(ultima_linha)
-    .reset_index(drop=True)
-)
+df_resumo = ultima_linha_por_chave(df_visivel, ["CLIENTE", "CPF"], ordem="DATA")
 
 # =========================================================
 # FILTRO POR SITUAÇÃO
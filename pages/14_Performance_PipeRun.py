@@ -6,6 +6,7 @@ import streamlit as st
 
 from utils.bootstrap import iniciar_app
 from utils.data_loader import carregar_dados_planilha
+from utils.diagnostico import marcar_cache_miss, rastrear
 from utils.piperun_client import PiperunClient, date_params, get_piperun_base_url, get_piperun_token
 from utils.piperun_metrics import build_performance, build_reference_maps, normalize_id, normalize_text
 
@@ -644,6 +645,7 @@ def fetch_person_details(client: PiperunClient, person_ids: list[str]) -> pd.Dat
     return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
 
+@rastrear("pagina14.carregar_piperun", cache=True)
 @st.cache_data(ttl=300, show_spinner=False)
 def carregar_piperun(
     token: str,
@@ -655,6 +657,7 @@ def carregar_piperun(
     per_page: int,
     detail_limit: int,
 ):
+    marcar_cache_miss()
     client = PiperunClient(token=token, base_url=base_url)
     params = date_params(data_ini, data_fim) if usar_filtro_api else {}
 
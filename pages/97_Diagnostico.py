@@ -0,0 +1,125 @@
+import streamlit as st
+
+from utils import diagnostico
+
+# =========================================================
+# BLOQUEIO SEM LOGIN / SOMENTE ADMIN
+# =========================================================
+if "logado" not in st.session_state or not st.session_state.logado:
+    st.warning("🔒 Acesso restrito. Faça login para continuar.")
+    st.stop()
+
+if st.session_state.get("perfil") != "admin":
+    st.warning("🔒 Página disponível apenas para administradores.")
+    st.stop()
+
+# =========================================================
+# CONFIG DA PÁGINA
+# =========================================================
+st.set_page_config(
+    page_title="Diagnóstico do Pipeline",
+    page_icon="🩺",
+    layout="wide"
+)
+
+st.title("🩺 Diagnóstico do Pipeline de Dados")
+st.caption(
+    "Tempo, linhas, bytes e cache de cada etapa (PipeRun, planilha, notificações). "
+    "Os registros ficam na memória do servidor e valem para todas as sessões."
+)
+
+# =========================================================
+# CONTROLES
+# =========================================================
+col_status, col_limpar, col_gravar = st.columns([3, 1, 1])
+
+with col_status:
+    ligado = st.toggle("Rastreamento ligado", value=diagnostico.ativo())
+    if ligado != diagnostico.ativo():
+        diagnostico.ativar(ligado)
+        st.rerun()
+
+with col_limpar:
+    if st.button("🧹 Limpar registros", use_container_width=True):
+        diagnostico.limpar()
+        st.rerun()
+
+with col_gravar:
+    if st.button("💾 Gravar em disco", use_container_width=True):
+        diagnostico.exportar_jsonl(diagnostico.ARQ_EXPORT)
+        st.success(f"Gravado em {diagnostico.ARQ_EXPORT}")
+
+if not diagnostico.ativo():
+    st.info(
+        "Rastreamento desligado. Ligue acima (ou defina MR_DIAGNOSTICO=1) "
+        "e navegue pelas páginas para coletar as medições."
+    )
+
+df_spans = diagnostico.spans_dataframe()
+
+if df_spans.empty:
+    st.info("Nenhuma medição registrada ainda.")
+    st.stop()
+
+# =========================================================
+# RESUMO POR ETAPA
+# =========================================================
+st.markdown("### ⏱️ Resumo por etapa")
+
+resumo = diagnostico.resumo_por_etapa(df_spans)
+
+c1, c2, c3 = st.columns(3)
+c1.metric("Medições", len(df_spans))
+c2.metric("Etapas distintas", resumo["nome"].nunique())
+c3.metric("Erros", int(resumo["erros"].sum()))
+
+st.dataframe(
+    resumo,
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        "nome": "Etapa",
+        "chamadas": "Chamadas",
+        "total_ms": st.column_config.NumberColumn("Total (ms)", format="%.1f"),
+        "media_ms": st.column_config.NumberColumn("Média (ms)", format="%.1f"),
+        "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+        "max_ms": st.column_config.NumberColumn("Máx (ms)", format="%.1f"),
+        "linhas": "Linhas",
+        "hits": "Cache hit",
+        "misses": "Cache miss",
+        "erros": "Erros",
+    },
+)
+
+# =========================================================
+# MEDIÇÕES RECENTES
+# =========================================================
+st.markdown("### 📋 Medições recentes")
+
+etapas = sorted(df_spans["nome"].unique())
+etapas_sel = st.multiselect("Etapas", etapas, default=etapas)
+
+df_view = df_spans[df_spans["nome"].isin(etapas_sel)].sort_values("inicio", ascending=False)
+
+st.dataframe(
+    df_view[["inicio", "nome", "duracao_ms", "linhas", "bytes", "cache", "erro", "atributos", "span_id", "pai_id"]],
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        "inicio": st.column_config.DatetimeColumn("Início (UTC)", format="DD/MM/YYYY HH:mm:ss"),
+        "nome": "Etapa",
+        "duracao_ms": st.column_config.NumberColumn("Duração (ms)", format="%.1f"),
+        "linhas": "Linhas",
+        "bytes": "Bytes",
+        "cache": "Cache",
+        "erro": "Erro",
+        "atributos": "Atributos",
+    },
+)
+
+st.download_button(
+    "⬇️ Exportar JSON lines",
+    data=diagnostico.exportar_jsonl(),
+    file_name="diagnostico_spans.jsonl",
+    mime="application/jsonl",
+)
@@ -1,60 +1,29 @@
 import streamlit as st
 import uuid
-import json
-from pathlib import Path
 
 from login import tela_login
 from utils.data_loader import carregar_dados_planilha
-from utils.notificacoes_json import processar_eventos
-
-
-# -------------------------------------------------
-# CAMINHO DO JSON DE NOTIFICAÇÕES
-# -------------------------------------------------
-CAMINHO_NOTIFICACOES = Path("data/notificacoes.json")
+from utils.notificacoes_db import marcar_como_lido as _marcar_lido_db
+from utils.notificacoes_db import notificacoes_pendentes
+from utils.notificacoes_json import COLUNAS_EVENTO, processar_eventos_por_versao
 
 
 # -------------------------------------------------
 # UTILIDADES
 # -------------------------------------------------
 def carregar_notificacoes_corretor(nome_corretor: str) -> list:
-    if not CAMINHO_NOTIFICACOES.exists():
-        return []
-
     try:
-        with open(CAMINHO_NOTIFICACOES, "r", encoding="utf-8") as f:
-            data = json.load(f) or {}
+        return notificacoes_pendentes(nome_corretor)
     except Exception:
         return []
 
-    return [
-        n for n in data.get(nome_corretor.upper(), [])
-        if not n.get("lido", False)
-    ]
-
 
 def marcar_como_lido(nome_corretor: str, alerta_id: str):
-    if not CAMINHO_NOTIFICACOES.exists():
-        return
-
     try:
-        with open(CAMINHO_NOTIFICACOES, "r", encoding="utf-8") as f:
-            data = json.load(f) or {}
+        _marcar_lido_db(nome_corretor, alerta_id)
     except Exception:
         return
 
-    lista = data.get(nome_corretor.upper(), [])
-
-    for n in lista:
-        if n.get("id") == alerta_id:
-            n["lido"] = True
-            break
-
-    data[nome_corretor.upper()] = lista
-
-    with open(CAMINHO_NOTIFICACOES, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
 
 # -------------------------------------------------
 # BOOTSTRAP GLOBAL
@@ -63,7 +32,7 @@ def iniciar_app():
     """
     Bootstrap global do app:
     - controla login
-    - processa eventos (JSON)
+    - processa eventos (SQLite)
     - exibe notificações persistentes
     """
 
@@ -87,9 +56,10 @@ def iniciar_app():
 
     # -------------------------------------------------
     # CARREGA BASE E PROCESSA EVENTOS
+    # (uma vez por versão dos dados, não por página)
     # -------------------------------------------------
-    df = carregar_dados_planilha()
-    processar_eventos(df)
+    df = carregar_dados_planilha(colunas=COLUNAS_EVENTO)
+    processar_eventos_por_versao(df)
 
     # -------------------------------------------------
     # CONTEXTO DO USUÁRIO
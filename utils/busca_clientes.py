@@ -0,0 +1,256 @@
+import bisect
+import hashlib
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import pandas as pd
+
+from utils.commercial_repository import normalize_text
+from utils.diagnostico import marcar_cache_miss, rastrear
+
+# =========================================================
+# ÍNDICE DE BUSCA DE CLIENTES
+# =========================================================
+# Montado uma vez por versão dos dados e compartilhado entre as sessões:
+# - CPF (só dígitos) -> linhas;
+# - nome sem acento, por palavra, com busca por prefixo
+#   ("JOS SIL" encontra "JOSÉ DA SILVA");
+# - quando o prefixo não acha nada, trigramas das palavras apontam os
+#   candidatos e a distância de edição decide: até 1 erro em palavras de 3 a
+#   7 letras e até 2 nas maiores ("JOZE" -> "JOSE", "SOUSA" -> "SOUZA",
+#   "SYLVA" -> "SILVA"). Jaccard de trigramas sozinho não serve para nomes
+#   curtos: uma letra trocada em "JOSE" já derruba a similaridade para 0,25.
+# As consultas devolvem posições de linha (para df.iloc) e já aplicam o
+# filtro de corretor, sem varrer a base.
+
+SIMILARIDADE_MINIMA = 0.45
+MAX_VERSOES = 4
+
+_RE_PALAVRA = re.compile(r"[A-Z0-9]+")
+
+_CACHE: "OrderedDict[tuple, IndiceClientes]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def _so_digitos(valor: str) -> str:
+    return re.sub(r"\D", "", str(valor or ""))
+
+
+def _palavras(texto: str) -> list:
+    return _RE_PALAVRA.findall(normalize_text(texto))
+
+
+def _trigramas(palavra: str) -> set:
+    p = f"  {palavra} "
+    return {p[i:i + 3] for i in range(len(p) - 2)}
+
+
+def _erros_tolerados(tamanho: int) -> int:
+    if tamanho < 3:
+        return 0
+    return 1 if tamanho <= 7 else 2
+
+
+def _distancia_limitada(a: str, b: str, limite: int) -> int:
+    """
+    Distância de edição (inserção, remoção, troca e inversão de letras
+    vizinhas) entre ``a`` e ``b``; para de contar ao passar de ``limite`` e
+    devolve ``limite + 1``.
+    """
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        atual = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            custo = 0 if ca == cb else 1
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+            if anterior2 is not None and i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                atual[j] = min(atual[j], anterior2[j - 2] + 1)
+        if min(atual) > limite:
+            return limite + 1
+        anterior2, anterior = anterior, atual
+    return min(anterior[-1], limite + 1)
+
+
+def palavras_parecidas(termo: str, palavra: str) -> bool:
+    """
+    ``termo`` digitado com poucos erros para ``palavra``.
+
+    >>> palavras_parecidas("JOZE", "JOSE")
+    True
+    >>> palavras_parecidas("SOUSA", "SOUZA")
+    True
+    >>> palavras_parecidas("SYLVA", "SILVA")
+    True
+    >>> palavras_parecidas("JOZE", "JOAO")
+    False
+    """
+    tris, tris_palavra = _trigramas(termo), _trigramas(palavra)
+    comuns = len(tris & tris_palavra)
+    if comuns / (len(tris) + len(tris_palavra) - comuns) >= SIMILARIDADE_MINIMA:
+        return True
+    limite = _erros_tolerados(len(termo))
+    return limite > 0 and _distancia_limitada(termo, palavra, limite) <= limite
+
+
+class IndiceClientes:
+    def __init__(self, df: pd.DataFrame, col_nome: str, col_cpf: str, col_corretor: str):
+        n = len(df)
+
+        # ---------- corretor: código por linha ----------
+        corretores = df[col_corretor].fillna("").astype(str).str.upper().str.strip()
+        codigos, self._corretores = pd.factorize(corretores)
+        self._codigo_corretor = codigos
+        self._cod_por_corretor = {c: i for i, c in enumerate(self._corretores)}
+
+        # ---------- CPF -> linhas ----------
+        cpfs = df[col_cpf].fillna("").astype(str).str.replace(r"\D", "", regex=True).to_numpy()
+        self._por_cpf = {
+            cpf: np.asarray(pos, dtype=np.int64)
+            for cpf, pos in pd.Series(np.arange(n)).groupby(cpfs).groups.items()
+            if cpf
+        }
+
+        # ---------- nomes distintos -> linhas ----------
+        nome_ids, nomes = pd.factorize(df[col_nome].fillna("").astype(str))
+        ordem = np.argsort(nome_ids, kind="stable")
+        cortes = np.searchsorted(nome_ids[ordem], np.arange(len(nomes) + 1))
+        self._linhas_por_nome = [ordem[cortes[i]:cortes[i + 1]] for i in range(len(nomes))]
+
+        # ---------- palavra -> nomes ----------
+        por_palavra = defaultdict(set)
+        for nome_id, nome in enumerate(nomes):
+            for palavra in _palavras(nome):
+                por_palavra[palavra].add(nome_id)
+
+        self._por_palavra = {p: frozenset(ids) for p, ids in por_palavra.items()}
+        self._palavras = sorted(self._por_palavra)
+
+        # ---------- trigrama -> palavras ----------
+        por_trigrama = defaultdict(set)
+        for palavra in self._palavras:
+            for tri in _trigramas(palavra):
+                por_trigrama[tri].add(palavra)
+        self._por_trigrama = {t: frozenset(ps) for t, ps in por_trigrama.items()}
+
+        self.n_linhas = n
+
+    # -----------------------------------------------------
+    # CONSULTAS INTERNAS
+    # -----------------------------------------------------
+    def _nomes_com_prefixo(self, prefixo: str) -> set:
+        inicio = bisect.bisect_left(self._palavras, prefixo)
+        fim = bisect.bisect_left(self._palavras, prefixo + "\uffff")
+        ids = set()
+        for palavra in self._palavras[inicio:fim]:
+            ids |= self._por_palavra[palavra]
+        return ids
+
+    def _nomes_parecidos(self, termo: str) -> set:
+        # candidatos: palavras com algum trigrama em comum
+        candidatas = set()
+        for tri in _trigramas(termo):
+            candidatas |= self._por_trigrama.get(tri, frozenset())
+
+        ids = set()
+        for palavra in candidatas:
+            if palavras_parecidas(termo, palavra):
+                ids |= self._por_palavra[palavra]
+        return ids
+
+    def _filtrar_corretor(self, linhas: np.ndarray, corretor: str | None) -> np.ndarray:
+        if corretor is None or linhas.size == 0:
+            return linhas
+        cod = self._cod_por_corretor.get(str(corretor).upper().strip())
+        if cod is None:
+            return linhas[:0]
+        return linhas[self._codigo_corretor[linhas] == cod]
+
+    # -----------------------------------------------------
+    # API
+    # -----------------------------------------------------
+    def buscar_cpf(self, cpf: str, corretor: str | None = None) -> np.ndarray:
+        linhas = self._por_cpf.get(_so_digitos(cpf), np.empty(0, dtype=np.int64))
+        return self._filtrar_corretor(linhas, corretor)
+
+    def buscar_nome(self, nome: str, corretor: str | None = None, aproximado: bool = True) -> np.ndarray:
+        """
+        Todas as palavras digitadas precisam casar (como prefixo) com alguma
+        palavra do nome. Se nada casar e ``aproximado``, tenta por trigramas.
+        """
+        termos = _palavras(nome)
+        if not termos:
+            return np.empty(0, dtype=np.int64)
+
+        ids = None
+        for termo in termos:
+            achados = self._nomes_com_prefixo(termo)
+            ids = achados if ids is None else ids & achados
+            if not ids:
+                break
+
+        if not ids and aproximado:
+            ids = None
+            for termo in termos:
+                achados = self._nomes_com_prefixo(termo) | self._nomes_parecidos(termo)
+                ids = achados if ids is None else ids & achados
+                if not ids:
+                    break
+
+        if not ids:
+            return np.empty(0, dtype=np.int64)
+
+        linhas = np.concatenate([self._linhas_por_nome[i] for i in ids])
+        return self._filtrar_corretor(np.sort(linhas), corretor)
+
+    def buscar(self, cpf: str = "", nome: str = "", corretor: str | None = None) -> np.ndarray:
+        """Posições (para ``df.iloc``) que casam com o CPF OU com o nome."""
+        partes = []
+        if cpf and _so_digitos(cpf):
+            partes.append(self.buscar_cpf(cpf, corretor))
+        if nome and nome.strip():
+            partes.append(self.buscar_nome(nome, corretor))
+        if not partes:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(partes))
+
+
+def _chave_versao(df: pd.DataFrame, colunas: tuple) -> tuple:
+    versao = df.attrs.get("versao_dados")
+    if not versao:
+        valores = pd.util.hash_pandas_object(df[list(colunas)], index=False).to_numpy()
+        versao = hashlib.sha1(valores.tobytes()).hexdigest()[:16]
+    return (versao, colunas, len(df))
+
+
+@rastrear("clientes.indice_busca", cache=True)
+def indice_clientes(
+    df: pd.DataFrame,
+    col_nome: str = "NOME_CLIENTE_BASE",
+    col_cpf: str = "CPF_CLIENTE_BASE",
+    col_corretor: str = "CORRETOR",
+) -> IndiceClientes:
+    """Índice de busca de ``df``, reaproveitado enquanto os dados não mudarem."""
+    colunas = (col_nome, col_cpf, col_corretor)
+    chave = _chave_versao(df, colunas)
+
+    with _LOCK:
+        indice = _CACHE.get(chave)
+        if indice is not None:
+            _CACHE.move_to_end(chave)
+            return indice
+
+    marcar_cache_miss()
+    indice = IndiceClientes(df, col_nome, col_cpf, col_corretor)
+
+    with _LOCK:
+        _CACHE[chave] = indice
+        while len(_CACHE) > MAX_VERSOES:
+            _CACHE.popitem(last=False)
+
+    return indice
@@ -0,0 +1,100 @@
+import math
+
+import pandas as pd
+import streamlit as st
+
+from utils.estado_clientes import ultima_linha_por_chave
+
+# =========================================================
+# CARDS DE CLIENTES (09 / 10 / 11)
+# =========================================================
+# Os cards mostram, por cliente: dados da última movimentação, última
+# observação "de texto" e contagem de análises. Em vez de filtrar e ordenar
+# o resultado da busca para cada cliente, tudo é calculado de uma vez,
+# numa tabela indexada por CHAVE_CLIENTE (leitura O(1) por card).
+
+CARDS_POR_PAGINA = 10
+
+
+def observacoes_numericas(obs: pd.Series) -> pd.Series:
+    """True onde a observação é só um número/valor (ex.: 'R$ 250.000,00')."""
+    limpo = (
+        obs.fillna("").astype(str).str.upper()
+        .str.replace("R$", "", regex=False)
+        .str.replace(r"[., ]", "", regex=True)
+    )
+    return limpo.str.isdigit()
+
+
+def detalhes_por_cliente(df_resultado: pd.DataFrame, chave: str = "CHAVE_CLIENTE") -> pd.DataFrame:
+    """
+    Uma linha por cliente (índice = ``chave``) com:
+    ULT_CORRETOR, ULT_CONSTRUTORA, ULT_EMPREENDIMENTO, ULT_SITUACAO,
+    ULT_OBS, ANALISES_EM, REANALISES e ANALISES_TOTAL.
+    """
+    colunas = [
+        "ULT_CORRETOR", "ULT_CONSTRUTORA", "ULT_EMPREENDIMENTO", "ULT_SITUACAO",
+        "ULT_OBS", "ANALISES_EM", "REANALISES", "ANALISES_TOTAL",
+    ]
+    if df_resultado.empty:
+        return pd.DataFrame(columns=colunas, index=pd.Index([], name=chave))
+
+    def coluna(nome: str) -> pd.Series:
+        if nome in df_resultado.columns:
+            return df_resultado[nome]
+        return pd.Series("NÃO INFORMADO", index=df_resultado.index)
+
+    base = pd.DataFrame({
+        chave: df_resultado[chave],
+        "DIA": df_resultado["DIA"],
+        "STATUS_BASE": df_resultado["STATUS_BASE"],
+        "ULT_CORRETOR": coluna("CORRETOR"),
+        "ULT_CONSTRUTORA": coluna("CONSTRUTORA_BASE"),
+        "ULT_EMPREENDIMENTO": coluna("EMPREENDIMENTO_BASE"),
+        "ULT_SITUACAO": df_resultado.get("SITUACAO_ORIGINAL", pd.Series("", index=df_resultado.index)),
+        "OBS": df_resultado.get("OBSERVACOES_RAW", pd.Series("", index=df_resultado.index)).fillna(""),
+    })
+
+    # última movimentação
+    ultimas = ultima_linha_por_chave(base, chave, ordem="DIA").set_index(chave)
+
+    # última observação válida (texto, não número), na ordem das datas
+    validas = base[(base["OBS"] != "") & ~observacoes_numericas(base["OBS"])]
+    ult_obs = ultima_linha_por_chave(validas, chave, ordem="DIA").set_index(chave)["OBS"]
+
+    # contagens
+    grupos = base[chave]
+    analises_em = (base["STATUS_BASE"] == "EM ANÁLISE").groupby(grupos).sum()
+    reanalises = (base["STATUS_BASE"] == "REANÁLISE").groupby(grupos).sum()
+
+    detalhes = ultimas[["ULT_CORRETOR", "ULT_CONSTRUTORA", "ULT_EMPREENDIMENTO", "ULT_SITUACAO"]].copy()
+    detalhes["ULT_OBS"] = ult_obs.reindex(detalhes.index).fillna("")
+    detalhes["ANALISES_EM"] = analises_em.reindex(detalhes.index).fillna(0).astype(int)
+    detalhes["REANALISES"] = reanalises.reindex(detalhes.index).fillna(0).astype(int)
+    detalhes["ANALISES_TOTAL"] = detalhes["ANALISES_EM"] + detalhes["REANALISES"]
+    return detalhes[colunas]
+
+
+def paginar(df: pd.DataFrame, key: str, por_pagina: int = CARDS_POR_PAGINA) -> pd.DataFrame:
+    """Mostra o seletor de página e devolve só as linhas da página atual."""
+    total = len(df)
+    if total <= por_pagina:
+        return df
+
+    n_paginas = math.ceil(total / por_pagina)
+    col_pag, col_info = st.columns([1, 3])
+    with col_pag:
+        pagina = st.number_input(
+            "Página",
+            min_value=1,
+            max_value=n_paginas,
+            value=1,
+            step=1,
+            key=key,
+        )
+    inicio = (int(pagina) - 1) * por_pagina
+    fim = min(inicio + por_pagina, total)
+    with col_info:
+        st.caption(f"Mostrando {inicio + 1}–{fim} de {total} clientes ({n_paginas} páginas)")
+
+    return df.iloc[inicio:fim]
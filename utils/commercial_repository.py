@@ -8,6 +8,7 @@ from typing import Iterable
 
 import pandas as pd
 
+from utils.diagnostico import rastrear
 from utils.piperun_client import PiperunClient, date_params
 
 
@@ -596,8 +597,15 @@ def piperun_deals_to_commercial_df(
     return out
 
 
-def carregar_piperun(max_pages: int = 5, per_page: int = 100, data_ini: date | None = None, data_fim: date | None = None) -> pd.DataFrame:
-    client = PiperunClient()
+@rastrear("comercial.carregar_piperun")
+def carregar_piperun(
+    max_pages: int = 5,
+    per_page: int = 100,
+    data_ini: date | None = None,
+    data_fim: date | None = None,
+    client: PiperunClient | None = None,
+) -> pd.DataFrame:
+    client = client or PiperunClient()
     refs = fetch_piperun_reference_maps(client, per_page=per_page)
     activity_params = activity_date_params(data_ini, data_fim)
     actions = carregar_atividades_piperun(client, max_pages=max_pages, per_page=per_page, params=activity_params)
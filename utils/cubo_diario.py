@@ -0,0 +1,261 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import carregar_dados_planilha, versao_dados
+from utils.diagnostico import marcar_cache_miss, rastrear
+from utils.estado_clientes import status_final_map
+from utils.planilha_normalizada import NAO_INFORMADO, planilha_normalizada
+
+# =========================================================
+# CUBO DIÁRIO DA PLANILHA DE ANÁLISES
+# =========================================================
+# Contagens já agregadas por
+#   DIA × DATA_BASE × EQUIPE × CORRETOR × STATUS_BASE
+# (QTDE = linhas, CLIENTES = clientes distintos na célula), montadas uma vez
+# por versão dos dados e perfil de status. As páginas respondem filtros de
+# equipe / corretor / período / base fatiando o cubo, sem voltar às linhas.
+#
+# Venda única não é soma de células (é a última VENDA GERADA de cada cliente
+# dentro do recorte, sem quem desistiu), então o cubo guarda também o frame
+# pequeno dessas vendas, já ordenado por DIA: a deduplicação roda no recorte.
+#
+# Por cima do cubo fica o resumo por DATA_BASE (mês comercial), nos níveis
+# imobiliária / equipe / corretor: análises, aprovações, vendas únicas e VGV.
+# Ele é calculado uma vez por cubo, então comparar com as N bases anteriores
+# ou mostrar a tendência de 12 meses é consulta, não recálculo.
+#
+# Usado pelas páginas 01 (Análises Diárias) e 05 (Meta & Planejamento).
+
+DIMENSOES = ["DIA", "DATA_BASE", "DATA_BASE_LABEL", "EQUIPE", "CORRETOR", "STATUS_BASE"]
+COLUNAS_VENDA = ["DIA", "DATA_BASE", "DATA_BASE_LABEL", "EQUIPE", "CORRETOR", "CHAVE_CLIENTE", "VGV"]
+
+# métricas do resumo por base -> STATUS_BASE somados
+METRICAS_BASE = {
+    "ANALISES": ("EM ANÁLISE", "REANÁLISE"),
+    "ANALISES_REALIZADO": ("EM ANÁLISE",),
+    "APROVACOES": ("APROVADO",),
+}
+# nível do resumo -> coluna que o separa (None = imobiliária inteira)
+NIVEIS_BASE = {"IMOBILIARIA": None, "EQUIPE": "EQUIPE", "CORRETOR": "CORRETOR"}
+
+Status = Union[str, Iterable[str], None]
+
+
+def _lista(valor) -> Optional[list]:
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        return [valor]
+    return list(valor)
+
+
+def _mascara(df: pd.DataFrame, equipe, corretor, dia_ini, dia_fim, bases) -> np.ndarray:
+    mascara = np.ones(len(df), dtype=bool)
+    for coluna, valor in (("EQUIPE", equipe), ("CORRETOR", corretor), ("DATA_BASE_LABEL", bases)):
+        valores = _lista(valor)
+        if valores is not None:
+            mascara &= df[coluna].isin(valores).to_numpy()
+    if dia_ini is not None:
+        mascara &= (df["DIA"] >= pd.Timestamp(dia_ini)).to_numpy()
+    if dia_fim is not None:
+        mascara &= (df["DIA"] <= pd.Timestamp(dia_fim)).to_numpy()
+    return mascara
+
+
+@dataclass(frozen=True)
+class CuboDiario:
+    contagens: pd.DataFrame
+    vendas: pd.DataFrame
+    versao: str = ""
+
+    @property
+    def vazio(self) -> bool:
+        return self.contagens.empty
+
+    def fatiar(
+        self,
+        equipe=None,
+        corretor=None,
+        dia_ini=None,
+        dia_fim=None,
+        bases: Optional[Sequence[str]] = None,
+    ) -> "CuboDiario":
+        """
+        Recorte do cubo. ``equipe``/``corretor`` aceitam um valor ou lista;
+        ``dia_ini``/``dia_fim`` fecham o intervalo de DIA; ``bases`` são
+        rótulos de DATA_BASE_LABEL. ``None`` não filtra.
+        """
+        filtros = (equipe, corretor, dia_ini, dia_fim, bases)
+        if all(f is None for f in filtros):
+            return self
+        return CuboDiario(
+            self.contagens[_mascara(self.contagens, *filtros)],
+            self.vendas[_mascara(self.vendas, *filtros)],
+            self.versao,
+        )
+
+    def _com_status(self, status: Status) -> pd.DataFrame:
+        valores = _lista(status)
+        if valores is None:
+            return self.contagens
+        return self.contagens[self.contagens["STATUS_BASE"].isin(valores)]
+
+    def total(self, status: Status = None) -> int:
+        """Linhas do recorte com ``status`` (um ou vários STATUS_BASE)."""
+        return int(self._com_status(status)["QTDE"].sum())
+
+    def contagem_por(self, chaves, status: Status = None) -> pd.Series:
+        """QTDE somada por ``chaves`` (ex.: "DIA", ["EQUIPE", "DIA"])."""
+        return self._com_status(status).groupby(chaves)["QTDE"].sum()
+
+    def serie_diaria(self, status: Status = None) -> pd.Series:
+        return self.contagem_por("DIA", status).sort_index()
+
+    def vendas_unicas(self) -> pd.DataFrame:
+        """Última VENDA GERADA de cada cliente dentro do recorte."""
+        return self.vendas.drop_duplicates("CHAVE_CLIENTE", keep="last")
+
+    def serie_vendas(self) -> pd.Series:
+        return self.vendas_unicas().groupby("DIA").size().sort_index()
+
+    def bases(self) -> pd.DataFrame:
+        """DATA_BASE / DATA_BASE_LABEL distintas do recorte, em ordem."""
+        return (
+            self.contagens[["DATA_BASE", "DATA_BASE_LABEL"]]
+            .dropna()
+            .drop_duplicates()
+            .sort_values("DATA_BASE")
+            .reset_index(drop=True)
+        )
+
+    @cached_property
+    def _resumos_base(self) -> Dict[str, pd.DataFrame]:
+        return {nivel: _resumo_bases(self, coluna) for nivel, coluna in NIVEIS_BASE.items()}
+
+    def resumo_bases(self, equipe: Optional[str] = None, corretor: Optional[str] = None) -> pd.DataFrame:
+        """
+        Uma linha por DATA_BASE / DATA_BASE_LABEL (em ordem), com ANALISES
+        (análise + reanálise), ANALISES_REALIZADO (só EM ANÁLISE),
+        APROVACOES, VENDAS (únicas dentro da base) e VGV das vendas, para a
+        imobiliária, uma ``equipe`` ou um ``corretor``.
+
+        Calculado uma vez por cubo: chame no cubo inteiro, não num recorte.
+        """
+        if corretor is not None:
+            resumo = self._resumos_base["CORRETOR"]
+            resumo = resumo[resumo["CORRETOR"] == corretor].drop(columns="CORRETOR")
+        elif equipe is not None:
+            resumo = self._resumos_base["EQUIPE"]
+            resumo = resumo[resumo["EQUIPE"] == equipe].drop(columns="EQUIPE")
+        else:
+            resumo = self._resumos_base["IMOBILIARIA"]
+        return resumo.reset_index(drop=True)
+
+
+# ---------------------------------------------------------
+# MONTAGEM
+# ---------------------------------------------------------
+def _resumo_bases(cubo: CuboDiario, coluna: Optional[str]) -> pd.DataFrame:
+    chaves = ["DATA_BASE", "DATA_BASE_LABEL"] + ([coluna] if coluna else [])
+
+    contagens = cubo.contagens
+    qtde = contagens["QTDE"]
+    metricas = pd.DataFrame(
+        {nome: qtde.where(contagens["STATUS_BASE"].isin(status), 0) for nome, status in METRICAS_BASE.items()}
+    )
+    resumo = pd.concat([contagens[chaves], metricas], axis=1).groupby(chaves).sum()
+
+    # venda única dentro de cada base (e equipe/corretor do nível)
+    vendas = (
+        cubo.vendas.drop_duplicates(chaves + ["CHAVE_CLIENTE"], keep="last")
+        .groupby(chaves)
+        .agg(VENDAS=("CHAVE_CLIENTE", "size"), VGV=("VGV", "sum"))
+    )
+    resumo = resumo.join(vendas, how="outer")
+    resumo = resumo.fillna(0).astype({nome: int for nome in [*METRICAS_BASE, "VENDAS"]})
+
+    return resumo.reset_index().sort_values(["DATA_BASE", "DATA_BASE_LABEL"], kind="stable")
+
+
+def montar_cubo(df: pd.DataFrame, status_final: Optional[pd.Series] = None) -> CuboDiario:
+    """
+    Agrega a planilha normalizada ``df``. Com ``status_final``
+    (CHAVE_CLIENTE -> STATUS_FINAL), monta também o frame de vendas sem os
+    clientes que desistiram.
+    """
+    base = pd.DataFrame({
+        "DIA": pd.to_datetime(df["DIA"], errors="coerce"),
+        "DATA_BASE": pd.to_datetime(df["DATA_BASE"], errors="coerce"),
+        "DATA_BASE_LABEL": df["DATA_BASE_LABEL"],
+        "EQUIPE": df["EQUIPE"],
+        "CORRETOR": df["CORRETOR"],
+        "STATUS_BASE": df["STATUS_BASE"].fillna(""),
+        "CHAVE_CLIENTE": df["CHAVE_CLIENTE"],
+        "VGV": df["VGV"] if "VGV" in df.columns else 0.0,
+    })
+
+    contagens = (
+        base.groupby(DIMENSOES, dropna=False)
+        .agg(QTDE=("CHAVE_CLIENTE", "size"), CLIENTES=("CHAVE_CLIENTE", "nunique"))
+        .reset_index()
+    )
+
+    vendas = base[base["STATUS_BASE"] == "VENDA GERADA"]
+    if status_final is not None:
+        vendas = vendas[vendas["CHAVE_CLIENTE"].map(status_final) != "DESISTIU"]
+    vendas = vendas[COLUNAS_VENDA].sort_values("DIA", kind="stable").reset_index(drop=True)
+
+    return CuboDiario(contagens, vendas, df.attrs.get("versao_dados", ""))
+
+
+# ---------------------------------------------------------
+# CACHE POR VERSÃO DOS DADOS
+# ---------------------------------------------------------
+MAX_VERSOES = 6
+
+_CACHE: "OrderedDict[tuple, CuboDiario]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+@rastrear("cubo.diario", cache=True)
+def cubo_diario(
+    perfil_status: str = "padrao",
+    escopo_vendas: Optional[str] = None,
+    padrao_corretor: str = NAO_INFORMADO,
+    _refresh_key=None,
+) -> CuboDiario:
+    """
+    Cubo diário da planilha de análises no ``perfil_status`` dado. Com
+    ``escopo_vendas`` (o mesmo de ``status_final_map``), o frame de vendas
+    exclui quem desistiu nesse escopo.
+
+    O cubo devolvido é compartilhado: fatie à vontade, mas não altere os
+    frames no lugar.
+    """
+    # só a versão: recorte sem colunas, sem copiar a planilha
+    versao = versao_dados(carregar_dados_planilha(_refresh_key=_refresh_key, colunas=[]))
+    chave = (versao, perfil_status, escopo_vendas, padrao_corretor)
+
+    with _LOCK:
+        pronto = _CACHE.get(chave)
+        if pronto is not None:
+            _CACHE.move_to_end(chave)
+            return pronto
+
+    marcar_cache_miss()
+    df = planilha_normalizada(perfil_status, padrao_corretor, _refresh_key=_refresh_key)
+    status_final = status_final_map(df, escopo=escopo_vendas) if escopo_vendas is not None else None
+    pronto = montar_cubo(df, status_final)
+
+    with _LOCK:
+        _CACHE[chave] = pronto
+        while len(_CACHE) > MAX_VERSOES:
+            _CACHE.popitem(last=False)
+
+    return pronto
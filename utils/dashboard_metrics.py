@@ -1,123 +1,185 @@
 import pandas as pd
 
+from utils.estado_clientes import status_final_map
+
 
 def status_final_por_cliente(df: pd.DataFrame) -> pd.Series:
     if df.empty or "CHAVE_CLIENTE" not in df.columns:
         return pd.Series(dtype="object", name="STATUS_FINAL_CLIENTE")
 
-    ordenado = df.sort_values("DIA") if "DIA" in df.columns else df.copy()
-    status = ordenado.groupby("CHAVE_CLIENTE")["STATUS_BASE"].last().fillna("")
-    status.name = "STATUS_FINAL_CLIENTE"
-    return status
+    return status_final_map(df)
 
 
-def calcular_vendas(df_filtrado: pd.DataFrame, df_completo: pd.DataFrame, filtro_vendas: str) -> dict:
-    if "GANHO" not in df_filtrado.columns:
-        vendas_ref = pd.DataFrame()
-    else:
-        vendas_ref = df_filtrado[df_filtrado["GANHO"] == True].copy()
-
-    vazio = {
-        "venda_gerada": 0,
-        "venda_informada": 0,
-        "vendas_total": 0,
-        "vgv_total": 0.0,
-        "maior_vgv": 0.0,
-        "ticket_medio": 0.0,
-    }
-    if vendas_ref.empty:
-        return vazio
+# cards do resumo de crédito -> texto de ETAPA_EVENTO
+ETAPAS_RESUMO = {
+    "nova_analise": "NOVA ANALISE",
+    "conferencia_pasteiro": "CONFERENCIA DO PASTEIRO",
+    "recusa_pasteiro": "RECUSA PASTEIRO",
+    "analise_credito": "ANALISE DE CREDITO",
+    "doc_pendente": "DOC PENDENTE",
+    "condicionado": "CONDICIONADO",
+    "restricao": "RESTRICAO",
+    "reprovado": "REPROVADO",
+    "aprovado_pendencia": "APROVADO C/ PENDENCIA",
+    "aprovado": "APROVADO",
+}
 
-    vendas_ref = vendas_ref.sort_values("DIA")
-    vendas_ult = vendas_ref.groupby("CHAVE_CLIENTE").tail(1)
+COLUNAS_VENDAS = ["venda_gerada", "venda_informada", "vendas_total", "vgv_total", "maior_vgv", "ticket_medio"]
 
-    if vendas_ult.empty:
-        return vazio
 
-    venda_gerada = int(vendas_ult["CHAVE_CLIENTE"].nunique())
-    venda_informada = 0
-    vendas_total = venda_gerada
-    vgv_total = float(vendas_ult["VGV"].sum())
-    maior_vgv = float(vendas_ult["VGV"].max()) if vendas_total else 0.0
-    ticket_medio = float(vgv_total / vendas_total) if vendas_total else 0.0
+def _normalizar_by(by) -> list:
+    if by is None:
+        return []
+    return [by] if isinstance(by, str) else list(by)
 
-    return {
-        "venda_gerada": venda_gerada,
-        "venda_informada": venda_informada,
-        "vendas_total": vendas_total,
-        "vgv_total": vgv_total,
-        "maior_vgv": maior_vgv,
-        "ticket_medio": ticket_medio,
-    }
 
+def _agrupar(df: pd.DataFrame, by: list):
+    # sem "by": um grupo só (chave constante) para usar o mesmo kernel
+    if by:
+        return df.groupby(by, dropna=False)
+    return df.groupby(pd.Series(0, index=df.index, name="_total"))
 
-def calcular_resumo_comercial(df_filtrado: pd.DataFrame, df_completo: pd.DataFrame, filtro_vendas: str) -> dict:
+
+def _tabela_vazia(colunas: list, by: list, dtype=None) -> pd.DataFrame:
+    # índice vazio com os mesmos nomes do groupby: o join do resumo alinha
+    # pelos nomes dos níveis (MultiIndex com mais de um "by")
+    if len(by) > 1:
+        indice = pd.MultiIndex.from_arrays([[] for _ in by], names=by)
+    else:
+        indice = pd.Index([], name=by[0] if by else "_total")
+    return pd.DataFrame(index=indice, columns=colunas, dtype=dtype)
+
+
+def _contagem_etapas(df_filtrado: pd.DataFrame, by: list) -> pd.DataFrame:
     if "ORIGEM_REGISTRO" in df_filtrado.columns:
-        eventos = df_filtrado[df_filtrado["ORIGEM_REGISTRO"] == "ATIVIDADE"].copy()
+        eventos = df_filtrado[df_filtrado["ORIGEM_REGISTRO"] == "ATIVIDADE"]
     else:
         eventos = pd.DataFrame()
 
-    ref_credito = eventos if not eventos.empty else df_filtrado.copy()
-    etapa_evento = (
-        ref_credito["ETAPA_EVENTO"].fillna("")
-        if "ETAPA_EVENTO" in ref_credito.columns
-        else ref_credito["ETAPA"].fillna("")
-        if "ETAPA" in ref_credito.columns
-        else pd.Series(dtype="object")
+    ref_credito = eventos if not eventos.empty else df_filtrado
+    col_etapa = (
+        "ETAPA_EVENTO" if "ETAPA_EVENTO" in ref_credito.columns
+        else "ETAPA" if "ETAPA" in ref_credito.columns
+        else None
+    )
+    colunas = list(ETAPAS_RESUMO)
+    if col_etapa is None or ref_credito.empty:
+        return _tabela_vazia(colunas, by, dtype="int64")
+
+    col_id = (
+        "CHAVE_CLIENTE" if "CHAVE_CLIENTE" in ref_credito.columns
+        else "ID_LEAD" if "ID_LEAD" in ref_credito.columns
+        else None
+    )
+
+    etapa = ref_credito[col_etapa].fillna("")
+    ref = ref_credito[etapa.isin(ETAPAS_RESUMO.values())]
+    if ref.empty:
+        return _tabela_vazia(colunas, by, dtype="int64")
+
+    grupos = [ref[c] for c in by] if by else [pd.Series(0, index=ref.index, name="_total")]
+    grupos.append(ref[col_etapa].fillna("").rename("_etapa"))
+
+    # uma única passada: clientes distintos por (grupo, etapa)
+    if col_id:
+        contagem = ref.groupby(grupos, dropna=False)[col_id].nunique()
+    else:
+        contagem = ref.groupby(grupos, dropna=False).size()
+
+    tabela = contagem.unstack("_etapa", fill_value=0)
+    tabela = tabela.reindex(columns=list(ETAPAS_RESUMO.values()), fill_value=0).astype("int64")
+    tabela.columns = colunas
+    return tabela
+
+
+def _tabela_vendas(df_filtrado: pd.DataFrame, by: list) -> pd.DataFrame:
+    if "GANHO" not in df_filtrado.columns:
+        return _tabela_vazia(COLUNAS_VENDAS, by)
+
+    vendas_ref = df_filtrado[df_filtrado["GANHO"] == True]
+    if vendas_ref.empty:
+        return _tabela_vazia(COLUNAS_VENDAS, by)
+
+    # última linha de venda de cada cliente; o grupo é o dessa linha
+    vendas_ult = vendas_ref.sort_values("DIA").groupby("CHAVE_CLIENTE").tail(1)
+    if vendas_ult.empty:
+        return _tabela_vazia(COLUNAS_VENDAS, by)
+
+    tabela = _agrupar(vendas_ult, by).agg(
+        venda_gerada=("CHAVE_CLIENTE", "nunique"),
+        vgv_total=("VGV", "sum"),
+        maior_vgv=("VGV", "max"),
     )
+    tabela["venda_informada"] = 0
+    tabela["vendas_total"] = tabela["venda_gerada"]
+    tabela["ticket_medio"] = (tabela["vgv_total"] / tabela["vendas_total"]).where(tabela["vendas_total"] > 0, 0.0)
+    return tabela[COLUNAS_VENDAS]
+
+
+def _taxa(numerador: pd.Series, denominador: pd.Series) -> pd.Series:
+    return (numerador / denominador * 100).where(denominador > 0, 0.0)
+
+
+def tabela_resumo_comercial(df_filtrado: pd.DataFrame, by=None) -> pd.DataFrame:
+    """
+    Kernel do resumo comercial: contagem de clientes distintos por etapa,
+    vendas e VGV, numa linha por grupo de ``by`` (ex.: "EQUIPE" ou
+    ["EQUIPE", "CORRETOR"]). Sem ``by``, devolve uma linha com o total.
+    """
+    by = _normalizar_by(by)
+
+    tabela = _contagem_etapas(df_filtrado, by).join(_tabela_vendas(df_filtrado, by), how="outer")
+    if tabela.empty and not by:
+        tabela = pd.DataFrame(index=pd.Index([0], name="_total"))
+
+    tabela = tabela.reindex(columns=list(ETAPAS_RESUMO) + COLUNAS_VENDAS)
+    inteiros = list(ETAPAS_RESUMO) + ["venda_gerada", "venda_informada", "vendas_total"]
+    tabela[inteiros] = tabela[inteiros].fillna(0).astype("int64")
+    reais = ["vgv_total", "maior_vgv", "ticket_medio"]
+    tabela[reais] = tabela[reais].astype(float).fillna(0.0)
+
+    tabela["em_analise"] = tabela["nova_analise"]
+    tabela["reanalise"] = 0
+    tabela["analises_total"] = tabela["nova_analise"]
+    tabela["aprovacoes"] = tabela["aprovado"] + tabela["aprovado_pendencia"]
+    tabela["aprovado_bacen"] = 0
+    tabela["aprovado_restricao"] = tabela["restricao"] + tabela["condicionado"]
+    tabela["reprovacoes"] = tabela["reprovado"]
+    tabela["taxa_aprov_analise"] = _taxa(tabela["aprovacoes"], tabela["analises_total"])
+    tabela["taxa_venda_analise"] = _taxa(tabela["vendas_total"], tabela["analises_total"])
+    tabela["taxa_venda_aprov"] = _taxa(tabela["vendas_total"], tabela["aprovacoes"])
+
+    if not by:
+        return tabela.reset_index(drop=True)
+    if tabela.empty:
+        return pd.DataFrame(columns=by + list(tabela.columns))
+    return tabela.reset_index()
+
+
+def calcular_vendas(df_filtrado: pd.DataFrame, df_completo: pd.DataFrame, filtro_vendas: str) -> dict:
+    tabela = _tabela_vendas(df_filtrado, [])
+    if tabela.empty:
+        return {col: 0.0 if col in {"vgv_total", "maior_vgv", "ticket_medio"} else 0 for col in COLUNAS_VENDAS}
+    linha = tabela.iloc[0]
+    return {
+        col: float(linha[col]) if col in {"vgv_total", "maior_vgv", "ticket_medio"} else int(linha[col])
+        for col in COLUNAS_VENDAS
+    }
+
 
-    def contar_etapa(nome: str) -> int:
-        linhas = ref_credito[etapa_evento == nome]
-        if linhas.empty:
-            return 0
-        if "CHAVE_CLIENTE" in linhas.columns:
-            return int(linhas["CHAVE_CLIENTE"].nunique())
-        if "ID_LEAD" in linhas.columns:
-            return int(linhas["ID_LEAD"].nunique())
-        return int(len(linhas))
-
-    nova_analise = contar_etapa("NOVA ANALISE")
-    conferencia_pasteiro = contar_etapa("CONFERENCIA DO PASTEIRO")
-    recusa_pasteiro = contar_etapa("RECUSA PASTEIRO")
-    analise_credito = contar_etapa("ANALISE DE CREDITO")
-    doc_pendente = contar_etapa("DOC PENDENTE")
-    condicionado = contar_etapa("CONDICIONADO")
-    restricao = contar_etapa("RESTRICAO")
-    reprovado = contar_etapa("REPROVADO")
-    aprovado_pendencia = contar_etapa("APROVADO C/ PENDENCIA")
-    aprovado = contar_etapa("APROVADO")
-
-    analises_total = nova_analise
-    aprovacoes = aprovado + aprovado_pendencia
-    vendas = calcular_vendas(df_filtrado, df_completo, filtro_vendas)
-    vendas_total = vendas["vendas_total"]
-
-    taxa_aprov_analise = (aprovacoes / analises_total * 100) if analises_total else 0.0
-    taxa_venda_analise = (vendas_total / analises_total * 100) if analises_total else 0.0
-    taxa_venda_aprov = (vendas_total / aprovacoes * 100) if aprovacoes else 0.0
+def calcular_resumo_comercial(df_filtrado: pd.DataFrame, df_completo: pd.DataFrame, filtro_vendas: str, by=None):
+    """
+    Sem ``by``: dict com os números do painel (formato de sempre).
+    Com ``by``: DataFrame com uma linha por grupo e as mesmas colunas.
+    """
+    tabela = tabela_resumo_comercial(df_filtrado, by=by)
+    if by is not None:
+        return tabela
 
+    # coluna a coluna: iloc[0] numa linha mista viraria tudo float
     return {
-        "nova_analise": nova_analise,
-        "conferencia_pasteiro": conferencia_pasteiro,
-        "recusa_pasteiro": recusa_pasteiro,
-        "analise_credito": analise_credito,
-        "doc_pendente": doc_pendente,
-        "condicionado": condicionado,
-        "restricao": restricao,
-        "reprovado": reprovado,
-        "aprovado_pendencia": aprovado_pendencia,
-        "aprovado": aprovado,
-        "em_analise": nova_analise,
-        "reanalise": 0,
-        "analises_total": analises_total,
-        "aprovacoes": aprovacoes,
-        "aprovado_bacen": 0,
-        "aprovado_restricao": restricao + condicionado,
-        "reprovacoes": reprovado,
-        "taxa_aprov_analise": taxa_aprov_analise,
-        "taxa_venda_analise": taxa_venda_analise,
-        "taxa_venda_aprov": taxa_venda_aprov,
-        **vendas,
+        col: float(tabela[col].iloc[0]) if pd.api.types.is_float_dtype(tabela[col]) else int(tabela[col].iloc[0])
+        for col in tabela.columns
     }
 
 
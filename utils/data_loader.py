@@ -1,32 +1,238 @@
+import hashlib
+import io
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
 import streamlit as st
 import pandas as pd
+import requests
+
+from utils import espelho_planilha
+from utils.diagnostico import marcar_cache_miss, rastrear, span
+
+SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
+GID_ANALISES = "1574157905"
+GID_PRODUCAO = "1161609337"
+
+# intervalo mínimo entre duas consultas ao Google para a mesma aba
+TTL_VERIFICACAO = 60
+
 
 # =========================================================
-# CARREGAMENTO DA PLANILHA (SEM QUALQUER FILTRO)
+# VERSÃO DOS DADOS
 # =========================================================
-@st.cache_data(ttl=60)
-def carregar_dados_planilha(_refresh_key=None) -> pd.DataFrame:
+def versao_dados(df: pd.DataFrame) -> str:
+    """
+    Identificador do conteúdo carregado. Quem baixa pela ``baixar_csv`` já
+    recebe a impressão digital do CSV em ``df.attrs["versao_dados"]``; para
+    outros frames é calculado a partir do conteúdo.
+    """
+    versao = df.attrs.get("versao_dados")
+    if versao:
+        return versao
+
+    valores = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.sha1(valores.tobytes())
+    digest.update("|".join(map(str, df.columns)).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+# =========================================================
+# DOWNLOAD CONDICIONAL DO CSV (GOOGLE SHEETS)
+# =========================================================
+# Cada aba baixada fica na memória do processo junto com a impressão digital
+# do conteúdo (sha1) e os cabeçalhos ETag/Last-Modified, quando o Google
+# manda. Na próxima consulta:
+# - antes de TTL_VERIFICACAO segundos, nem vai à rede;
+# - 304 ou conteúdo com a mesma impressão: devolve o frame já lido, com a
+#   mesma versão — parsing, normalização e tudo que é guardado por versão
+#   (pipeline, estado dos clientes, índices) ficam como estão;
+# - falha de rede com cópia em memória: segue servindo a última cópia boa.
+# Conteúdo novo também vai para o espelho Parquet local (espelho_planilha),
+# de onde a primeira chamada do processo parte, sem baixar nem ler CSV.
+@dataclass
+class _CopiaCsv:
+    impressao: str
+    etag: str
+    last_modified: str
+    df: pd.DataFrame
+    verificado_em: float
+
+
+_COPIAS: "dict[tuple, _CopiaCsv]" = {}
+_LOCK_COPIAS = threading.Lock()
+
+# contador por aba: sobe 1 a cada conteúdo novo lido (nunca volta)
+_CONTADORES: "dict[str, int]" = {}
+_SESSAO = requests.Session()
+
 
+def url_csv(gid: str, sheet_id: str = SHEET_ID) -> str:
+    return f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+
+
+def _chave_copia(sheet_id: str, gid: str, opcoes_csv: dict) -> tuple:
+    return (sheet_id, str(gid), repr(sorted(opcoes_csv.items())))
+
+
+def baixar_csv(
+    gid: str,
+    sheet_id: str = SHEET_ID,
+    ttl: float = TTL_VERIFICACAO,
+    timeout: float = 30,
+    **opcoes_csv,
+) -> pd.DataFrame:
     """
-    Lê a planilha INTEIRA, sem filtros de data, mês ou base.
-    Qualquer filtro deve ser feito SOMENTE nas páginas.
+    CSV da aba ``gid`` já lido (colunas em maiúsculas, sem espaços nas
+    pontas), com ``attrs["versao_dados"]`` = impressão digital do conteúdo.
+
+    O frame devolvido é compartilhado entre as sessões: não altere, faça
+    ``.copy()``. ``opcoes_csv`` vai para o ``pd.read_csv``.
     """
+    chave = _chave_copia(sheet_id, gid, opcoes_csv)
+
+    with _LOCK_COPIAS:
+        copia = _COPIAS.get(chave)
+
+    agora = time.monotonic()
+    if copia is None:
+        copia = _copia_do_espelho(gid, opcoes_csv, agora)
+        if copia is not None:
+            with _LOCK_COPIAS:
+                copia = _COPIAS.setdefault(chave, copia)
+
+    if copia is not None and agora - copia.verificado_em < ttl:
+        return copia.df
+
+    cabecalhos = {}
+    if copia is not None:
+        if copia.etag:
+            cabecalhos["If-None-Match"] = copia.etag
+        if copia.last_modified:
+            cabecalhos["If-Modified-Since"] = copia.last_modified
+
+    with span("planilha.download_csv", gid=str(gid)) as sp:
+        try:
+            resp = _SESSAO.get(url_csv(gid, sheet_id), headers=cabecalhos, timeout=timeout)
+            if resp.status_code != 304:
+                resp.raise_for_status()
+        except requests.RequestException as exc:
+            if copia is None:
+                raise
+            sp.registrar(cache="hit", falha=str(exc)[:200])
+            return copia.df
+
+        if resp.status_code == 304:
+            copia.verificado_em = agora
+            sp.registrar(cache="hit", status=304)
+            return copia.df
+
+        conteudo = resp.content
+        impressao = hashlib.sha1(conteudo).hexdigest()
+        etag = resp.headers.get("ETag", "")
+        last_modified = resp.headers.get("Last-Modified", "")
+        sp.registrar(n_bytes=len(conteudo))
+
+        if copia is not None and copia.impressao == impressao:
+            copia.etag, copia.last_modified = etag, last_modified
+            copia.verificado_em = agora
+            sp.registrar(cache="hit")
+            return copia.df
+
+        sp.registrar(cache="miss")
+        with span("planilha.read_csv", gid=str(gid)) as sp_leitura:
+            df = pd.read_csv(io.BytesIO(conteudo), **opcoes_csv)
+            df.columns = df.columns.astype(str).str.upper().str.strip()
+            df.attrs["versao_dados"] = impressao[:16]
+            sp_leitura.registrar_frame(df)
 
-    SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-    GID = "1574157905"
+    # conteúdo novo: marca o miss também em quem chamou (ex.: carregar_dados_planilha)
+    marcar_cache_miss()
+    with _LOCK_COPIAS:
+        _COPIAS[chave] = _CopiaCsv(impressao, etag, last_modified, df, agora)
+        _CONTADORES[str(gid)] = _CONTADORES.get(str(gid), 0) + 1
 
-    url = (
-        f"https://docs.google.com/spreadsheets/d/"
-        f"{SHEET_ID}/export?format=csv&gid={GID}"
+    espelho_planilha.gravar_versao(gid, df, impressao, etag, last_modified, opcoes_csv)
+    return df
+
+
+def _copia_do_espelho(gid: str, opcoes_csv: dict, agora: float) -> Optional[_CopiaCsv]:
+    """
+    Última versão gravada no espelho local, com a "idade" real: se foi
+    gravada há menos de ``ttl``, é servida sem ir à rede; senão entra na
+    consulta condicional como cópia conhecida (ETag + impressão).
+    """
+    item = espelho_planilha.ultima_versao(gid, opcoes_csv)
+    if item is None:
+        return None
+
+    df = espelho_planilha.ler_versao(gid, item["versao"], opcoes_csv=opcoes_csv)
+    if df is None:
+        return None
+
+    idade = max(0.0, time.time() - float(item.get("gravado_ts", 0)))
+    return _CopiaCsv(
+        item["impressao"], item.get("etag", ""), item.get("last_modified", ""), df, agora - idade
     )
 
-    df = pd.read_csv(
-        url,
+
+def versao_fonte(gid: str = GID_ANALISES, sheet_id: str = SHEET_ID) -> str:
+    """
+    Versão da última cópia da aba ``gid`` em memória (qualquer opção de
+    leitura), sem ir à rede. Vazio se a aba ainda não foi baixada.
+    """
+    with _LOCK_COPIAS:
+        copias = [c for k, c in _COPIAS.items() if k[0] == sheet_id and k[1] == str(gid)]
+    if not copias:
+        return ""
+    return max(copias, key=lambda c: c.verificado_em).impressao[:16]
+
+
+def contador_versao(gid: str = GID_ANALISES) -> int:
+    """
+    Versão monotônica da aba no processo: quantas vezes um conteúdo novo foi
+    lido. Comparar contadores é O(1) e não depende de hash.
+    """
+    with _LOCK_COPIAS:
+        return _CONTADORES.get(str(gid), 0)
+
+
+def dados_mudaram(chave: str, gid: str = GID_ANALISES) -> bool:
+    """
+    True na primeira chamada da sessão e sempre que a versão da aba ``gid``
+    mudou desde a última chamada com a mesma ``chave``. Serve para a página
+    pular trabalho numa recarga automática em que nada foi editado.
+    """
+    versao = versao_fonte(gid)
+    chave_sessao = f"_versao_vista_{chave}"
+    anterior = st.session_state.get(chave_sessao)
+    st.session_state[chave_sessao] = versao
+    return anterior is None or anterior != versao
+
+
+# =========================================================
+# CARREGAMENTO DA PLANILHA (SEM QUALQUER FILTRO)
+# =========================================================
+@rastrear("planilha.carregar_dados_planilha", cache=True)
+def carregar_dados_planilha(_refresh_key=None, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+
+    """
+    Lê a planilha INTEIRA, sem filtros de data, mês ou base.
+    Qualquer filtro deve ser feito SOMENTE nas páginas.
+
+    ``colunas`` limita a cópia devolvida às colunas pedidas que existirem.
+    É só um recorte do frame que já está na memória: poupa a cópia das
+    outras colunas, não o download nem a leitura do CSV.
+    """
+
+    df = baixar_csv(
+        GID_ANALISES,
         dtype=str,          # NÃO inferir tipos
         keep_default_na=False
     )
 
-    # normaliza colunas
-    df.columns = df.columns.str.upper().str.strip()
-
-    return df
+    if colunas is not None:
+        return df[[c for c in colunas if c in df.columns]].copy()
+    return df.copy()
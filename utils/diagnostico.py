@@ -0,0 +1,338 @@
+"""
+Rastreamento leve das etapas do pipeline de dados.
+
+Cada etapa instrumentada vira um "span" com duração, linhas, bytes e
+cache hit/miss, guardado num buffer em memória do processo e exportável em
+JSON lines. A página de diagnóstico (somente admin) lê esse buffer.
+
+Ativação:
+- variável de ambiente ``MR_DIAGNOSTICO=1`` ou secret ``DIAGNOSTICO = true``;
+- ou em tempo de execução pela página de diagnóstico (``ativar``).
+
+Desligado, ``span()`` devolve sempre o mesmo objeto vazio e ``rastrear()``
+chama a função direto: o custo é uma checagem de flag por chamada.
+
+Uso:
+
+    @rastrear("piperun.build_performance")
+    def build_performance(...): ...
+
+    with span("planilha.download", gid=GID) as sp:
+        df = pd.read_csv(url)
+        sp.registrar_frame(df)
+
+Para funções com ``@st.cache_data``, use ``rastrear(..., cache=True)`` por
+fora do cache e chame ``marcar_cache_miss()`` na primeira linha do corpo:
+se o corpo não rodar, o span fica marcado como hit.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+
+MAX_SPANS = 5000
+ARQ_EXPORT = Path("data") / "diagnostico_spans.jsonl"
+
+
+def _ativo_por_config() -> bool:
+    valor = str(os.getenv("MR_DIAGNOSTICO", "") or "").strip()
+
+    if not valor:
+        try:
+            import streamlit as st
+
+            valor = str(st.secrets.get("DIAGNOSTICO", "") or "").strip()
+        except Exception:
+            valor = ""
+
+    return valor.lower() in {"1", "true", "sim", "yes", "on"}
+
+
+_ATIVO = _ativo_por_config()
+_SPANS: deque = deque(maxlen=MAX_SPANS)
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+
+def _pilha() -> list:
+    pilha = getattr(_LOCAL, "pilha", None)
+    if pilha is None:
+        pilha = []
+        _LOCAL.pilha = pilha
+    return pilha
+
+
+def _medidas(obj: Any) -> tuple[Optional[int], Optional[int]]:
+    if isinstance(obj, pd.DataFrame):
+        return len(obj), int(obj.memory_usage(index=True).sum())
+    if isinstance(obj, pd.Series):
+        return len(obj), int(obj.memory_usage(index=True))
+
+    # PiperunFetchResult e afins
+    data = getattr(obj, "data", None)
+    if isinstance(data, pd.DataFrame):
+        return _medidas(data)
+
+    if isinstance(obj, dict):
+        frames = [v for v in obj.values() if isinstance(v, pd.DataFrame)]
+        if frames:
+            medidas = [_medidas(f) for f in frames]
+            return sum(m[0] for m in medidas), sum(m[1] for m in medidas)
+
+    return None, None
+
+
+# =========================================================
+# SPANS
+# =========================================================
+class Span:
+    __slots__ = (
+        "nome",
+        "span_id",
+        "pai_id",
+        "inicio",
+        "duracao_ms",
+        "linhas",
+        "n_bytes",
+        "cache",
+        "erro",
+        "thread",
+        "atributos",
+        "_t0",
+    )
+
+    def __init__(self, nome: str, atributos: Optional[Dict[str, Any]] = None):
+        self.nome = nome
+        self.span_id = uuid.uuid4().hex[:12]
+        self.pai_id = ""
+        self.inicio = 0.0
+        self.duracao_ms = 0.0
+        self.linhas: Optional[int] = None
+        self.n_bytes: Optional[int] = None
+        self.cache = ""
+        self.erro = ""
+        self.thread = ""
+        self.atributos = dict(atributos or {})
+        self._t0 = 0.0
+
+    def registrar(
+        self,
+        linhas: Optional[int] = None,
+        n_bytes: Optional[int] = None,
+        cache: Optional[str] = None,
+        **atributos,
+    ) -> "Span":
+        if linhas is not None:
+            self.linhas = int(linhas)
+        if n_bytes is not None:
+            self.n_bytes = int(n_bytes)
+        if cache:
+            self.cache = cache
+        if atributos:
+            self.atributos.update(atributos)
+        return self
+
+    def registrar_frame(self, obj: Any) -> "Span":
+        linhas, n_bytes = _medidas(obj)
+        return self.registrar(linhas=linhas, n_bytes=n_bytes)
+
+    def _completar(self, resultado: Any) -> None:
+        # só preenche o que a própria função não registrou
+        if self.linhas is not None and self.n_bytes is not None:
+            return
+        linhas, n_bytes = _medidas(resultado)
+        if self.linhas is None and linhas is not None:
+            self.linhas = linhas
+        if self.n_bytes is None and n_bytes is not None:
+            self.n_bytes = n_bytes
+
+    def __enter__(self) -> "Span":
+        pilha = _pilha()
+        self.pai_id = pilha[-1].span_id if pilha else ""
+        self.thread = threading.current_thread().name
+        self.inicio = time.time()
+        self._t0 = time.perf_counter()
+        pilha.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duracao_ms = (time.perf_counter() - self._t0) * 1000
+        if exc_type is not None:
+            self.erro = f"{exc_type.__name__}: {exc}"[:300]
+
+        pilha = _pilha()
+        if pilha and pilha[-1] is self:
+            pilha.pop()
+
+        with _LOCK:
+            _SPANS.append(self)
+        return False
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "nome": self.nome,
+            "span_id": self.span_id,
+            "pai_id": self.pai_id,
+            "inicio": self.inicio,
+            "duracao_ms": round(self.duracao_ms, 3),
+            "linhas": self.linhas,
+            "bytes": self.n_bytes,
+            "cache": self.cache,
+            "erro": self.erro,
+            "thread": self.thread,
+            "atributos": self.atributos,
+        }
+
+
+class _SpanNulo:
+    """Span usado com o diagnóstico desligado: não mede nem guarda nada."""
+
+    __slots__ = ()
+
+    def registrar(self, *args, **kwargs) -> "_SpanNulo":
+        return self
+
+    def registrar_frame(self, obj: Any) -> "_SpanNulo":
+        return self
+
+    def __enter__(self) -> "_SpanNulo":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULO = _SpanNulo()
+
+
+def span(nome: str, **atributos):
+    if not _ATIVO:
+        return _NULO
+    return Span(nome, atributos)
+
+
+def span_atual():
+    """Span aberto mais interno da thread atual (ou o span vazio)."""
+    if not _ATIVO:
+        return _NULO
+    pilha = _pilha()
+    return pilha[-1] if pilha else _NULO
+
+
+def marcar_cache_miss() -> None:
+    span_atual().registrar(cache="miss")
+
+
+def rastrear(nome: Optional[str] = None, cache: bool = False) -> Callable:
+    """
+    Decorador que abre um span em volta da função. Linhas e bytes são
+    tirados do retorno (DataFrame, PiperunFetchResult ou dict de frames)
+    quando a função não os registrar.
+    """
+
+    def decorador(func: Callable) -> Callable:
+        nome_span = nome or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _ATIVO:
+                return func(*args, **kwargs)
+
+            with Span(nome_span) as sp:
+                resultado = func(*args, **kwargs)
+                if cache and not sp.cache:
+                    sp.cache = "hit"
+                sp._completar(resultado)
+                return resultado
+
+        return wrapper
+
+    return decorador
+
+
+# =========================================================
+# CONTROLE / CONSULTA
+# =========================================================
+def ativo() -> bool:
+    return _ATIVO
+
+
+def ativar(ligado: bool = True) -> None:
+    global _ATIVO
+    _ATIVO = bool(ligado)
+
+
+def limpar() -> None:
+    with _LOCK:
+        _SPANS.clear()
+
+
+def spans_recentes(limite: Optional[int] = None) -> List[Dict[str, Any]]:
+    with _LOCK:
+        spans = list(_SPANS)
+    if limite:
+        spans = spans[-limite:]
+    return [sp.como_dict() for sp in spans]
+
+
+def spans_dataframe(limite: Optional[int] = None) -> pd.DataFrame:
+    registros = spans_recentes(limite)
+    if not registros:
+        return pd.DataFrame(
+            columns=["nome", "span_id", "pai_id", "inicio", "duracao_ms", "linhas", "bytes", "cache", "erro", "thread", "atributos"]
+        )
+    df = pd.DataFrame(registros)
+    df["inicio"] = pd.to_datetime(df["inicio"], unit="s")
+    # dicts com chaves variadas não viram coluna Arrow; exibimos como texto
+    df["atributos"] = [json.dumps(a, ensure_ascii=False, default=str) if a else "" for a in df["atributos"]]
+    return df
+
+
+def resumo_por_etapa(df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    df = spans_dataframe() if df is None else df
+    if df.empty:
+        return pd.DataFrame(columns=["nome", "chamadas", "total_ms", "media_ms", "p95_ms", "max_ms", "linhas", "hits", "misses", "erros"])
+
+    return (
+        df.groupby("nome")
+        .agg(
+            chamadas=("span_id", "size"),
+            total_ms=("duracao_ms", "sum"),
+            media_ms=("duracao_ms", "mean"),
+            p95_ms=("duracao_ms", lambda s: s.quantile(0.95)),
+            max_ms=("duracao_ms", "max"),
+            linhas=("linhas", "sum"),
+            hits=("cache", lambda s: int((s == "hit").sum())),
+            misses=("cache", lambda s: int((s == "miss").sum())),
+            erros=("erro", lambda s: int((s != "").sum())),
+        )
+        .reset_index()
+        .sort_values("total_ms", ascending=False)
+    )
+
+
+def exportar_jsonl(caminho: Optional[Path] = None) -> str:
+    """
+    Devolve os spans em JSON lines; se ``caminho`` for informado, também
+    acrescenta as linhas ao arquivo.
+    """
+    texto = "".join(json.dumps(sp, ensure_ascii=False, default=str) + "\n" for sp in spans_recentes())
+
+    if caminho is not None:
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(texto)
+
+    return texto
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from utils.diagnostico import span
+
+# =========================================================
+# ESPELHO LOCAL DAS ABAS DA PLANILHA (PARQUET)
+# =========================================================
+# Cada conteúdo novo baixado pelo ``data_loader.baixar_csv`` é gravado em
+# Parquet, do jeito que foi lido (a aba de análises vem toda como texto,
+# ``dtype=str``), com um histórico das últimas versões:
+#
+#   data/espelho/<gid>_<opções>/historico.json
+#   data/espelho/<gid>_<opções>/<AAAAMMDD_HHMMSS>_<versao>.parquet
+#
+# Com isso:
+# - partida a frio lê o Parquet local em vez de baixar e reprocessar o CSV;
+# - se o Google estiver lento ou fora, o app segue com a última cópia.
+#
+# A gravação roda numa thread própria (uma por vez, em ordem): o Parquet, o
+# histórico e a poda não pesam na requisição que disparou o download.
+#
+# O espelho é melhor-esforço: sem pyarrow, ou com erro de disco, o app
+# continua funcionando só com o download.
+#
+# Leads do Supremo CRM não passam por aqui: não vêm da planilha, e a tabela
+# SQLite do supremo_client (data/supremo_leads.db) já os guarda em disco,
+# com sincronização incremental.
+
+DIR_ESPELHO = Path("data") / "espelho"
+MAX_VERSOES_ESPELHO = 20
+
+_LOCK = threading.Lock()
+_GRAVACAO = ThreadPoolExecutor(max_workers=1, thread_name_prefix="espelho")
+
+
+def _parquet_disponivel() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+PARQUET_DISPONIVEL = _parquet_disponivel()
+
+
+def _pasta(gid: str, opcoes_csv: Optional[dict] = None) -> Path:
+    opcoes = repr(sorted((opcoes_csv or {}).items()))
+    sufixo = hashlib.sha1(opcoes.encode("utf-8")).hexdigest()[:8]
+    return DIR_ESPELHO / f"{gid}_{sufixo}"
+
+
+def _ler_historico(pasta: Path) -> List[dict]:
+    arq = pasta / "historico.json"
+    if not arq.exists():
+        return []
+    try:
+        return json.loads(arq.read_text(encoding="utf-8"))
+    except Exception:
+        return []
+
+
+def _gravar_historico(pasta: Path, historico: List[dict]) -> None:
+    arq = pasta / "historico.json"
+    tmp = arq.with_suffix(".tmp")
+    tmp.write_text(json.dumps(historico, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, arq)
+
+
+# =========================================================
+# GRAVAÇÃO
+# =========================================================
+def gravar_versao(
+    gid: str,
+    df: pd.DataFrame,
+    impressao: str,
+    etag: str = "",
+    last_modified: str = "",
+    opcoes_csv: Optional[dict] = None,
+) -> bool:
+    """
+    Agenda a gravação de ``df`` como nova versão da aba (se ainda não
+    estiver gravada) e a poda do histórico, em segundo plano. Devolve False
+    quando o espelho não está disponível. ``df`` não pode ser alterado
+    depois (os frames do ``baixar_csv`` já são só leitura).
+    """
+    if not PARQUET_DISPONIVEL:
+        return False
+
+    _GRAVACAO.submit(_gravar_versao, gid, df, impressao, etag, last_modified, opcoes_csv)
+    return True
+
+
+def _gravar_versao(
+    gid: str,
+    df: pd.DataFrame,
+    impressao: str,
+    etag: str,
+    last_modified: str,
+    opcoes_csv: Optional[dict],
+) -> bool:
+    pasta = _pasta(gid, opcoes_csv)
+    versao = impressao[:16]
+
+    with span("espelho.gravar_versao", gid=str(gid)) as sp:
+        try:
+            with _LOCK:
+                pasta.mkdir(parents=True, exist_ok=True)
+                historico = _ler_historico(pasta)
+                if historico and historico[-1]["versao"] == versao:
+                    return True
+
+                agora = datetime.now()
+                arquivo = f"{agora:%Y%m%d_%H%M%S}_{versao}.parquet"
+                tmp = pasta / f"{arquivo}.tmp"
+                df.to_parquet(tmp, index=False)
+                os.replace(tmp, pasta / arquivo)
+
+                historico.append({
+                    "versao": versao,
+                    "impressao": impressao,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "gravado_em": agora.isoformat(timespec="seconds"),
+                    "gravado_ts": time.time(),
+                    "arquivo": arquivo,
+                    "linhas": int(len(df)),
+                })
+
+                excedentes, historico = historico[:-MAX_VERSOES_ESPELHO], historico[-MAX_VERSOES_ESPELHO:]
+                _gravar_historico(pasta, historico)
+
+                for item in excedentes:
+                    (pasta / item["arquivo"]).unlink(missing_ok=True)
+
+            sp.registrar_frame(df)
+            return True
+        except Exception as exc:
+            sp.registrar(falha=str(exc)[:200])
+            return False
+
+
+# =========================================================
+# LEITURA
+# =========================================================
+def historico_versoes(gid: str, opcoes_csv: Optional[dict] = None) -> List[dict]:
+    """Versões gravadas da aba, da mais antiga para a mais recente."""
+    with _LOCK:
+        return _ler_historico(_pasta(gid, opcoes_csv))
+
+
+def ultima_versao(gid: str, opcoes_csv: Optional[dict] = None) -> Optional[dict]:
+    historico = historico_versoes(gid, opcoes_csv)
+    return historico[-1] if historico else None
+
+
+def ler_versao(
+    gid: str,
+    versao: Optional[str] = None,
+    opcoes_csv: Optional[dict] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Lê do espelho a ``versao`` pedida (ou a mais recente). Devolve None se
+    não houver essa versão.
+    """
+    if not PARQUET_DISPONIVEL:
+        return None
+
+    historico = historico_versoes(gid, opcoes_csv)
+    if versao:
+        historico = [item for item in historico if item["versao"] == versao]
+    if not historico:
+        return None
+
+    item = historico[-1]
+    with span("espelho.ler_versao", gid=str(gid), versao=item["versao"]) as sp:
+        try:
+            df = pd.read_parquet(_pasta(gid, opcoes_csv) / item["arquivo"])
+        except Exception as exc:
+            sp.registrar(falha=str(exc)[:200])
+            return None
+        df.attrs["versao_dados"] = item["versao"]
+        sp.registrar_frame(df)
+    return df
+
@@ -0,0 +1,153 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils.diagnostico import rastrear
+
+# =========================================================
+# ESTADO ATUAL POR CLIENTE (CHAVE_CLIENTE)
+# =========================================================
+# Uma linha por cliente com o que as páginas sempre recalculavam
+# ordenando a planilha inteira por DIA:
+#   STATUS_FINAL, ULTIMO_DIA, ULTIMO_CORRETOR, ULTIMA_EQUIPE,
+#   TEVE_VENDA e VGV_VENDA (VGV da última linha de venda).
+# A tabela é montada uma vez por versão dos dados e guardada na memória
+# do processo, compartilhada por todas as sessões.
+
+STATUS_VENDA = ["VENDA GERADA", "VENDA INFORMADA"]
+
+COLUNAS_ESTADO = [
+    "STATUS_FINAL",
+    "ULTIMO_DIA",
+    "ULTIMO_CORRETOR",
+    "ULTIMA_EQUIPE",
+    "TEVE_VENDA",
+    "VGV_VENDA",
+]
+
+_COLUNAS_ORIGEM = ["CHAVE_CLIENTE", "DIA", "STATUS_BASE", "CORRETOR", "EQUIPE", "VGV"]
+
+MAX_VERSOES = 8
+
+_CACHE: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def _coluna(df: pd.DataFrame, nome: str, padrao=""):
+    if nome in df.columns:
+        return df[nome]
+    return pd.Series(padrao, index=df.index)
+
+
+def _chave_versao(df: pd.DataFrame, escopo: str) -> tuple:
+    # filtros copiam attrs: a versão só vale para o frame inteiro dela
+    # (``linhas_versao``); recortes entram pelo hash das colunas de origem
+    versao = df.attrs.get("versao_dados")
+    if not versao or df.attrs.get("linhas_versao") != len(df):
+        colunas = [c for c in _COLUNAS_ORIGEM if c in df.columns]
+        valores = pd.util.hash_pandas_object(df[colunas], index=False).to_numpy()
+        versao = hashlib.sha1(valores.tobytes()).hexdigest()[:16]
+    return (versao, escopo)
+
+
+# =========================================================
+# ÚLTIMA LINHA POR CHAVE
+# =========================================================
+def ultima_linha_por_chave(df: pd.DataFrame, chaves, ordem) -> pd.DataFrame:
+    """
+    Versão vetorizada de
+    ``df.groupby(chaves).apply(lambda g: g.sort_values(ordem).iloc[-1])``:
+    ordena uma vez (estável, nulos no fim como no sort_values) e fica com a
+    última linha de cada chave. Saída ordenada pelas chaves, índice 0..n-1.
+    Chaves nulas são descartadas, como no groupby.
+    """
+    chaves = [chaves] if isinstance(chaves, str) else list(chaves)
+    if df.empty:
+        return df.iloc[0:0].reset_index(drop=True)
+
+    ultimas = (
+        df.sort_values(ordem, kind="stable")
+        .drop_duplicates(chaves, keep="last")
+        .dropna(subset=chaves)
+    )
+    return ultimas.sort_values(chaves, kind="stable").reset_index(drop=True)
+
+
+# =========================================================
+# TABELA DE ESTADO
+# =========================================================
+@rastrear("clientes.montar_estado_clientes")
+def montar_estado_clientes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Monta a tabela (índice = CHAVE_CLIENTE) sem groupby por cliente.
+    Empates no mesmo DIA mantêm a ordem da planilha (ordenação estável).
+    """
+    if df is None or df.empty or "CHAVE_CLIENTE" not in df.columns:
+        vazio = pd.DataFrame(columns=COLUNAS_ESTADO)
+        vazio.index.name = "CHAVE_CLIENTE"
+        return vazio
+
+    base = pd.DataFrame({
+        "CHAVE_CLIENTE": df["CHAVE_CLIENTE"],
+        "DIA": pd.to_datetime(_coluna(df, "DIA", pd.NaT), errors="coerce"),
+        "STATUS_BASE": _coluna(df, "STATUS_BASE").fillna("").astype(str).str.upper(),
+        "CORRETOR": _coluna(df, "CORRETOR"),
+        "EQUIPE": _coluna(df, "EQUIPE"),
+        "VGV": pd.to_numeric(_coluna(df, "VGV", 0.0), errors="coerce").fillna(0.0),
+    })
+
+    ultimas = ultima_linha_por_chave(base, "CHAVE_CLIENTE", "DIA").set_index("CHAVE_CLIENTE")
+
+    vendas = base[base["STATUS_BASE"].isin(STATUS_VENDA)]
+    vgv_venda = ultima_linha_por_chave(vendas, "CHAVE_CLIENTE", "DIA").set_index("CHAVE_CLIENTE")["VGV"]
+
+    estado = pd.DataFrame({
+        "STATUS_FINAL": ultimas["STATUS_BASE"],
+        "ULTIMO_DIA": ultimas["DIA"],
+        "ULTIMO_CORRETOR": ultimas["CORRETOR"],
+        "ULTIMA_EQUIPE": ultimas["EQUIPE"],
+    })
+    estado["TEVE_VENDA"] = estado.index.isin(vgv_venda.index)
+    estado["VGV_VENDA"] = vgv_venda.reindex(estado.index).fillna(0.0)
+    return estado
+
+
+def estado_clientes(df: pd.DataFrame, escopo: str = "") -> pd.DataFrame:
+    """
+    Tabela de estado do cliente para ``df``, reaproveitada enquanto a versão
+    dos dados (``df.attrs["versao_dados"]``) não mudar. Frames recortados
+    são identificados pelo conteúdo das colunas de origem.
+
+    ``escopo`` separa bases que a página normaliza de um jeito próprio
+    (ex.: "vendas" trata DESISTIU antes), para não misturar resultados.
+
+    A tabela devolvida é compartilhada: não altere, faça ``.copy()``.
+    """
+    if df is None or df.empty:
+        return montar_estado_clientes(df)
+
+    chave = _chave_versao(df, escopo)
+
+    with _LOCK:
+        estado = _CACHE.get(chave)
+        if estado is not None:
+            _CACHE.move_to_end(chave)
+            return estado
+
+    estado = montar_estado_clientes(df)
+
+    with _LOCK:
+        _CACHE[chave] = estado
+        while len(_CACHE) > MAX_VERSOES:
+            _CACHE.popitem(last=False)
+
+    return estado
+
+
+def status_final_map(df: pd.DataFrame, escopo: str = "") -> pd.Series:
+    """Series CHAVE_CLIENTE -> STATUS_FINAL_CLIENTE (pronta para merge/map)."""
+    status = estado_clientes(df, escopo)["STATUS_FINAL"].fillna("")
+    status.name = "STATUS_FINAL_CLIENTE"
+    return status
@@ -0,0 +1,214 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import pandas as pd
+import streamlit as st
+from fpdf import FPDF
+
+from utils.diagnostico import span
+
+# =========================================================
+# EXPORTAÇÃO DE LISTAS EM PDF (LISTAS DE LIGAÇÃO)
+# =========================================================
+# Tabela simples, 33 linhas por página, como as páginas 14 e 16 já geravam:
+#   NOME | TELEFONE | INFORMAÇÕES (em branco, para anotar à mão)
+#
+# - o texto sai das colunas inteiras (limpeza latin-1 e corte vetorizados),
+#   e cada página é desenhada com uma grade de linhas + ``text``, sem o custo
+#   de um ``cell`` com borda por campo;
+# - o arquivo gerado fica em data/pdf_cache/<hash>.pdf, onde o hash é dos
+#   dados filtrados + layout + título: recarga sem mudança de filtro não
+#   gera de novo;
+# - o PDF só é desenhado quando alguém clica em "Gerar PDF" (ou se já está
+#   no cache): trocar filtro não paga a renderização;
+# - o botão de download recebe o arquivo aberto, não uma cópia em bytes.
+#
+# Várias sessões dividem a pasta: cada gravação usa um temporário próprio,
+# e arquivo que sumiu (podado por outra sessão) é só um miss.
+
+DIR_CACHE_PDF = Path("data") / "pdf_cache"
+MAX_ARQUIVOS_PDF = 30
+
+LINHAS_POR_PAGINA = 33
+ALTURA_LINHA = 8
+MARGEM = 10
+
+# (título da coluna, largura em mm, máximo de caracteres; 0 = em branco)
+LAYOUT_LISTA_LIGACAO: Tuple[Tuple[str, float, int], ...] = (
+    ("NOME", 70, 40),
+    ("TELEFONE", 40, 20),
+    ("INFORMAÇÕES", 80, 0),
+)
+
+
+def texto_pdf(serie: pd.Series, max_chars: int) -> list:
+    """Texto que as fontes padrão do PDF aceitam (latin-1), já cortado."""
+    return (
+        serie.fillna("")
+        .astype(str)
+        .str.encode("latin-1", errors="ignore")
+        .str.decode("latin-1")
+        .str[:max_chars]
+        .tolist()
+    )
+
+
+def _renderizar(textos: Sequence[list], layout, titulo: Optional[str]) -> bytes:
+    pdf = FPDF(orientation="P", unit="mm", format="A4")
+    pdf.set_auto_page_break(auto=False)
+    pdf.set_line_width(0.2)
+
+    larguras = [largura for _, largura, _ in layout]
+    bordas = [MARGEM]
+    for largura in larguras:
+        bordas.append(bordas[-1] + largura)
+
+    total = len(textos[0]) if textos else 0
+    por_pagina = LINHAS_POR_PAGINA - (1 if titulo else 0)
+    titulo = texto_pdf(pd.Series([titulo]), 120)[0] if titulo else ""
+    cabecalho = texto_pdf(pd.Series([nome for nome, _, _ in layout]), 60)
+
+    for inicio in range(0, max(total, 1), por_pagina):
+        pdf.add_page()
+        topo = MARGEM
+
+        if titulo:
+            pdf.set_font("Helvetica", "B", 11)
+            pdf.text(MARGEM + 1, topo + 5.5, titulo)
+            topo += ALTURA_LINHA
+
+        linhas = min(por_pagina, total - inicio)
+        base = topo + (linhas + 1) * ALTURA_LINHA
+
+        # grade da página inteira de uma vez
+        for k in range(linhas + 2):
+            y = topo + k * ALTURA_LINHA
+            pdf.line(bordas[0], y, bordas[-1], y)
+        for x in bordas:
+            pdf.line(x, topo, x, base)
+
+        pdf.set_font("Helvetica", "B", 10)
+        for x, nome in zip(bordas, cabecalho):
+            pdf.text(x + 1, topo + 5.5, nome)
+
+        pdf.set_font("Helvetica", size=9)
+        for coluna, x in zip(textos, bordas):
+            y = topo + ALTURA_LINHA + 5.5
+            for valor in coluna[inicio:inicio + linhas]:
+                if valor:
+                    pdf.text(x + 1, y, valor)
+                y += ALTURA_LINHA
+
+    return bytes(pdf.output())
+
+
+def _impressao(df: pd.DataFrame, layout, titulo: Optional[str]) -> str:
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(repr((list(df.columns), layout, titulo)).encode("utf-8"))
+    return digest.hexdigest()[:20]
+
+
+def _mtime(arq: Path) -> float:
+    try:
+        return arq.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def _podar_cache() -> None:
+    arquivos = sorted(DIR_CACHE_PDF.glob("*.pdf"), key=_mtime)
+    for arq in arquivos[:-MAX_ARQUIVOS_PDF]:
+        arq.unlink(missing_ok=True)
+
+
+def _dados_e_caminho(df: pd.DataFrame, colunas: Sequence[str], layout, titulo: Optional[str]):
+    colunas = [c for c in colunas if c in df.columns]
+    dados = df[colunas].reset_index(drop=True)
+    return colunas, dados, DIR_CACHE_PDF / f"{_impressao(dados, layout, titulo)}.pdf"
+
+
+def pdf_em_cache(
+    df: pd.DataFrame,
+    colunas: Sequence[str] = ("NOME", "TELEFONE"),
+    layout=LAYOUT_LISTA_LIGACAO,
+    titulo: Optional[str] = None,
+) -> bool:
+    """True se o PDF dessa lista já está gerado (só calcula o hash)."""
+    return _dados_e_caminho(df, colunas, layout, titulo)[2].exists()
+
+
+def arquivo_pdf(
+    df: pd.DataFrame,
+    colunas: Sequence[str] = ("NOME", "TELEFONE"),
+    layout=LAYOUT_LISTA_LIGACAO,
+    titulo: Optional[str] = None,
+) -> Path:
+    """
+    Caminho do PDF da lista ``df[colunas]`` (uma coluna por item do
+    ``layout``; colunas de texto em branco não precisam existir no frame).
+    Gera só se esses dados ainda não tiverem arquivo no cache.
+    """
+    colunas, dados, caminho = _dados_e_caminho(df, colunas, layout, titulo)
+
+    try:
+        os.utime(caminho)
+        return caminho
+    except FileNotFoundError:
+        pass
+
+    with span("pdf.gerar_lista", linhas=len(dados)) as sp:
+        textos = [
+            texto_pdf(dados[colunas[i]], max_chars) if max_chars and i < len(colunas) else [""] * len(dados)
+            for i, (_, _, max_chars) in enumerate(layout)
+        ]
+        conteudo = _renderizar(textos, layout, titulo)
+        sp.registrar(n_bytes=len(conteudo))
+
+    DIR_CACHE_PDF.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=DIR_CACHE_PDF, suffix=".tmp", delete=False) as tmp:
+        tmp.write(conteudo)
+    try:
+        os.replace(tmp.name, caminho)
+    except OSError:
+        Path(tmp.name).unlink(missing_ok=True)
+        raise
+    _podar_cache()
+    return caminho
+
+
+def botao_download_pdf(
+    df: pd.DataFrame,
+    file_name: str,
+    label: str = "⬇️ Baixar PDF",
+    colunas: Sequence[str] = ("NOME", "TELEFONE"),
+    titulo: Optional[str] = None,
+    key: Optional[str] = None,
+    label_gerar: str = "🧾 Gerar PDF",
+) -> None:
+    """
+    ``st.download_button`` da lista de ligação de ``df`` (PDF em cache).
+    Enquanto o PDF dessa lista não existe, mostra antes o botão
+    ``label_gerar``; a renderização só roda quando ele é clicado.
+    """
+    if not pdf_em_cache(df, colunas, titulo=titulo):
+        if not st.button(label_gerar, key=f"gerar_{key or file_name}"):
+            return
+
+    caminho = arquivo_pdf(df, colunas, titulo=titulo)
+    try:
+        arquivo = open(caminho, "rb")
+    except FileNotFoundError:
+        # podado por outra sessão entre o arquivo_pdf e o open: é um miss
+        arquivo = open(arquivo_pdf(df, colunas, titulo=titulo), "rb")
+
+    with arquivo:
+        st.download_button(
+            label,
+            data=arquivo,
+            file_name=file_name,
+            mime="application/pdf",
+            key=key,
+        )
@@ -0,0 +1,74 @@
+import streamlit as st
+
+from utils.data_loader import GID_ANALISES, GID_PRODUCAO, baixar_csv, contador_versao
+
+# =========================================================
+# FEED DE VERSÕES DAS FONTES (SUBSTITUI O st_autorefresh)
+# =========================================================
+# Antes, cada página recarregava o script inteiro a cada 30 s, mesmo sem
+# ninguém ter mexido na planilha. Agora a página abre só um fragmento
+# pequeno que, a cada intervalo:
+#   1. pergunta à fonte se há conteúdo novo (download condicional, no
+#      máximo uma ida ao Google por TTL no processo inteiro);
+#   2. compara o contador de versão da fonte com o último visto na sessão;
+#   3. só se o contador avançou, dispara o rerun completo da página.
+# Sem edição na planilha, o tick custa o rerun do fragmento e nada mais.
+
+# fonte -> (gid, verificação). A verificação usa as mesmas opções de leitura
+# dos loaders, para reaproveitar a mesma cópia em memória.
+FONTES = {
+    "analises": (
+        GID_ANALISES,
+        lambda: baixar_csv(GID_ANALISES, dtype=str, keep_default_na=False),
+    ),
+    "producao": (
+        GID_PRODUCAO,
+        lambda: baixar_csv(GID_PRODUCAO, ttl=30),
+    ),
+    # mesma aba de "analises", mas a cópia que a página 02 lê (sem opções,
+    # ttl=30): é outra entrada em memória, que envelhece no seu próprio ritmo
+    "processos": (
+        GID_ANALISES,
+        lambda: baixar_csv(GID_ANALISES, ttl=30),
+    ),
+}
+
+
+def versao_atual(fonte: str) -> int:
+    """Verifica a fonte (barato se nada mudou) e devolve o contador dela."""
+    gid, verificar = FONTES[fonte]
+    try:
+        verificar()
+    except Exception:
+        # sem rede: mantém o contador atual, a página segue com o que tem
+        pass
+    return contador_versao(gid)
+
+
+def acompanhar_fontes(fontes, intervalo_s: int, key: str) -> None:
+    """
+    Reroda a página só quando alguma das ``fontes`` ganhar versão nova.
+    Em versões do Streamlit sem ``st.fragment``, volta ao st_autorefresh.
+    """
+    fontes = tuple(fontes)
+    chave_sessao = f"_feed_versoes_{key}"
+
+    # rerun completo: o que a página vai ler agora passa a ser o "visto"
+    st.session_state[chave_sessao] = {f: contador_versao(FONTES[f][0]) for f in fontes}
+
+    fragmento = getattr(st, "fragment", None)
+    if fragmento is None:
+        from streamlit_autorefresh import st_autorefresh
+
+        st_autorefresh(interval=intervalo_s * 1000, key=key)
+        return
+
+    @fragmento(run_every=intervalo_s)
+    def _verificar():
+        vistas = st.session_state[chave_sessao]
+        atuais = {f: versao_atual(f) for f in fontes}
+        if any(atuais[f] > vistas.get(f, 0) for f in fontes):
+            st.session_state[chave_sessao] = atuais
+            st.rerun()
+
+    _verificar()
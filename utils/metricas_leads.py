@@ -0,0 +1,142 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.diagnostico import rastrear
+from utils.supremo_client import carregar_leads
+
+# =========================================================
+# MÉTRICAS DE ATENDIMENTO DE LEADS (SLA)
+# =========================================================
+# Dois tempos por lead, em minutos, calculados em coluna:
+#   TEMPO_ATEND_MIN      captura -> primeiro contato do corretor
+#   TEMPO_INTERACOES_MIN primeiro contato -> última interação
+# e as distribuições deles (média, mediana, p90) no período, por corretor e
+# por dia de captura. Os leads vêm da tabela local do Supremo
+# (``supremo_client.carregar_leads``), não de um ``df_leads`` deixado no
+# session_state por outra página.
+#
+# Nada aqui formata texto: datas saem como datetime e tempos como número,
+# e a página mostra com ``st.column_config``.
+
+PERCENTIS = (0.5, 0.9)
+SLA_MINUTOS = 15
+
+# coluna padronizada -> nomes possíveis no retorno do CRM (por trecho)
+COLUNAS_CRM = {
+    "NOME_LEAD": ["nome_pessoa", "nome", "lead"],
+    "TELEFONE_LEAD": ["telefone", "telefone_pessoa", "whatsapp"],
+    "CORRETOR": ["nome_corretor", "corretor", "responsavel", "responsável", "consultor", "usuario", "usuário"],
+    "SITUACAO": ["nome_situacao", "situacao", "situação"],
+    "DATA_CAPTURA_DT": ["data_captura"],
+    "DATA_COM_CORRETOR_DT": ["data_com_corretor", "data_qualificando"],
+    "DATA_ULT_INTERACAO_DT": ["data_ultima_interacao"],
+}
+COLUNAS_DATA = ["DATA_CAPTURA_DT", "DATA_COM_CORRETOR_DT", "DATA_ULT_INTERACAO_DT"]
+
+
+def _achar_coluna(colunas: Sequence[str], possiveis: Sequence[str]) -> Optional[str]:
+    minusculas = {c.lower(): c for c in colunas}
+    for nome in possiveis:
+        for base, real in minusculas.items():
+            if nome.lower() in base:
+                return real
+    return None
+
+
+def preparar_leads(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Colunas padronizadas + ATENDIDO/PERDIDO e os dois tempos em minutos."""
+    df = pd.DataFrame(index=df_raw.index)
+
+    for destino, possiveis in COLUNAS_CRM.items():
+        origem = _achar_coluna(df_raw.columns, possiveis)
+        if destino in COLUNAS_DATA:
+            df[destino] = pd.to_datetime(df_raw[origem], errors="coerce") if origem else pd.NaT
+        else:
+            df[destino] = df_raw[origem].fillna("").astype(str) if origem else ""
+
+    df["PERDIDO"] = df["SITUACAO"].str.upper().str.contains("PERD", na=False)
+    df["ATENDIDO"] = df["DATA_COM_CORRETOR_DT"].notna()
+    df["TEMPO_ATEND_MIN"] = (
+        (df["DATA_COM_CORRETOR_DT"] - df["DATA_CAPTURA_DT"]).dt.total_seconds() / 60
+    )
+    df["TEMPO_INTERACOES_MIN"] = (
+        (df["DATA_ULT_INTERACAO_DT"] - df["DATA_COM_CORRETOR_DT"]).dt.total_seconds() / 60
+    )
+    return df
+
+
+@rastrear("leads.metricas_periodo")
+def leads_do_periodo(data_ini, data_fim, ttl: float = 60, revalidar_s: float = 600) -> pd.DataFrame:
+    """Leads capturados em ``[data_ini, data_fim]`` (datas), já preparados."""
+    inicio = pd.Timestamp(data_ini).normalize()
+    fim = pd.Timestamp(data_fim).normalize() + pd.Timedelta(days=1)
+
+    df = preparar_leads(carregar_leads(since=inicio, ttl=ttl, revalidar_s=revalidar_s))
+    captura = df["DATA_CAPTURA_DT"]
+    return df[(captura >= inicio) & (captura < fim)].reset_index(drop=True)
+
+
+# =========================================================
+# DISTRIBUIÇÕES
+# =========================================================
+def _nome_percentil(p: float) -> str:
+    return f"P{int(round(p * 100))}"
+
+
+def _distribuicao(grupos, coluna: str, prefixo: str) -> pd.DataFrame:
+    tempos = grupos[coluna]
+    partes = {f"{prefixo}_MEDIA": tempos.mean()}
+    for p in PERCENTIS:
+        partes[f"{prefixo}_{_nome_percentil(p)}"] = tempos.quantile(p)
+    return pd.DataFrame(partes)
+
+
+def resumo_atendimento(df: pd.DataFrame) -> Dict[str, float]:
+    """KPIs do período: contagens, tempos (média e percentis) e % no SLA."""
+    leads = len(df)
+    atendidos = int(df["ATENDIDO"].sum())
+    perdidos = int(df["PERDIDO"].sum())
+    tempos = df.loc[df["ATENDIDO"], "TEMPO_ATEND_MIN"]
+
+    resumo = {
+        "LEADS": leads,
+        "ATENDIDOS": atendidos,
+        "NAO_ATENDIDOS": leads - atendidos,
+        "PERDIDOS": perdidos,
+        "NOVOS": int((~df["ATENDIDO"] & ~df["PERDIDO"]).sum()),
+        "ATEND_MEDIA": tempos.mean(),
+        "PCT_SLA": (df["TEMPO_ATEND_MIN"] <= SLA_MINUTOS).sum() / atendidos * 100 if atendidos else 0.0,
+    }
+    for p in PERCENTIS:
+        resumo[f"ATEND_{_nome_percentil(p)}"] = tempos.quantile(p) if not tempos.empty else np.nan
+    return resumo
+
+
+def metricas_por(df: pd.DataFrame, chave: str) -> pd.DataFrame:
+    """
+    Por ``chave`` (ex.: CORRETOR, DIA): leads, atendidos, % no SLA e as
+    distribuições dos dois tempos (média e percentis), em minutos.
+    """
+    contagens = (
+        df.assign(NO_SLA=df["TEMPO_ATEND_MIN"] <= SLA_MINUTOS)
+        .groupby(chave, dropna=False)
+        .agg(LEADS=("ATENDIDO", "size"), ATENDIDOS=("ATENDIDO", "sum"), NO_SLA=("NO_SLA", "sum"))
+    )
+    contagens["PCT_SLA"] = np.where(
+        contagens["ATENDIDOS"] > 0, contagens["NO_SLA"] / contagens["ATENDIDOS"] * 100, np.nan
+    )
+
+    atendidos = df[df["ATENDIDO"]].groupby(chave, dropna=False)
+    return (
+        contagens.drop(columns="NO_SLA")
+        .join(_distribuicao(atendidos, "TEMPO_ATEND_MIN", "ATEND"))
+        .join(_distribuicao(atendidos, "TEMPO_INTERACOES_MIN", "INTERACOES"))
+        .reset_index()
+    )
+
+
+def metricas_por_dia(df: pd.DataFrame) -> pd.DataFrame:
+    por_dia = df.assign(DIA=df["DATA_CAPTURA_DT"].dt.normalize())
+    return metricas_por(por_dia, "DIA").sort_values("DIA")
@@ -0,0 +1,261 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from utils.commercial_repository import month_label
+from utils.data_loader import carregar_dados_planilha, versao_dados
+from utils.diagnostico import marcar_cache_miss, rastrear, span
+from utils.estado_clientes import STATUS_VENDA, status_final_map
+from utils.planilha_normalizada import mes_ano_ptbr_para_datetime, planilha_normalizada
+
+# =========================================================
+# MOTOR DE CONSULTA DO PAINEL DE VENDAS (PÁGINA 13)
+# =========================================================
+# Preparado uma vez por versão dos dados:
+#   - ``vendas``: linhas de VENDA GERADA / INFORMADA, já sem os clientes cujo
+#     status final é DESISTIU, ordenadas por DIA;
+#   - ``movimento``: todas as linhas agregadas por DATA BASE × EQUIPE ×
+#     CORRETOR (registros, aprovações, primeiro e último dia), que respondem
+#     os números de "movimentação" sem voltar à planilha.
+#
+# Cada consulta recebe um ``FiltroVendas`` (bases, equipes, corretores e tipo
+# de venda) e calcula tudo o que a página mostra de uma vez: recorta as
+# vendas, deduplica (última venda do cliente dentro do recorte), agrega por
+# dia × equipe × corretor × construtora × empreendimento e tira daí o
+# diário, os rankings e os mixes. O resultado fica guardado por
+# (versão, filtro): ir e voltar num filtro não recalcula nada.
+
+TIPOS_VENDA = {
+    "VENDA GERADA + INFORMADA": tuple(STATUS_VENDA),
+    "Só VENDA GERADA": ("VENDA GERADA",),
+    "Só VENDA INFORMADA": ("VENDA INFORMADA",),
+}
+
+COLUNAS_VENDA = [
+    "DIA",
+    "DATA_BASE_LABEL",
+    "NOME_CLIENTE_BASE",
+    "CPF_CLIENTE_BASE",
+    "CHAVE_CLIENTE",
+    "EQUIPE",
+    "CORRETOR",
+    "CONSTRUTORA_BASE",
+    "EMPREENDIMENTO_BASE",
+    "STATUS_BASE",
+    "VGV",
+]
+CHAVES_CELULA = ["DIA", "EQUIPE", "CORRETOR", "CONSTRUTORA_BASE", "EMPREENDIMENTO_BASE", "STATUS_BASE"]
+CHAVES_MOVIMENTO = ["DATA_BASE_LABEL", "EQUIPE", "CORRETOR"]
+
+MAX_CONSULTAS = 64
+
+
+@dataclass(frozen=True)
+class FiltroVendas:
+    """Filtro da página. Tuplas vazias = sem filtro."""
+
+    bases: Tuple[str, ...] = ()
+    equipes: Tuple[str, ...] = ()
+    corretores: Tuple[str, ...] = ()
+    tipo_venda: str = "VENDA GERADA + INFORMADA"
+
+
+@dataclass
+class ResultadoVendas:
+    vendas: pd.DataFrame
+    diario: pd.Series
+    rank_equipe: pd.DataFrame
+    rank_corretor: pd.DataFrame
+    mix_construtora: pd.DataFrame
+    mix_empreendimento: pd.DataFrame
+    registros: int
+    aprovacoes: int
+    corretores_ativos: int
+    corretores_com_venda: int
+    vendas_geradas: int
+    vendas_informadas: int
+    dia_ini: Optional[pd.Timestamp]
+    dia_fim: Optional[pd.Timestamp]
+
+    @property
+    def qtd_vendas(self) -> int:
+        return len(self.vendas)
+
+    @property
+    def vgv_total(self) -> float:
+        return float(self.vendas["VGV"].sum()) if not self.vendas.empty else 0.0
+
+
+def _somar(celulas: pd.DataFrame, chaves, nome_qtde: str = "QTDE") -> pd.DataFrame:
+    return (
+        celulas.groupby(chaves)[["QTDE", "VGV"]]
+        .sum()
+        .rename(columns={"QTDE": nome_qtde})
+        .reset_index()
+        .sort_values("VGV", ascending=False)
+    )
+
+
+def _filtrar(df: pd.DataFrame, filtro: FiltroVendas) -> pd.DataFrame:
+    mascara = pd.Series(True, index=df.index)
+    for coluna, valores in (
+        ("DATA_BASE_LABEL", filtro.bases),
+        ("EQUIPE", filtro.equipes),
+        ("CORRETOR", filtro.corretores),
+    ):
+        if valores:
+            mascara &= df[coluna].isin(valores)
+    return df[mascara]
+
+
+# ---------------------------------------------------------
+# PREPARO (UMA VEZ POR VERSÃO)
+# ---------------------------------------------------------
+def preparar_base_vendas(df: pd.DataFrame) -> pd.DataFrame:
+    """DIA em datetime, DATA BASE no rótulo mm/aaaa da página e DESISTIU padronizado."""
+    df = df.copy()
+    df["DIA"] = pd.to_datetime(df["DIA"], errors="coerce")
+
+    if "DATA BASE" in df.columns:
+        data_base = mes_ano_ptbr_para_datetime(df["DATA BASE"])
+        df["DATA_BASE"] = data_base.dt.date
+        df["DATA_BASE_LABEL"] = month_label(data_base)
+    else:
+        df["DATA_BASE"] = df["DIA"].dt.date
+        df["DATA_BASE_LABEL"] = df["DIA"].dt.strftime("%m/%Y")
+
+    df["STATUS_BASE"] = df["STATUS_BASE"].fillna("").astype(str).str.upper()
+    df.loc[df["STATUS_BASE"].str.contains("DESIST", na=False), "STATUS_BASE"] = "DESISTIU"
+    return df
+
+
+class MotorVendas:
+    """Base de vendas de uma versão dos dados + consultas memorizadas."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.versao = df.attrs.get("versao_dados", "")
+
+        # regra do DESISTIU global: tabela compartilhada por versão dos dados
+        status_final = status_final_map(df, escopo="vendas")
+
+        vendas = df[df["STATUS_BASE"].isin(STATUS_VENDA)]
+        vendas = vendas[vendas["CHAVE_CLIENTE"].map(status_final) != "DESISTIU"]
+        self.vendas = vendas[COLUNAS_VENDA].sort_values("DIA", kind="stable").reset_index(drop=True)
+
+        movimento = df[CHAVES_MOVIMENTO + ["DIA"]].assign(
+            APROVACOES=df["STATUS_BASE"].str.contains(r"\bAPROVADO\b", na=False)
+        )
+        self.movimento = (
+            movimento.groupby(CHAVES_MOVIMENTO, dropna=False)
+            .agg(
+                REGISTROS=("DIA", "size"),
+                APROVACOES=("APROVACOES", "sum"),
+                DIA_MIN=("DIA", "min"),
+                DIA_MAX=("DIA", "max"),
+            )
+            .reset_index()
+        )
+
+        self.bases = (
+            df[["DATA_BASE", "DATA_BASE_LABEL"]]
+            .dropna(subset=["DATA_BASE"])
+            .drop_duplicates()
+            .sort_values("DATA_BASE")["DATA_BASE_LABEL"]
+            .tolist()
+        )
+
+        self._consultas: "OrderedDict[FiltroVendas, ResultadoVendas]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def opcoes(self, bases: Tuple[str, ...] = ()) -> Tuple[list, list]:
+        """Equipes e corretores com movimento nas ``bases`` (todas, se vazio)."""
+        mov = _filtrar(self.movimento, FiltroVendas(bases=bases))
+        return sorted(mov["EQUIPE"].dropna().astype(str).unique()), sorted(mov["CORRETOR"].dropna().astype(str).unique())
+
+    def consultar(self, filtro: FiltroVendas) -> ResultadoVendas:
+        with self._lock:
+            pronto = self._consultas.get(filtro)
+            if pronto is not None:
+                self._consultas.move_to_end(filtro)
+                return pronto
+
+        with span("vendas.consulta") as sp:
+            pronto = self._calcular(filtro)
+            sp.registrar_frame(pronto.vendas)
+
+        with self._lock:
+            self._consultas[filtro] = pronto
+            while len(self._consultas) > MAX_CONSULTAS:
+                self._consultas.popitem(last=False)
+        return pronto
+
+    def _calcular(self, filtro: FiltroVendas) -> ResultadoVendas:
+        mov = _filtrar(self.movimento, filtro)
+
+        # uma venda por cliente dentro do recorte (a última), depois o tipo
+        vendas = _filtrar(self.vendas, filtro).drop_duplicates("CHAVE_CLIENTE", keep="last")
+        vendas = vendas[vendas["STATUS_BASE"].isin(TIPOS_VENDA[filtro.tipo_venda])]
+
+        celulas = (
+            vendas.assign(DIA=vendas["DIA"].dt.normalize())
+            .groupby(CHAVES_CELULA, dropna=False)
+            .agg(QTDE=("VGV", "size"), VGV=("VGV", "sum"))
+            .reset_index()
+        )
+        por_status = celulas.groupby("STATUS_BASE")["QTDE"].sum()
+
+        return ResultadoVendas(
+            vendas=vendas,
+            diario=celulas.groupby("DIA")["VGV"].sum(),
+            rank_equipe=_somar(celulas, "EQUIPE"),
+            rank_corretor=_somar(celulas, ["EQUIPE", "CORRETOR"]),
+            mix_construtora=_somar(celulas, "CONSTRUTORA_BASE", "QTDE_VENDAS"),
+            mix_empreendimento=_somar(celulas, "EMPREENDIMENTO_BASE", "QTDE_VENDAS"),
+            registros=int(mov["REGISTROS"].sum()),
+            aprovacoes=int(mov["APROVACOES"].sum()),
+            corretores_ativos=int(mov["CORRETOR"].nunique()),
+            corretores_com_venda=int(vendas["CORRETOR"].nunique()),
+            vendas_geradas=int(por_status.get("VENDA GERADA", 0)),
+            vendas_informadas=int(por_status.get("VENDA INFORMADA", 0)),
+            dia_ini=mov["DIA_MIN"].min() if not mov.empty else None,
+            dia_fim=mov["DIA_MAX"].max() if not mov.empty else None,
+        )
+
+
+# ---------------------------------------------------------
+# CACHE POR VERSÃO DOS DADOS
+# ---------------------------------------------------------
+MAX_VERSOES = 4
+
+_CACHE: "OrderedDict[str, MotorVendas]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+@rastrear("vendas.motor", cache=True)
+def motor_vendas(_refresh_key=None) -> MotorVendas:
+    """
+    Motor da versão atual da planilha (perfil de status "vendas"). O motor
+    e os resultados das consultas são compartilhados: não altere no lugar.
+    """
+    # só a versão: recorte sem colunas, sem copiar a planilha
+    versao = versao_dados(carregar_dados_planilha(_refresh_key=_refresh_key, colunas=[]))
+
+    with _LOCK:
+        pronto = _CACHE.get(versao)
+        if pronto is not None:
+            _CACHE.move_to_end(versao)
+            return pronto
+
+    marcar_cache_miss()
+    df = planilha_normalizada("vendas", _refresh_key=_refresh_key)
+    pronto = MotorVendas(preparar_base_vendas(df))
+
+    with _LOCK:
+        _CACHE[versao] = pronto
+        while len(_CACHE) > MAX_VERSOES:
+            _CACHE.popitem(last=False)
+
+    return pronto
@@ -0,0 +1,298 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+# =================================================
+# CAMINHOS / POLÍTICA DE RETENÇÃO
+# =================================================
+BASE_DIR = Path("data")
+ARQ_BANCO = BASE_DIR / "notificacoes.db"
+
+# arquivos antigos, importados uma única vez para o banco
+ARQ_NOTIFICACOES_JSON = BASE_DIR / "notificacoes.json"
+ARQ_SNAPSHOT_JSON = BASE_DIR / "snapshot_clientes.json"
+
+DIAS_RETENCAO_LIDAS = 30          # lidas somem depois de 30 dias
+DIAS_RETENCAO_MAXIMA = 180        # nada fica mais que 180 dias
+MAX_POR_CORRETOR = 500            # guarda só as 500 mais recentes por corretor
+INTERVALO_COMPACTACAO = timedelta(hours=24)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notificacoes (
+    id         TEXT PRIMARY KEY,
+    corretor   TEXT NOT NULL,
+    cliente    TEXT NOT NULL,
+    tipo       TEXT NOT NULL,
+    status     TEXT,
+    de         TEXT,
+    para       TEXT,
+    timestamp  TEXT NOT NULL,
+    lido       INTEGER NOT NULL DEFAULT 0,
+    lido_em    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_notificacoes_corretor_lido ON notificacoes (corretor, lido);
+CREATE INDEX IF NOT EXISTS idx_notificacoes_timestamp ON notificacoes (timestamp);
+
+CREATE TABLE IF NOT EXISTS snapshot_clientes (
+    chave     TEXT PRIMARY KEY,
+    status    TEXT,
+    corretor  TEXT
+);
+
+CREATE TABLE IF NOT EXISTS metadados (
+    chave  TEXT PRIMARY KEY,
+    valor  TEXT
+);
+"""
+
+_schema_pronto = set()
+_schema_lock = threading.Lock()
+
+
+# =================================================
+# CONEXÃO
+# =================================================
+def _preparar(conn: sqlite3.Connection, caminho: Path):
+    chave = str(caminho.resolve())
+    if chave in _schema_pronto:
+        return
+    with _schema_lock:
+        if chave in _schema_pronto:
+            return
+        # WAL: leitores de várias sessões do Streamlit não bloqueiam a escrita
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _migrar_json(conn)
+        conn.commit()
+        _schema_pronto.add(chave)
+
+
+@contextmanager
+def conexao(caminho: Path = None):
+    caminho = Path(caminho or ARQ_BANCO)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(caminho, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _preparar(conn, caminho)
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def ler_metadado(conn: sqlite3.Connection, chave: str) -> str:
+    row = conn.execute("SELECT valor FROM metadados WHERE chave = ?", (chave,)).fetchone()
+    return row["valor"] if row else ""
+
+
+def gravar_metadado(conn: sqlite3.Connection, chave: str, valor: str):
+    conn.execute(
+        "INSERT INTO metadados (chave, valor) VALUES (?, ?) "
+        "ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor",
+        (chave, valor),
+    )
+
+
+# =================================================
+# MIGRAÇÃO DOS JSONs ANTIGOS
+# =================================================
+def _ler_json(caminho: Path) -> dict:
+    if caminho.exists():
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                return json.load(f) or {}
+        except Exception:
+            return {}
+    return {}
+
+
+def _migrar_json(conn: sqlite3.Connection):
+    if ler_metadado(conn, "migrado_json"):
+        return
+
+    notificacoes = _ler_json(ARQ_NOTIFICACOES_JSON)
+    registros = [
+        {**n, "corretor": corretor}
+        for corretor, lista in notificacoes.items()
+        for n in (lista or [])
+        if n.get("id")
+    ]
+    if registros:
+        _inserir(conn, registros)
+
+    snapshot = _ler_json(ARQ_SNAPSHOT_JSON)
+    if snapshot:
+        conn.executemany(
+            "INSERT OR REPLACE INTO snapshot_clientes (chave, status, corretor) VALUES (?, ?, ?)",
+            [(chave, (v or {}).get("status"), (v or {}).get("corretor")) for chave, v in snapshot.items()],
+        )
+
+    gravar_metadado(conn, "migrado_json", datetime.now().isoformat(timespec="seconds"))
+
+
+# =================================================
+# NOTIFICAÇÕES
+# =================================================
+def _inserir(conn: sqlite3.Connection, registros: list):
+    conn.executemany(
+        "INSERT OR IGNORE INTO notificacoes "
+        "(id, corretor, cliente, tipo, status, de, para, timestamp, lido) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                r["id"],
+                str(r.get("corretor", "")).upper().strip(),
+                r.get("cliente", ""),
+                r.get("tipo", ""),
+                r.get("status"),
+                r.get("de"),
+                r.get("para"),
+                r.get("timestamp") or datetime.now().isoformat(timespec="seconds"),
+                1 if r.get("lido") else 0,
+            )
+            for r in registros
+        ],
+    )
+
+
+def inserir_notificacoes(registros: list, conn: sqlite3.Connection = None):
+    if not registros:
+        return
+    if conn is not None:
+        _inserir(conn, registros)
+        return
+    with conexao() as nova:
+        _inserir(nova, registros)
+
+
+def notificacoes_pendentes(nome_corretor: str) -> list:
+    """Não lidas do corretor, mais antigas primeiro (usa o índice corretor+lido)."""
+    with conexao() as conn:
+        rows = conn.execute(
+            "SELECT id, cliente, tipo, status, de, para, timestamp, lido "
+            "FROM notificacoes WHERE corretor = ? AND lido = 0 ORDER BY timestamp, rowid",
+            (str(nome_corretor or "").upper().strip(),),
+        ).fetchall()
+
+    return [{**dict(row), "lido": bool(row["lido"])} for row in rows]
+
+
+def marcar_como_lido(nome_corretor: str, alerta_id: str):
+    with conexao() as conn:
+        conn.execute(
+            "UPDATE notificacoes SET lido = 1, lido_em = ? WHERE id = ? AND corretor = ?",
+            (
+                datetime.now().isoformat(timespec="seconds"),
+                alerta_id,
+                str(nome_corretor or "").upper().strip(),
+            ),
+        )
+
+
+# =================================================
+# SNAPSHOT DE CLIENTES
+# =================================================
+def ler_snapshot(conn: sqlite3.Connection = None) -> dict:
+    if conn is None:
+        with conexao() as nova:
+            return ler_snapshot(nova)
+
+    return {
+        row["chave"]: {"status": row["status"], "corretor": row["corretor"]}
+        for row in conn.execute("SELECT chave, status, corretor FROM snapshot_clientes")
+    }
+
+
+def ler_snapshot_frame(conn: sqlite3.Connection) -> pd.DataFrame:
+    return pd.read_sql_query(
+        "SELECT chave AS CHAVE_CLIENTE, status AS STATUS_ANTERIOR, corretor AS CORRETOR_ANTERIOR "
+        "FROM snapshot_clientes",
+        conn,
+    )
+
+
+def atualizar_snapshot(alterados: list, removidos: list, conn: sqlite3.Connection):
+    """Grava só o que mudou: ``alterados`` = [(chave, status, corretor)], ``removidos`` = [chave]."""
+    if alterados:
+        conn.executemany(
+            "INSERT INTO snapshot_clientes (chave, status, corretor) VALUES (?, ?, ?) "
+            "ON CONFLICT(chave) DO UPDATE SET status = excluded.status, corretor = excluded.corretor",
+            alterados,
+        )
+    if removidos:
+        conn.executemany(
+            "DELETE FROM snapshot_clientes WHERE chave = ?",
+            [(chave,) for chave in removidos],
+        )
+
+
+# =================================================
+# RETENÇÃO / COMPACTAÇÃO
+# =================================================
+def compactar(conn: sqlite3.Connection = None, agora: datetime = None) -> int:
+    """
+    Aplica a política de retenção e devolve quantas notificações saíram:
+    - lidas com mais de DIAS_RETENCAO_LIDAS dias;
+    - qualquer uma com mais de DIAS_RETENCAO_MAXIMA dias;
+    - o excedente de MAX_POR_CORRETOR por corretor (mais antigas primeiro).
+    """
+    if conn is None:
+        with conexao() as nova:
+            return compactar(nova, agora)
+
+    agora = agora or datetime.now()
+    limite_lidas = (agora - timedelta(days=DIAS_RETENCAO_LIDAS)).isoformat(timespec="seconds")
+    limite_max = (agora - timedelta(days=DIAS_RETENCAO_MAXIMA)).isoformat(timespec="seconds")
+
+    antes = conn.total_changes
+    conn.execute("DELETE FROM notificacoes WHERE lido = 1 AND timestamp < ?", (limite_lidas,))
+    conn.execute("DELETE FROM notificacoes WHERE timestamp < ?", (limite_max,))
+    conn.execute(
+        """
+        DELETE FROM notificacoes WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY corretor ORDER BY timestamp DESC, rowid DESC
+                ) AS posicao
+                FROM notificacoes
+            ) WHERE posicao > ?
+        )
+        """,
+        (MAX_POR_CORRETOR,),
+    )
+    removidas = conn.total_changes - antes
+
+    gravar_metadado(conn, "ultima_compactacao", agora.isoformat(timespec="seconds"))
+    return removidas
+
+
+def compactar_se_necessario(conn: sqlite3.Connection = None) -> int:
+    if conn is None:
+        with conexao() as nova:
+            return compactar_se_necessario(nova)
+
+    ultima = ler_metadado(conn, "ultima_compactacao")
+    try:
+        if ultima and datetime.now() - datetime.fromisoformat(ultima) < INTERVALO_COMPACTACAO:
+            return 0
+    except ValueError:
+        pass
+
+    removidas = compactar(conn)
+    if removidas:
+        # devolve ao disco o espaço do WAL depois de apagar em lote
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return removidas
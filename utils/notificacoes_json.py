@@ -1,36 +1,44 @@
-import json
+import hashlib
+import threading
 import uuid
-from pathlib import Path
 from datetime import datetime
 import pandas as pd
 
-# =================================================
-# CAMINHOS DOS DADOS
-# =================================================
-BASE_DIR = Path("data")
-ARQ_NOTIFICACOES = BASE_DIR / "notificacoes.json"
-ARQ_SNAPSHOT = BASE_DIR / "snapshot_clientes.json"
+from utils.diagnostico import rastrear, span_atual
+from utils.notificacoes_db import (
+    atualizar_snapshot,
+    compactar_se_necessario,
+    conexao,
+    gravar_metadado,
+    inserir_notificacoes,
+    ler_metadado,
+    ler_snapshot_frame,
+)
 
 # =================================================
-# UTILIDADES JSON
+# PERSISTÊNCIA
 # =================================================
-def _ler_json(caminho: Path) -> dict:
-    if caminho.exists():
-        try:
-            with open(caminho, "r", encoding="utf-8") as f:
-                return json.load(f) or {}
-        except Exception:
-            return {}
-    return {}
-
-def _salvar_json(caminho: Path, data: dict):
-    caminho.parent.mkdir(parents=True, exist_ok=True)
-    with open(caminho, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+# Notificações e snapshot ficam em data/notificacoes.db (SQLite, ver
+# utils/notificacoes_db.py). Os antigos notificacoes.json e
+# snapshot_clientes.json são importados automaticamente na primeira abertura.
 
 # =================================================
 # PROCESSADOR DE EVENTOS (NOTIFICAÇÕES)
 # =================================================
+COLUNAS_EVENTO = ["CHAVE_CLIENTE", "STATUS_BASE", "CORRETOR"]
+
+# uma única geração de eventos por versão dos dados, no processo inteiro
+_LOCK_EVENTOS = threading.Lock()
+_versao_processada = None
+
+
+def _hash_base(df: pd.DataFrame) -> str:
+    """Impressão digital das colunas que geram eventos (ordem das linhas conta)."""
+    valores = pd.util.hash_pandas_object(df[COLUNAS_EVENTO], index=False).to_numpy()
+    return hashlib.sha1(valores.tobytes()).hexdigest()
+
+
+@rastrear("notificacoes.processar_eventos")
 def processar_eventos(df: pd.DataFrame):
     """
     Gera notificações persistentes quando:
@@ -39,87 +47,127 @@ def processar_eventos(df: pd.DataFrame):
 
     NÃO interpreta status.
     Usa exatamente o texto da planilha.
+
+    Se a base não mudou desde a última execução (mesmo hash), não faz nada.
     """
 
     if df is None or df.empty:
         return
 
-    colunas_necessarias = {"CHAVE_CLIENTE", "STATUS_BASE", "CORRETOR"}
-    if not colunas_necessarias.issubset(df.columns):
+    if not set(COLUNAS_EVENTO).issubset(df.columns):
         return
 
-    # -------------------------
-    # Leitura do estado salvo
-    # -------------------------
-    notificacoes = _ler_json(ARQ_NOTIFICACOES)
-    snapshot = _ler_json(ARQ_SNAPSHOT)
-
-    df = df.copy()
-
-    df["STATUS_BASE"] = df["STATUS_BASE"].astype(str).str.upper().str.strip()
-    df["CORRETOR"] = df["CORRETOR"].astype(str).str.upper().str.strip()
-
-    agora = datetime.now().isoformat(timespec="seconds")
-
-    # -------------------------
-    # Último estado por cliente
-    # -------------------------
-    ultimos = (
-        df.groupby("CHAVE_CLIENTE", as_index=False)
-        .tail(1)[["CHAVE_CLIENTE", "STATUS_BASE", "CORRETOR"]]
-    )
+    hash_atual = _hash_base(df)
 
-    novo_snapshot = {}
-
-    for _, row in ultimos.iterrows():
-        chave = row["CHAVE_CLIENTE"]
-        status_atual = row["STATUS_BASE"]
-        corretor = row["CORRETOR"]
-        cliente = chave.split("|")[0].strip()
-
-        # garante estrutura por corretor
-        if corretor not in notificacoes:
-            notificacoes[corretor] = []
-
-        estado_antigo = snapshot.get(chave)
+    with conexao() as conn:
+        if ler_metadado(conn, "hash_base_eventos") == hash_atual:
+            span_atual().registrar(linhas=len(df), pulado=True)
+            return
 
         # -------------------------
-        # CLIENTE NOVO
+        # Último estado por cliente
         # -------------------------
-        if not estado_antigo:
-            notificacoes[corretor].append({
-                "id": str(uuid.uuid4()),
-                "cliente": cliente,
-                "status": status_atual,
-                "tipo": "NOVO_CLIENTE",
-                "timestamp": agora,
-                "lido": False
-            })
+        ultimos = df[COLUNAS_EVENTO].groupby("CHAVE_CLIENTE", as_index=False).tail(1)
+        ultimos = ultimos.assign(
+            STATUS_BASE=ultimos["STATUS_BASE"].astype(str).str.upper().str.strip(),
+            CORRETOR=ultimos["CORRETOR"].astype(str).str.upper().str.strip(),
+        )
+
+        diff = _comparar_snapshot(ultimos, ler_snapshot_frame(conn))
+        eventos = _montar_eventos(diff, datetime.now().isoformat(timespec="seconds"))
+
+        span_atual().registrar(
+            linhas=len(df),
+            clientes=len(ultimos),
+            eventos=len(eventos),
+            removidos=len(diff.attrs["removidos"]),
+        )
 
         # -------------------------
-        # MUDANÇA DE STATUS
+        # Persistência (uma transação)
         # -------------------------
-        elif estado_antigo.get("status") != status_atual:
-            notificacoes[corretor].append({
-                "id": str(uuid.uuid4()),
-                "cliente": cliente,
-                "de": estado_antigo.get("status"),
-                "para": status_atual,
-                "tipo": "MUDANCA_STATUS",
-                "timestamp": agora,
-                "lido": False
-            })
+        inserir_notificacoes(eventos, conn)
 
-        # -------------------------
-        # Atualiza snapshot
-        # -------------------------
-        novo_snapshot[chave] = {
-            "status": status_atual,
-            "corretor": corretor
-        }
-
-    # -------------------------
-    # Persistência
-    # -------------------------
-    _salvar_json(ARQ_NOTIFICACOES, notificacoes)
-    _salvar_json(ARQ_SNAPSHOT, novo_snapshot)
+        alterados = diff[diff["NOVO"] | diff["MUDOU_STATUS"] | diff["MUDOU_CORRETOR"]]
+        atualizar_snapshot(
+            list(alterados[COLUNAS_EVENTO].itertuples(index=False, name=None)),
+            diff.attrs["removidos"],
+            conn,
+        )
+        gravar_metadado(conn, "hash_base_eventos", hash_atual)
+        compactar_se_necessario(conn)
+
+
+def _comparar_snapshot(ultimos: pd.DataFrame, anterior: pd.DataFrame) -> pd.DataFrame:
+    """
+    Junta o estado atual com o snapshot salvo e marca, por cliente:
+    NOVO, MUDOU_STATUS e MUDOU_CORRETOR. Clientes que sumiram da base ficam
+    em ``attrs["removidos"]``.
+    """
+    diff = ultimos.merge(anterior, on="CHAVE_CLIENTE", how="left", indicator=True)
+
+    existia = diff["_merge"] == "both"
+    diff["NOVO"] = ~existia
+    diff["MUDOU_STATUS"] = existia & (diff["STATUS_ANTERIOR"].fillna("\0") != diff["STATUS_BASE"])
+    diff["MUDOU_CORRETOR"] = existia & (diff["CORRETOR_ANTERIOR"].fillna("\0") != diff["CORRETOR"])
+    diff = diff.drop(columns="_merge")
+
+    diff.attrs["removidos"] = anterior.loc[
+        ~anterior["CHAVE_CLIENTE"].isin(ultimos["CHAVE_CLIENTE"]), "CHAVE_CLIENTE"
+    ].tolist()
+    return diff
+
+
+def _montar_eventos(diff: pd.DataFrame, agora: str) -> list:
+    com_evento = diff[diff["NOVO"] | diff["MUDOU_STATUS"]]
+    if com_evento.empty:
+        return []
+
+    novo = com_evento["NOVO"]
+    status = com_evento["STATUS_BASE"]
+
+    eventos = pd.DataFrame({
+        "id": [str(uuid.uuid4()) for _ in range(len(com_evento))],
+        "corretor": com_evento["CORRETOR"],
+        "cliente": com_evento["CHAVE_CLIENTE"].astype(str).str.split("|").str[0].str.strip(),
+        "tipo": novo.map({True: "NOVO_CLIENTE", False: "MUDANCA_STATUS"}),
+        # NOVO_CLIENTE usa "status"; MUDANCA_STATUS usa "de" -> "para"
+        "status": status.where(novo),
+        "de": com_evento["STATUS_ANTERIOR"].where(~novo),
+        "para": status.where(~novo),
+        "timestamp": agora,
+        "lido": False,
+    })
+
+    # NaN -> None para o SQLite gravar NULL
+    return eventos.astype(object).where(eventos.notna(), None).to_dict("records")
+
+
+def processar_eventos_por_versao(df: pd.DataFrame) -> bool:
+    """
+    Chamado a cada renderização de página: só roda ``processar_eventos``
+    quando chega uma versão nova dos dados (``df.attrs["versao_dados"]``).
+
+    Se outra sessão já estiver processando, não espera: a página segue e
+    apenas lê as notificações já gravadas. Devolve True se processou.
+    """
+    global _versao_processada
+
+    if df is None or df.empty or not set(COLUNAS_EVENTO).issubset(df.columns):
+        return False
+
+    versao = df.attrs.get("versao_dados") or _hash_base(df)
+    if versao == _versao_processada:
+        return False
+
+    if not _LOCK_EVENTOS.acquire(blocking=False):
+        return False
+
+    try:
+        if versao == _versao_processada:
+            return False
+        processar_eventos(df)
+        _versao_processada = versao
+        return True
+    finally:
+        _LOCK_EVENTOS.release()
@@ -6,6 +6,8 @@ from typing import Any, Dict, Iterable, List, Optional, Tuple
 import pandas as pd
 import requests
 
+from utils.diagnostico import rastrear, span_atual
+
 
 DEFAULT_BASE_URL = "https://api.pipe.run/v1"
 
@@ -217,6 +219,7 @@ class PiperunClient:
         return False, last_error or "Nao foi possivel baixar a exportacao."
 
 
+    @rastrear("piperun.get_page")
     def get_page(
         self,
         endpoint: str,
@@ -263,6 +266,13 @@ class PiperunClient:
 
             records = self._extract_records(payload)
             next_cursor = self._extract_next_cursor(payload)
+            span_atual().registrar(
+                linhas=len(records),
+                n_bytes=len(response.content),
+                endpoint=endpoint,
+                page=page,
+                status=response.status_code,
+            )
             return PiperunFetchResult(
                 endpoint=endpoint,
                 data=pd.json_normalize(records) if records else pd.DataFrame(),
@@ -279,6 +289,7 @@ class PiperunClient:
             error=last_error or "Nao foi possivel consultar o endpoint.",
         )
 
+    @rastrear("piperun.fetch_first_available")
     def fetch_first_available(
         self,
         endpoints: Iterable[str],
@@ -326,6 +337,7 @@ class PiperunClient:
 
             if endpoint_ok:
                 data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+                span_atual().registrar(endpoint=endpoint, paginas=len(frames))
                 return PiperunFetchResult(endpoint=endpoint, data=data, ok=True, status_code=last_result.status_code if last_result else None)
 
         return PiperunFetchResult(
@@ -6,6 +6,8 @@ from typing import Dict, Iterable, List, Optional
 
 import pandas as pd
 
+from utils.diagnostico import rastrear, span_atual
+
 
 @dataclass
 class PiperunColumnMap:
@@ -521,6 +523,7 @@ def build_stage_metrics(deals_df: pd.DataFrame, dims: List[str]) -> pd.DataFrame
     return tmp.groupby(dims).agg(**{col: (col, "sum") for col in stage_cols}).reset_index()
 
 
+@rastrear("piperun.build_performance")
 def build_performance(
     deals_raw: pd.DataFrame,
     actions_raw: pd.DataFrame,
@@ -529,6 +532,10 @@ def build_performance(
     remanejo_dias: int = 2,
     reference_maps: Dict[str, Dict[str, str]] | None = None,
 ) -> Dict[str, pd.DataFrame]:
+    span_atual().registrar(
+        deals=0 if deals_raw is None else len(deals_raw),
+        acoes=0 if actions_raw is None else len(actions_raw),
+    )
     deals = prepare_deals(deals_raw)
     actions = prepare_actions(actions_raw)
     deals, actions = enrich_with_references(deals, actions, deals_raw, actions_raw, reference_maps)
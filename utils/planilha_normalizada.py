@@ -0,0 +1,267 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils.commercial_repository import month_label
+from utils.data_loader import carregar_dados_planilha, versao_dados
+from utils.diagnostico import marcar_cache_miss, rastrear
+
+# =========================================================
+# NORMALIZAÇÃO DA PLANILHA DE ANÁLISES
+# =========================================================
+# Uma única rotina para as páginas que leem a aba de análises: datas,
+# equipe/corretor, construtora/empreendimento, status, VGV, nome/CPF,
+# CHAVE_CLIENTE e DATA BASE (mês comercial). O resultado fica guardado por
+# versão dos dados e perfil de status; cada página recebe uma cópia.
+
+NAO_INFORMADO = "NÃO INFORMADO"
+
+COLS_SITUACAO = ["SITUAÇÃO", "SITUAÇÃO ATUAL", "STATUS", "SITUACAO", "SITUACAO ATUAL"]
+COLS_CONSTRUTORA = ["CONSTRUTORA", "INCORPORADORA"]
+COLS_EMPREENDIMENTO = ["EMPREENDIMENTO", "PRODUTO", "IMÓVEL", "IMOVEL"]
+COLS_NOME = ["NOME", "CLIENTE", "NOME CLIENTE", "NOME DO CLIENTE"]
+COLS_CPF = ["CPF", "CPF CLIENTE", "CPF DO CLIENTE"]
+COLS_DATA_BASE = ["DATA BASE", "DATA_BASE", "DT BASE", "DATA REF", "DATA REFERÊNCIA", "DATA REFERENCIA"]
+
+# ---------------------------------------------------------
+# MESES (PT-BR)
+# ---------------------------------------------------------
+MESES_PTBR = {
+    "janeiro": 1,
+    "fevereiro": 2,
+    "março": 3,
+    "marco": 3,
+    "abril": 4,
+    "maio": 5,
+    "junho": 6,
+    "julho": 7,
+    "agosto": 8,
+    "setembro": 9,
+    "outubro": 10,
+    "novembro": 11,
+    "dezembro": 12,
+}
+
+
+def _mes_ano_para_timestamp(texto) -> pd.Timestamp:
+    partes = str(texto).strip().lower().split()
+    if not partes:
+        return pd.NaT
+    mes = MESES_PTBR.get(partes[0])
+    if mes is None:
+        return pd.NaT
+    try:
+        return pd.Timestamp(int(partes[-1]), mes, 1)
+    except (ValueError, OverflowError):
+        return pd.NaT
+
+
+def mes_ano_ptbr_para_datetime(serie: pd.Series) -> pd.Series:
+    """
+    "Novembro 2025" / "novembro 2025" / "março 2025" -> datetime64 (dia 1).
+    Converte só os rótulos distintos (poucos) e espalha o resultado.
+    """
+    codigos, rotulos = pd.factorize(serie, use_na_sentinel=True)
+    convertidos = pd.DatetimeIndex([_mes_ano_para_timestamp(r) for r in rotulos])
+    if len(convertidos) == 0:
+        return pd.Series(pd.NaT, index=serie.index, dtype="datetime64[ns]")
+    valores = convertidos.take(codigos, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(valores, index=serie.index)
+
+
+# ---------------------------------------------------------
+# STATUS: TABELA ÚNICA DE REGRAS
+# ---------------------------------------------------------
+# nome -> (padrão, é regex, STATUS_BASE)
+REGRAS_STATUS = {
+    "EM_ANALISE": ("EM ANÁLISE", False, "EM ANÁLISE"),
+    "REANALISE": ("REANÁLISE", False, "REANÁLISE"),
+    "APROV": ("APROV", False, "APROVADO"),
+    "APROVACAO": (r"\bAPROVAÇÃO\b", True, "APROVADO"),
+    "APROVADO_BACEN": ("APROVADO BACEN", False, "APROVADO"),
+    "APROVADO_RESTRICAO": ("APROVADO COM RESTRIÇÃO", False, "APROVADO"),
+    "REPROV": ("REPROV", False, "REPROVADO"),
+    "VENDA_GERADA": ("VENDA GERADA", False, "VENDA GERADA"),
+    "VENDA_INFORMADA": ("VENDA INFORMADA", False, "VENDA INFORMADA"),
+    "PEND": ("PEND", False, "PENDÊNCIA"),
+    "DESIST": ("DESIST", False, "DESISTIU"),
+}
+
+# Regras usadas por cada página, na ordem em que são aplicadas: a última que
+# casar vence, como nas antigas sequências de df.loc[...contains...].
+PERFIS_STATUS = {
+    "analises": ("EM_ANALISE", "REANALISE", "APROVACAO"),
+    "ranking_equipe": ("EM_ANALISE", "REANALISE"),
+    "padrao": ("EM_ANALISE", "REANALISE", "APROV", "REPROV", "VENDA_GERADA", "VENDA_INFORMADA"),
+    "pendencia": ("EM_ANALISE", "REANALISE", "APROV", "REPROV", "VENDA_GERADA", "VENDA_INFORMADA", "PEND"),
+    "desistencia": ("EM_ANALISE", "REANALISE", "APROV", "REPROV", "VENDA_GERADA", "VENDA_INFORMADA", "DESIST"),
+    "aprovados": (
+        "EM_ANALISE", "REANALISE", "APROVACAO", "APROVADO_BACEN", "APROVADO_RESTRICAO",
+        "REPROV", "VENDA_GERADA", "VENDA_INFORMADA",
+    ),
+    "vendas": ("EM_ANALISE", "REANALISE", "VENDA_GERADA", "VENDA_INFORMADA", "APROVACAO", "DESIST"),
+}
+
+
+def mapear_status(situacao: pd.Series, perfil: str = "padrao") -> pd.Series:
+    """
+    SITUAÇÃO da planilha -> STATUS_BASE. As regras rodam sobre os textos
+    distintos (algumas dezenas), não sobre todas as linhas.
+    """
+    regras = [REGRAS_STATUS[nome] for nome in PERFIS_STATUS[perfil]]
+
+    texto = situacao.fillna("").astype(str).str.upper()
+    distintos = pd.Series(texto.unique())
+
+    mapeado = pd.Series("", index=distintos.index, dtype=object)
+    for padrao, regex, status in regras:
+        mapeado[distintos.str.contains(padrao, regex=regex, na=False)] = status
+
+    tabela = dict(zip(distintos, mapeado))
+    return texto.map(tabela)
+
+
+# ---------------------------------------------------------
+# AUXILIARES
+# ---------------------------------------------------------
+def limpar_para_data(serie: pd.Series) -> pd.Series:
+    dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
+    return dt.dt.date
+
+
+def _primeira(df: pd.DataFrame, candidatas: list):
+    return next((c for c in candidatas if c in df.columns), None)
+
+
+def _texto(serie: pd.Series, padrao: str) -> pd.Series:
+    """upper/strip; vazio (ou NaN) vira ``padrao``."""
+    limpo = serie.fillna("").astype(str).str.upper().str.strip()
+    return limpo.mask(limpo == "", padrao)
+
+
+# ---------------------------------------------------------
+# PIPELINE
+# ---------------------------------------------------------
+def normalizar_planilha(
+    df: pd.DataFrame,
+    perfil_status: str = "padrao",
+    padrao_corretor: str = NAO_INFORMADO,
+    situacao_original: str = "upper",
+) -> pd.DataFrame:
+    """
+    Gera o frame canônico a partir da planilha crua.
+
+    Colunas: DIA (date), EQUIPE, CORRETOR, CONSTRUTORA_BASE,
+    EMPREENDIMENTO_BASE, STATUS_BASE, SITUACAO_ORIGINAL, OBSERVACOES_RAW,
+    VGV, NOME_CLIENTE_BASE, CPF_CLIENTE_BASE, CHAVE_CLIENTE, DATA_BASE (date)
+    e DATA_BASE_LABEL.
+
+    ``situacao_original``: "upper" (maiúsculas) ou "strip" (texto da planilha).
+    """
+    df = df.copy()
+    df.columns = [str(c).strip().upper() for c in df.columns]
+
+    # DATA / DIA
+    col_dia = _primeira(df, ["DATA", "DIA"])
+    df["DIA"] = limpar_para_data(df[col_dia]) if col_dia else pd.NaT
+
+    # EQUIPE / CORRETOR
+    for col in ["EQUIPE", "CORRETOR"]:
+        df[col] = _texto(df[col], padrao_corretor) if col in df.columns else padrao_corretor
+
+    # CONSTRUTORA / EMPREENDIMENTO
+    col_construtora = _primeira(df, COLS_CONSTRUTORA)
+    col_empreend = _primeira(df, COLS_EMPREENDIMENTO)
+    df["CONSTRUTORA_BASE"] = _texto(df[col_construtora], NAO_INFORMADO) if col_construtora else NAO_INFORMADO
+    df["EMPREENDIMENTO_BASE"] = _texto(df[col_empreend], NAO_INFORMADO) if col_empreend else NAO_INFORMADO
+
+    # STATUS BASE + SITUAÇÃO ORIGINAL
+    col_situacao = _primeira(df, COLS_SITUACAO)
+    if col_situacao:
+        original = df[col_situacao].fillna("").astype(str).str.strip()
+        df["STATUS_BASE"] = mapear_status(df[col_situacao], perfil_status)
+        df["SITUACAO_ORIGINAL"] = original.str.upper() if situacao_original == "upper" else original
+    else:
+        df["STATUS_BASE"] = ""
+        df["SITUACAO_ORIGINAL"] = NAO_INFORMADO
+
+    # OBSERVAÇÕES / VGV
+    if "OBSERVAÇÕES" in df.columns:
+        df["OBSERVACOES_RAW"] = df["OBSERVAÇÕES"].fillna("").astype(str).str.strip()
+        df["VGV"] = pd.to_numeric(df["OBSERVAÇÕES"], errors="coerce").fillna(0.0)
+    else:
+        df["OBSERVACOES_RAW"] = ""
+        df["VGV"] = 0.0
+
+    # NOME / CPF / CHAVE
+    col_nome = _primeira(df, COLS_NOME)
+    col_cpf = _primeira(df, COLS_CPF)
+    df["NOME_CLIENTE_BASE"] = _texto(df[col_nome], NAO_INFORMADO) if col_nome else NAO_INFORMADO
+    df["CPF_CLIENTE_BASE"] = (
+        df[col_cpf].fillna("").astype(str).str.replace(r"\D", "", regex=True) if col_cpf else ""
+    )
+    df["CHAVE_CLIENTE"] = df["NOME_CLIENTE_BASE"] + " | " + df["CPF_CLIENTE_BASE"]
+
+    # DATA BASE (mês comercial): rótulo como na planilha + data p/ ordenar
+    col_base = _primeira(df, COLS_DATA_BASE)
+    data_base = None
+    if col_base:
+        base_raw = df[col_base].fillna("").astype(str).str.strip()
+        data_base = mes_ano_ptbr_para_datetime(base_raw)
+        if data_base.notna().any():
+            df["DATA_BASE"] = data_base.dt.date
+            df["DATA_BASE_LABEL"] = base_raw.str.lower().str.title()
+        else:
+            data_base = None
+
+    if data_base is None:
+        df["DATA_BASE"] = df["DIA"]
+        df["DATA_BASE_LABEL"] = month_label(df["DIA"])
+
+    return df
+
+
+# ---------------------------------------------------------
+# CACHE POR VERSÃO DOS DADOS
+# ---------------------------------------------------------
+MAX_VERSOES = 12
+
+_CACHE: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+@rastrear("planilha.normalizada", cache=True)
+def planilha_normalizada(
+    perfil_status: str = "padrao",
+    padrao_corretor: str = NAO_INFORMADO,
+    situacao_original: str = "upper",
+    _refresh_key=None,
+) -> pd.DataFrame:
+    """
+    Planilha de análises já normalizada. A normalização roda uma vez por
+    versão dos dados (e combinação de parâmetros); cada chamada recebe uma
+    cópia, que a página pode alterar à vontade.
+    """
+    bruto = carregar_dados_planilha(_refresh_key=_refresh_key)
+    versao = versao_dados(bruto)
+    chave = (versao, perfil_status, padrao_corretor, situacao_original)
+
+    with _LOCK:
+        pronto = _CACHE.get(chave)
+        if pronto is not None:
+            _CACHE.move_to_end(chave)
+            return pronto.copy()
+
+    marcar_cache_miss()
+    pronto = normalizar_planilha(bruto, perfil_status, padrao_corretor, situacao_original)
+    pronto.attrs["versao_dados"] = versao
+    # recortes herdam attrs: quem guarda por versão confere o tamanho
+    pronto.attrs["linhas_versao"] = len(pronto)
+
+    with _LOCK:
+        _CACHE[chave] = pronto
+        while len(_CACHE) > MAX_VERSOES:
+            _CACHE.popitem(last=False)
+
+    return pronto.copy()
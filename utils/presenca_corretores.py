@@ -0,0 +1,112 @@
+from datetime import date
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# PRESENÇA / AUSÊNCIA DE CORRETORES
+# =========================================================
+# Tudo parte de um conjunto esparso de pares (CORRETOR, DIA) em que houve
+# alguma ação (análise na planilha, lead/interação no CRM...). Não se monta
+# a grade corretor × dia: último movimento é um groupby.max, dias parados é
+# subtração de datas em coluna e faltas no período = dias do período menos
+# os dias distintos com ação.
+#
+# Usado pela página 14 (Corretores – Visão Geral) e pelos alertas de
+# inatividade da página 07.
+
+
+def eventos_presenca(
+    fontes: Iterable[Tuple[pd.DataFrame, str, str]],
+    corretores: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Junta as fontes ``(df, coluna_corretor, coluna_data)`` em pares únicos
+    ``CORRETOR`` × ``DIA`` (datetime64 à meia-noite), sem datas vazias.
+    Com ``corretores``, fica só com eles.
+    """
+    partes = []
+    for df, col_corretor, col_data in fontes:
+        if df is None or df.empty or col_corretor not in df.columns or col_data not in df.columns:
+            continue
+        partes.append(pd.DataFrame({
+            "CORRETOR": df[col_corretor].to_numpy(),
+            "DIA": pd.to_datetime(df[col_data], errors="coerce").dt.normalize().to_numpy(),
+        }))
+
+    if not partes:
+        return pd.DataFrame({"CORRETOR": pd.Series(dtype=object), "DIA": pd.Series(dtype="datetime64[ns]")})
+
+    eventos = pd.concat(partes, ignore_index=True).dropna(subset=["DIA"])
+    if corretores is not None:
+        eventos = eventos[eventos["CORRETOR"].isin(corretores)]
+    return eventos.drop_duplicates().reset_index(drop=True)
+
+
+def _dia(valor) -> pd.Timestamp:
+    return pd.Timestamp(valor).normalize()
+
+
+def ultimo_movimento(
+    eventos: pd.DataFrame,
+    referencia=None,
+    corretores: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    ``CORRETOR``, ``ULTIMO_MOVIMENTO`` e ``DIAS_SEM_MOV`` (dias entre o
+    último movimento e ``referencia``, hoje por padrão). Com ``corretores``,
+    todos eles aparecem, com NaT/NaN quando nunca se mexeram.
+    """
+    referencia = _dia(referencia if referencia is not None else date.today())
+
+    ultimo = eventos.groupby("CORRETOR")["DIA"].max().rename("ULTIMO_MOVIMENTO")
+    if corretores is not None:
+        ultimo = ultimo.reindex(pd.Index(corretores, name="CORRETOR"))
+
+    resultado = ultimo.reset_index()
+    resultado["DIAS_SEM_MOV"] = (referencia - resultado["ULTIMO_MOVIMENTO"]).dt.days
+    return resultado
+
+
+def contar_faltas(
+    eventos: pd.DataFrame,
+    data_ini,
+    data_fim,
+    corretores: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    ``CORRETOR``, ``DIAS_PRESENTE``, ``FALTAS`` (dias do período sem ação)
+    e ``TOTAL_DIAS`` no intervalo fechado ``[data_ini, data_fim]``.
+    """
+    ini, fim = _dia(data_ini), _dia(data_fim)
+    total_dias = max(int((fim - ini).days) + 1, 0)
+
+    no_periodo = eventos[(eventos["DIA"] >= ini) & (eventos["DIA"] <= fim)]
+    presentes = no_periodo.groupby("CORRETOR")["DIA"].nunique().rename("DIAS_PRESENTE")
+    if corretores is not None:
+        presentes = presentes.reindex(pd.Index(corretores, name="CORRETOR"))
+
+    resultado = presentes.fillna(0).astype(int).reset_index()
+    resultado["TOTAL_DIAS"] = total_dias
+    resultado["FALTAS"] = total_dias - resultado["DIAS_PRESENTE"]
+    return resultado
+
+
+def inativos(
+    eventos: pd.DataFrame,
+    dias_minimos: int,
+    referencia=None,
+) -> pd.DataFrame:
+    """Corretores com movimento em ``eventos`` e parados há ``dias_minimos``+ dias."""
+    resumo = ultimo_movimento(eventos, referencia)
+    resumo = resumo[resumo["DIAS_SEM_MOV"] >= dias_minimos]
+    return resumo.sort_values("DIAS_SEM_MOV", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def presenca_percentual(faltas: pd.DataFrame) -> pd.Series:
+    """Dias com ação / dias do período, em %, com NaN quando o período é vazio."""
+    total = faltas["TOTAL_DIAS"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valor = np.where(total > 0, (total - faltas["FALTAS"].to_numpy(dtype=float)) / total * 100, np.nan)
+    return pd.Series(valor, index=faltas.index).round(1)
@@ -0,0 +1,714 @@
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.commercial_repository import normalize_text
+from utils.diagnostico import rastrear, span, span_atual
+from utils.supremo_config import TOKEN_SUPREMO
+
+# =========================================================
+# CLIENTE SUPREMO CRM (LEADS)
+# =========================================================
+# Um só lugar para paginar /v1/leads, usado pelas páginas 16, 17 e 18:
+# - sessão HTTP com pool de conexões, compartilhada no processo;
+# - páginas buscadas em paralelo, em lotes de ``max_workers``;
+# - parada antecipada por ``data_captura`` (a API devolve do mais novo para
+#   o mais antigo) ou por quantidade;
+# - tabela local de leads (SQLite) com sincronização incremental pela
+#   ``data_captura`` mais nova já vista (ver ``carregar_leads``).
+
+DEFAULT_BASE_URL = "https://api.supremocrm.com.br/v1"
+ENDPOINT_LEADS = "leads"
+MAX_WORKERS = 4
+
+
+@dataclass
+class SupremoPage:
+    page: int
+    leads: List[Dict[str, Any]] = field(default_factory=list)
+    ok: bool = True
+    status_code: Optional[int] = None
+    error: str = ""
+
+
+def _sessao_com_pool(tamanho: int) -> requests.Session:
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=tamanho, pool_maxsize=tamanho)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    return sessao
+
+
+_SESSAO = _sessao_com_pool(MAX_WORKERS * 2)
+
+
+def _captura(leads: List[Dict[str, Any]]) -> pd.Series:
+    return pd.to_datetime(pd.Series([lead.get("data_captura") for lead in leads], dtype=object), errors="coerce")
+
+
+class SupremoClient:
+    """
+    Cliente de leitura de leads do Supremo CRM.
+
+    ``fetch_leads`` percorre as páginas a partir da 1 (mais recentes) e para
+    na primeira página vazia/com erro, ao atingir ``limit`` leads ou ao
+    encontrar um lead capturado antes de ``since``.
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: int = 30,
+        max_workers: int = MAX_WORKERS,
+        session: Optional[requests.Session] = None,
+    ):
+        self.token = (token or TOKEN_SUPREMO or "").strip()
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_workers = max(1, int(max_workers))
+        self.session = session or _SESSAO
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.token)
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def fetch_page(self, page: int) -> SupremoPage:
+        url = f"{self.base_url}/{ENDPOINT_LEADS}"
+        try:
+            resp = self.session.get(url, headers=self._headers(), params={"pagina": page}, timeout=self.timeout)
+        except requests.RequestException as exc:
+            return SupremoPage(page=page, ok=False, error=str(exc))
+
+        if resp.status_code != 200:
+            return SupremoPage(page=page, ok=False, status_code=resp.status_code, error=resp.text[:300])
+
+        try:
+            dados = resp.json().get("data") or []
+        except ValueError as exc:
+            return SupremoPage(page=page, ok=False, status_code=resp.status_code, error=str(exc))
+
+        return SupremoPage(page=page, leads=[d for d in dados if isinstance(d, dict)], status_code=200)
+
+    @rastrear("supremo.fetch_leads")
+    def fetch_leads(
+        self,
+        max_pages: int = 200,
+        limit: Optional[int] = None,
+        since: Optional[pd.Timestamp] = None,
+        start_page: int = 1,
+        first_batch: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Devolve ``{"leads": [...], "completo": bool, "interrompido": bool,
+        "falhou": bool, "paginas": n, "proxima": p}``. ``completo``: a API
+        acabou (página vazia) antes dos limites. ``interrompido``: parou por
+        erro (``falhou``) ou por ``max_pages``, sem alcançar
+        ``since``/``limit``. ``proxima``: página de onde continuar (a que
+        falhou, ou a seguinte à última lida).
+
+        ``first_batch`` limita o primeiro lote (ex.: 1 na sincronização
+        incremental, em que quase sempre basta a página 1).
+        """
+        if not self.configured:
+            return {"leads": [], "completo": False, "interrompido": True, "falhou": True, "paginas": 0, "proxima": start_page}
+
+        since = pd.Timestamp(since) if since is not None else None
+        leads: List[Dict[str, Any]] = []
+        vistos = set()
+        completo = False
+        interrompido = True
+        falhou = False
+        paginas = 0
+        proxima = start_page
+        pagina = start_page
+        ultima = start_page + max_pages - 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pagina <= ultima:
+                tamanho = first_batch if (first_batch and pagina == start_page) else self.max_workers
+                lote = range(pagina, min(pagina + tamanho, ultima + 1))
+                resultados = list(pool.map(self.fetch_page, lote))
+                pagina = lote[-1] + 1
+
+                parar = False
+                for res in resultados:
+                    paginas += 1
+                    if not res.ok:
+                        span_atual().registrar(falha=f"pagina {res.page}: {res.error[:120]}")
+                        falhou = parar = True
+                        break
+                    proxima = res.page + 1
+                    if not res.leads:
+                        interrompido = False
+                        completo = True
+                        parar = True
+                        break
+
+                    novos = [lead for lead in res.leads if lead.get("id") not in vistos]
+                    if since is not None:
+                        capturas = _captura(novos)
+                        antigos = (capturas < since).to_numpy()
+                        novos = [lead for lead, antigo in zip(novos, antigos) if not antigo]
+                        parar = bool(antigos.any())
+                        if parar:
+                            interrompido = False
+
+                    for lead in novos:
+                        vistos.add(lead.get("id"))
+                    leads.extend(novos)
+
+                    if limit is not None and len(leads) >= limit:
+                        leads = leads[:limit]
+                        parar = True
+                        interrompido = False
+                    if parar:
+                        break
+
+                if parar:
+                    break
+
+        span_atual().registrar(linhas=len(leads), paginas=paginas)
+        return {
+            "leads": leads,
+            "completo": completo,
+            "interrompido": interrompido,
+            "falhou": falhou,
+            "paginas": paginas,
+            "proxima": proxima,
+        }
+
+
+
+
+# =========================================================
+# TABELA LOCAL DE LEADS (SQLITE, SINCRONIZAÇÃO INCREMENTAL)
+# =========================================================
+# data/supremo_leads.db guarda todo lead já visto (JSON cru, data_captura e
+# quando foi buscado) e, em ``metadados``:
+# - marca_captura: data_captura mais nova já lida a partir da página 1. A
+#   sincronização incremental pede só o que é igual ou mais novo que ela —
+#   em geral uma única requisição;
+# - cobertura: até que data_captura, para trás, a tabela está contígua com
+#   a API (abaixo dela pode faltar lead); vazio = a API inteira já foi lida;
+# - sincronizado_em: hora da última sincronização (epoch);
+# - retomar_pagina / retomar_ate: leitura do histórico em andamento (ver
+#   abaixo) — página de onde continuar e data_captura até onde, para trás,
+#   ela já chegou; retomada_falhou_em: última falha dessa leitura.
+# Situação e corretor mudam depois da captura, e a marca não vê isso: cada
+# consulta informa ``revalidar_s`` e, se os leads que vai devolver foram
+# buscados há mais tempo que isso, a janela dela é relida da página 1 — o
+# que também tira da tabela os leads que sumiram do CRM.
+#
+# O CRM inteiro (consulta sem ``limit`` nem ``since``, página 17) não é
+# percorrido de uma vez sob o lock: a primeira leitura vai só até
+# ``PAGINAS_POR_TRECHO`` páginas e conta como cobertura o que leu; o resto
+# do histórico — e, depois, a revalidação dele — é lido numa thread em
+# segundo plano, em trechos, que só pega o lock para gravar cada trecho.
+# Trecho com erro fica marcado e é tentado de novo depois de
+# ``RETOMADA_ESPERA_S``. Enquanto isso, as consultas seguem incrementais.
+
+ARQ_BANCO_LEADS = Path("data") / "supremo_leads.db"
+FORMATO_CAPTURA = "%Y-%m-%d %H:%M:%S"
+TOPO_CAPTURA = "9999-12-31 23:59:59"
+
+PAGINAS_POR_TRECHO = 25
+PAUSA_RETOMADA_S = 1.0
+RETOMADA_ESPERA_S = 120
+CHAVES_RETOMADA = ("retomar_pagina", "retomar_ate", "retomada_falhou_em")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    id            TEXT PRIMARY KEY,
+    data_captura  TEXT NOT NULL,
+    dados         TEXT NOT NULL,
+    buscado_em    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_leads_captura ON leads (data_captura);
+
+CREATE TABLE IF NOT EXISTS metadados (
+    chave  TEXT PRIMARY KEY,
+    valor  TEXT
+);
+
+CREATE TABLE IF NOT EXISTS origem_clientes (
+    id            TEXT PRIMARY KEY,
+    nome_key      TEXT NOT NULL,
+    cpf           TEXT NOT NULL,
+    origem        TEXT NOT NULL,
+    data_captura  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_origem_nome ON origem_clientes (nome_key);
+CREATE INDEX IF NOT EXISTS idx_origem_cpf ON origem_clientes (cpf);
+
+CREATE TRIGGER IF NOT EXISTS trg_leads_apagar_origem AFTER DELETE ON leads
+BEGIN
+    DELETE FROM origem_clientes WHERE id = old.id;
+END;
+"""
+
+_schema_pronto = set()
+_schema_lock = threading.Lock()
+
+# decisão e gravação da tabela, uma por vez no processo; a rede fica fora
+_LOCK_SYNC = threading.Lock()
+
+# uma busca por consulta (limit, since): sessões com a mesma consulta
+# esperam e aproveitam o que a primeira gravou
+_TRAVAS_BUSCA: Dict[tuple, threading.Lock] = {}
+_LOCK_TRAVAS = threading.Lock()
+
+# no máximo uma leitura do histórico em segundo plano por processo
+_RETOMADA: Dict[str, Optional[threading.Thread]] = {"thread": None}
+_LOCK_RETOMADA = threading.Lock()
+
+
+@contextmanager
+def conexao(caminho: Path = None):
+    caminho = Path(caminho or ARQ_BANCO_LEADS)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(caminho, timeout=30)
+    try:
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        chave = str(caminho.resolve())
+        if chave not in _schema_pronto:
+            with _schema_lock:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _preencher_indice_origem(conn)
+                conn.commit()
+                _schema_pronto.add(chave)
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _ler_metadados(conn: sqlite3.Connection) -> Dict[str, str]:
+    return dict(conn.execute("SELECT chave, valor FROM metadados").fetchall())
+
+
+def _gravar_metadados(conn: sqlite3.Connection, **valores) -> None:
+    conn.executemany(
+        "INSERT INTO metadados (chave, valor) VALUES (?, ?) "
+        "ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor",
+        [(chave, "" if valor is None else str(valor)) for chave, valor in valores.items()],
+    )
+
+
+def _apagar_retomada(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"DELETE FROM metadados WHERE chave IN ({', '.join('?' * len(CHAVES_RETOMADA))})",
+        CHAVES_RETOMADA,
+    )
+
+
+def _texto_captura(capturas: pd.Series) -> List[str]:
+    return capturas.dt.strftime(FORMATO_CAPTURA).fillna("").tolist()
+
+
+def _gravar_leads(conn: sqlite3.Connection, busca: Dict[str, Any], agora: float) -> List[str]:
+    """Grava (upsert) os leads da leitura e devolve as data_captura deles."""
+    leads = [lead for lead in busca["leads"] if lead.get("id") is not None]
+    capturas = _texto_captura(_captura(leads))
+
+    conn.executemany(
+        "INSERT INTO leads (id, data_captura, dados, buscado_em) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET data_captura = excluded.data_captura, "
+        "dados = excluded.dados, buscado_em = excluded.buscado_em",
+        [
+            (str(lead["id"]), captura, json.dumps(lead, ensure_ascii=False), agora)
+            for lead, captura in zip(leads, capturas)
+        ],
+    )
+
+    _indexar_origem(conn, leads, capturas)
+    return capturas
+
+
+def _registrar_busca(
+    conn: sqlite3.Connection,
+    busca: Dict[str, Any],
+    agora: float,
+    since: Optional[pd.Timestamp] = None,
+    retomar: bool = False,
+) -> None:
+    """
+    Grava uma leitura feita a partir da página 1 e atualiza marca/cobertura.
+    Na faixa que a leitura cobriu, o que não voltou foi apagado no CRM.
+    Com ``retomar`` (primeiro trecho do CRM inteiro), o que faltou ler fica
+    marcado para a leitura em segundo plano.
+    """
+    datas = [c for c in _gravar_leads(conn, busca, agora) if c]
+    meta = _ler_metadados(conn)
+
+    if busca["completo"]:
+        inicio = ""
+    elif not busca["interrompido"] and since is not None:
+        inicio = since.strftime(FORMATO_CAPTURA)
+    elif datas:
+        inicio = min(datas)
+    else:
+        return
+
+    # contígua do topo até ``inicio``; se alcançou a marca antiga, emenda
+    # com a cobertura que já existia
+    marca_antiga = meta.get("marca_captura")
+    emendou = bool(marca_antiga) and inicio <= marca_antiga and "cobertura" in meta
+    if busca["falhou"] and not emendou and "cobertura" in meta:
+        # falhou antes de alcançar a marca: ficam os leads lidos, mas marca,
+        # cobertura e leitura pendente seguem as de antes — a próxima
+        # incremental relê a partir da marca antiga
+        _gravar_metadados(conn, sincronizado_em=agora, versao_leads=agora)
+        return
+
+    conn.execute("DELETE FROM leads WHERE data_captura >= ? AND buscado_em < ?", (inicio, agora))
+    cobertura = min(inicio, meta["cobertura"]) if emendou else inicio
+
+    _gravar_metadados(
+        conn,
+        marca_captura=max(datas + [marca_antiga or ""]),
+        cobertura=cobertura,
+        sincronizado_em=agora,
+        versao_leads=agora,
+    )
+
+    if retomar and not busca["completo"]:
+        _gravar_metadados(
+            conn,
+            retomar_pagina=busca["proxima"],
+            retomar_ate=inicio,
+            retomada_falhou_em=agora if busca["falhou"] else "",
+        )
+    elif busca["completo"] or not emendou:
+        # histórico lido até o fim, ou cobertura refeita do zero: a leitura
+        # pendente não emenda mais com a tabela
+        _apagar_retomada(conn)
+
+
+def _registrar_trecho(conn: sqlite3.Connection, busca: Dict[str, Any], agora: float, pagina: str) -> None:
+    """
+    Grava um trecho da leitura do histórico em segundo plano. O trecho
+    cobre de ``retomar_ate`` (onde o anterior parou) até o lead mais antigo
+    que leu; nessa faixa, o que não voltou foi apagado no CRM.
+    """
+    datas = [c for c in _gravar_leads(conn, busca, agora) if c]
+    meta = _ler_metadados(conn)
+    if meta.get("retomar_pagina") != pagina:
+        # a cobertura foi refeita enquanto o trecho era lido: fica só o upsert
+        return
+
+    ate = meta.get("retomar_ate") or TOPO_CAPTURA
+    marca = max(datas + [meta.get("marca_captura") or ""])
+
+    if busca["completo"]:
+        conn.execute("DELETE FROM leads WHERE data_captura < ? AND buscado_em < ?", (ate, agora))
+        _apagar_retomada(conn)
+        _gravar_metadados(conn, marca_captura=marca, cobertura="", versao_leads=agora)
+        return
+
+    if not datas:
+        _gravar_metadados(conn, retomada_falhou_em=agora)
+        return
+
+    inicio = min(datas)
+    conn.execute(
+        "DELETE FROM leads WHERE data_captura >= ? AND data_captura < ? AND buscado_em < ?",
+        (inicio, ate, agora),
+    )
+    _gravar_metadados(
+        conn,
+        marca_captura=marca,
+        cobertura=min(meta.get("cobertura", inicio), inicio),
+        retomar_pagina=max(busca["proxima"], int(pagina)),
+        retomar_ate=min(inicio, ate),
+        retomada_falhou_em=agora if busca["falhou"] else "",
+        versao_leads=agora,
+    )
+
+
+def _filtro(limit: Optional[int], since: Optional[pd.Timestamp]):
+    filtro, params = "", []
+    if since is not None:
+        filtro, params = "WHERE data_captura >= ?", [since.strftime(FORMATO_CAPTURA)]
+    limite = f"LIMIT {int(limit)}" if limit is not None else ""
+    return filtro, limite, params
+
+
+def _atende(
+    conn: sqlite3.Connection,
+    limit: Optional[int],
+    since: Optional[pd.Timestamp],
+    revalidar_s: float,
+    agora: float,
+) -> bool:
+    """True se a tabela responde à consulta sem reler a janela na API."""
+    meta = _ler_metadados(conn)
+    if "cobertura" not in meta:
+        return False
+
+    filtro, limite, params = _filtro(limit, since)
+    qtde, mais_antiga, buscado_min = conn.execute(
+        f"SELECT COUNT(*), MIN(NULLIF(data_captura, '')), MIN(buscado_em) FROM ("
+        f"SELECT data_captura, buscado_em FROM leads {filtro} "
+        f"ORDER BY data_captura DESC {limite})",
+        params,
+    ).fetchone()
+
+    cobertura = meta["cobertura"]
+    coberto = cobertura == ""
+    if not coberto and since is not None:
+        coberto = cobertura <= params[0]
+    if not coberto and limit is not None:
+        coberto = qtde >= limit and mais_antiga is not None and mais_antiga >= cobertura
+
+    fresco = buscado_min is None or agora - buscado_min <= revalidar_s
+    return coberto and fresco
+
+
+def _ler_leads(conn: sqlite3.Connection, limit: Optional[int], since: Optional[pd.Timestamp]) -> pd.DataFrame:
+    filtro, limite, params = _filtro(limit, since)
+    linhas = conn.execute(
+        f"SELECT dados FROM leads {filtro} ORDER BY data_captura DESC {limite}", params
+    ).fetchall()
+    return pd.DataFrame([json.loads(d) for d, in linhas])
+
+
+def _trava_busca(chave: tuple) -> threading.Lock:
+    with _LOCK_TRAVAS:
+        return _TRAVAS_BUSCA.setdefault(chave, threading.Lock())
+
+
+def sincronizar_leads(
+    limit: Optional[int] = None,
+    since: Optional[pd.Timestamp] = None,
+    ttl: float = 30,
+    revalidar_s: float = 1800,
+    max_pages: int = 200,
+    client: Optional[SupremoClient] = None,
+) -> None:
+    """
+    Deixa a tabela pronta para a consulta (``limit``/``since``; sem nenhum
+    dos dois, o CRM inteiro):
+
+    - a cada ``ttl`` segundos, busca só os leads novos (desde a marca);
+    - se a tabela ainda não cobre a consulta, ou se os leads dela foram
+      buscados há mais de ``revalidar_s`` segundos, relê a janela inteira.
+
+    Para o CRM inteiro, a leitura aqui vai no máximo até
+    ``PAGINAS_POR_TRECHO`` páginas; o resto do histórico e a revalidação
+    ficam com a thread de segundo plano.
+
+    A API é lida sem ``_LOCK_SYNC``: ele só é tomado para decidir o que
+    buscar e para gravar, então uma janela longa (página 16 ou 15) não
+    segura a sincronização das outras páginas.
+    """
+    since = pd.Timestamp(since) if since is not None else None
+    client = client or SupremoClient()
+    historico = limit is None and since is None
+
+    with _trava_busca((limit, since)):
+        with _LOCK_SYNC, conexao() as conn:
+            agora = time.time()
+            pronto = _atende(conn, limit, since, revalidar_s, agora)
+            meta = _ler_metadados(conn)
+            if historico and not pronto and (meta.get("cobertura") == "" or "retomar_pagina" in meta):
+                # histórico já lido (ou sendo lido): revalidar é com o segundo plano
+                if "retomar_pagina" not in meta:
+                    _gravar_metadados(conn, retomar_pagina=1, retomar_ate=TOPO_CAPTURA)
+                pronto = True
+
+        marca = meta.get("marca_captura")
+        busca, inicio = None, None
+        if not pronto:
+            span_atual().registrar(cache="miss", modo="janela")
+            paginas = min(max_pages, PAGINAS_POR_TRECHO) if historico else max_pages
+            busca, inicio = client.fetch_leads(max_pages=paginas, limit=limit, since=since), since
+        elif marca and agora - float(meta.get("sincronizado_em") or 0) >= ttl:
+            span_atual().registrar(modo="incremental")
+            inicio = pd.Timestamp(marca)
+            busca = client.fetch_leads(max_pages=max_pages, since=inicio, first_batch=1)
+
+        if busca is not None:
+            with _LOCK_SYNC, conexao() as conn, span("supremo.gravar_leads", linhas=len(busca["leads"])):
+                _registrar_busca(conn, busca, agora, inicio, retomar=historico and not pronto)
+
+    _iniciar_retomada(client)
+
+
+def _retomar_historico(client: SupremoClient) -> None:
+    """Lê o histórico pendente em trechos, até a API acabar ou uma página falhar."""
+    try:
+        while True:
+            with conexao() as conn:
+                pagina = _ler_metadados(conn).get("retomar_pagina")
+            if not pagina:
+                return
+
+            # volta uma página: leads apagados no CRM puxam os seguintes para trás
+            agora = time.time()
+            with span("supremo.retomar_historico", pagina=pagina):
+                busca = client.fetch_leads(max_pages=PAGINAS_POR_TRECHO, start_page=max(1, int(pagina) - 1))
+
+            with _LOCK_SYNC, conexao() as conn:
+                _registrar_trecho(conn, busca, agora, pagina)
+
+            if busca["completo"] or busca["falhou"]:
+                return
+            time.sleep(PAUSA_RETOMADA_S)
+    except Exception:
+        with conexao() as conn:
+            _gravar_metadados(conn, retomada_falhou_em=time.time())
+        raise
+
+
+def _iniciar_retomada(client: SupremoClient) -> None:
+    """Sobe a thread do histórico se há leitura pendente e nenhuma rodando."""
+    with _LOCK_RETOMADA:
+        thread = _RETOMADA["thread"]
+        if thread is not None and thread.is_alive():
+            return
+
+        with conexao() as conn:
+            meta = _ler_metadados(conn)
+        if "retomar_pagina" not in meta or not client.configured:
+            return
+        if time.time() - float(meta.get("retomada_falhou_em") or 0) < RETOMADA_ESPERA_S:
+            return
+
+        thread = threading.Thread(
+            target=_retomar_historico, args=(client,), name="supremo-historico", daemon=True
+        )
+        _RETOMADA["thread"] = thread
+        thread.start()
+
+
+@rastrear("supremo.carregar_leads", cache=True)
+def carregar_leads(
+    limit: Optional[int] = None,
+    since: Optional[pd.Timestamp] = None,
+    ttl: float = 30,
+    revalidar_s: float = 1800,
+    max_pages: int = 200,
+    client: Optional[SupremoClient] = None,
+) -> pd.DataFrame:
+    """
+    Leads crus da API (mesmas colunas do JSON), do mais novo para o mais
+    antigo: os ``limit`` mais recentes e/ou os capturados desde ``since``.
+    Sincroniza antes (ver ``sincronizar_leads``).
+    """
+    since = pd.Timestamp(since) if since is not None else None
+    sincronizar_leads(limit, since, ttl, revalidar_s, max_pages, client)
+
+    with conexao() as conn:
+        return _ler_leads(conn, limit, since)
+
+
+# =========================================================
+# ÍNDICE DE ORIGEM POR CLIENTE (NOME NORMALIZADO / CPF)
+# =========================================================
+# Mantido junto com a tabela de leads: cada lead gravado atualiza a sua
+# linha (nome sem acento/espaços extras, CPF só com dígitos, origem em
+# maiúsculas) e o gatilho apaga a linha quando o lead sai da tabela.
+CAMPOS_CPF_LEAD = ("cpf_pessoa", "cpf", "cpf_cnpj_pessoa", "documento_pessoa")
+
+_INDICE_ORIGEM: Dict[str, Any] = {"versao": None, "indice": None}
+_LOCK_INDICE = threading.Lock()
+
+
+def so_digitos(valor) -> str:
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return ""
+    return "".join(ch for ch in str(valor) if ch.isdigit())
+
+
+def _cpf_lead(lead: Dict[str, Any]) -> str:
+    for campo in CAMPOS_CPF_LEAD:
+        cpf = so_digitos(lead.get(campo))
+        if len(cpf) == 11:
+            return cpf
+    return ""
+
+
+def _linha_origem(lead: Dict[str, Any], captura: str) -> tuple:
+    return (
+        str(lead["id"]),
+        normalize_text(lead.get("nome_pessoa")),
+        _cpf_lead(lead),
+        str(lead.get("nome_origem") or "").upper().strip(),
+        captura,
+    )
+
+
+def _indexar_origem(conn: sqlite3.Connection, leads: List[Dict[str, Any]], capturas: List[str]) -> None:
+    conn.executemany(
+        "INSERT OR REPLACE INTO origem_clientes (id, nome_key, cpf, origem, data_captura) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [_linha_origem(lead, captura) for lead, captura in zip(leads, capturas)],
+    )
+
+
+def _preencher_indice_origem(conn: sqlite3.Connection) -> None:
+    """Tabelas de leads anteriores ao índice: indexa o que já está gravado."""
+    if conn.execute("SELECT 1 FROM origem_clientes LIMIT 1").fetchone():
+        return
+    linhas = conn.execute("SELECT dados, data_captura FROM leads").fetchall()
+    if linhas:
+        _indexar_origem(conn, [json.loads(d) for d, _ in linhas], [c for _, c in linhas])
+
+
+def indice_origem_clientes(ttl: float = 300, revalidar_s: float = 7 * 86400) -> Dict[str, pd.Series]:
+    """
+    Origem do CRM por cliente, sobre o histórico inteiro de leads:
+    ``{"cpf": Series CPF -> ORIGEM, "nome": Series NOME_KEY -> ORIGEM}``.
+    Cada chave fica com a origem do lead mais recente que tem origem.
+    Use com ``Series.map`` (busca por hash, custo constante por linha).
+
+    Enquanto o histórico é lido em segundo plano, o índice cobre o que já
+    chegou e é refeito a cada trecho gravado.
+    """
+    sincronizar_leads(ttl=ttl, revalidar_s=revalidar_s)
+
+    with conexao() as conn:
+        versao = _ler_metadados(conn).get("versao_leads")
+
+        with _LOCK_INDICE:
+            if _INDICE_ORIGEM["versao"] == versao and _INDICE_ORIGEM["indice"] is not None:
+                return _INDICE_ORIGEM["indice"]
+
+        with span("supremo.indice_origem") as sp:
+            df = pd.read_sql_query(
+                "SELECT nome_key, cpf, origem FROM origem_clientes "
+                "WHERE origem != '' ORDER BY data_captura DESC",
+                conn,
+            )
+            sp.registrar_frame(df)
+
+    por_cpf = df[df["cpf"] != ""].drop_duplicates("cpf")
+    por_nome = df[df["nome_key"] != ""].drop_duplicates("nome_key")
+    indice = {
+        "cpf": pd.Series(por_cpf["origem"].to_numpy(), index=por_cpf["cpf"].to_numpy()),
+        "nome": pd.Series(por_nome["origem"].to_numpy(), index=por_nome["nome_key"].to_numpy()),
+    }
+
+    with _LOCK_INDICE:
+        _INDICE_ORIGEM.update(versao=versao, indice=indice)
+    return indice